@@ -0,0 +1,70 @@
+"""
+Batch retrieval by primary keys: /api/v1/titles/batch/?ids=3,1,2.
+
+Up to BATCH_SETTINGS['MAX_IDS'] objects are read with the queries of
+one list page (the fast list or the serializer, ?fields= and
+?include= included) instead of one detail request per object. The
+results follow the order of ?ids=, ids that do not exist are listed
+under "missing" instead of failing the whole request.
+"""
+from operator import attrgetter, itemgetter
+
+from django.conf import settings
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+batch_conf = settings.BATCH_SETTINGS
+
+IDS_PARAM: str = 'ids'
+
+
+def parse_ids(value) -> list:
+    """Различные id из строки через запятую в исходном порядке."""
+    try:
+        pks = [int(item) for item in (value or '').split(',')
+               if item.strip()]
+    except ValueError:
+        pks = []
+    pks = list(dict.fromkeys(pks))
+    if not pks or min(pks) < 1 or len(pks) > batch_conf['MAX_IDS']:
+        raise ValidationError({IDS_PARAM: [
+            f'Ожидается от 1 до {batch_conf["MAX_IDS"]} целых '
+            f'положительных id через запятую.'
+        ]})
+    return pks
+
+
+class BatchRetrieveMixin:
+    """
+    Действие batch: объекты по ?ids= в порядке запроса и список
+    missing отсутствующих id. Использует быстрый список представления
+    (FastListMixin), если он включён.
+    """
+
+    def get_batch_data(self, queryset):
+        """Пары (id, представление) найденных объектов."""
+        if (getattr(self, 'fast_list_class', None) is not None
+                and settings.FAST_LIST_SETTINGS['ENABLED']):
+            fields = self.get_requested_fields()
+            objects = list(queryset.prefetch_related(None).values(
+                *self.get_fast_columns(fields)
+            ))
+            data = self.get_fast_data(objects, fields)
+            get_pk = itemgetter('id')
+        else:
+            objects = list(queryset)
+            data = self.get_serializer(objects, many=True).data
+            get_pk = attrgetter('pk')
+        return zip(map(get_pk, objects), data)
+
+    @action(methods=['GET'], detail=False)
+    def batch(self, request):
+        pks = parse_ids(request.query_params.get(IDS_PARAM))
+        found = dict(self.get_batch_data(
+            self.get_queryset().filter(pk__in=pks)
+        ))
+        return Response({
+            'results': [found[pk] for pk in pks if pk in found],
+            'missing': [pk for pk in pks if pk not in found],
+        })
@@ -0,0 +1,232 @@
+"""
+Bulk creation and update of titles.
+
+POST /api/v1/titles/ with a JSON array (or POST /api/v1/titles/bulk/)
+creates titles, PATCH /api/v1/titles/bulk/ with an array of objects
+with "id" updates them. Up to BATCH_SETTINGS['MAX_WRITE'] items are
+validated field by field (slugs come from the table caches, so this
+takes no queries), the unique (category, name, year) set is checked
+for the whole batch with one query, then the rows are written with
+bulk_create / bulk_update, the genres with one statement each for
+deleting and inserting through rows, and the change log with one
+insert. ?mode=atomic (default) writes nothing if any item is invalid,
+?mode=partial writes the valid items. Errors are reported per item
+by its index in the array.
+"""
+from api.serializers import TitlePostSerializer
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.serializers import as_serializer_error
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueTogetherValidator
+from reviews import cache
+from reviews.models import ChangeLogEntry, Title
+
+batch_conf = settings.BATCH_SETTINGS
+
+MODE_PARAM: str = 'mode'
+MODE_ATOMIC: str = 'atomic'
+MODE_PARTIAL: str = 'partial'
+UNIQUE_FIELDS: tuple = ('category', 'name', 'year')
+NON_FIELD_ERRORS: str = api_settings.NON_FIELD_ERRORS_KEY
+
+
+class TitleBulkSerializer(TitlePostSerializer):
+    """Поля произведения без проверки уникальности по одному."""
+
+    class Meta(TitlePostSerializer.Meta):
+        validators = ()
+
+
+def get_key(title) -> tuple:
+    """Значения уникального набора полей произведения."""
+    return title.category_id, title.name, title.year
+
+
+class TitleBatch:
+    """
+    Пакет произведений: items - объекты запроса, instances -
+    {индекс: произведение} для изменения. После validate() в titles
+    лежат проверенные произведения (с жанрами в genre_ids, если они
+    переданы), в errors - ошибки по индексам.
+    """
+
+    def __init__(self, items, context, instances=None):
+        self.items = items
+        self.instances = instances
+        # Один сериализатор на пакет: поля строятся один раз.
+        self.serializer = TitleBulkSerializer(
+            context=context, partial=instances is not None
+        )
+        self.titles = {}
+        self.errors = {}
+        self.fields = {'updated_at'}
+        self.pks = set()
+
+    def validate_item(self, index, item) -> None:
+        instance = None
+        if self.instances is not None:
+            instance = self.instances.get(index)
+            if instance is None:
+                self.errors[index] = {'id': [
+                    'Укажите id существующего произведения.'
+                ]}
+                return
+            if instance.pk in self.pks:
+                self.errors[index] = {'id': [
+                    'Произведение уже есть в пакете.'
+                ]}
+                return
+            self.pks.add(instance.pk)
+        try:
+            data = dict(self.serializer.run_validation(item))
+        except ValidationError as error:
+            self.errors[index] = as_serializer_error(error)
+            return
+        title = instance or Title()
+        if 'genre' in data:
+            title.genre_ids = sorted(genre.pk for genre in data.pop('genre'))
+        for name, value in data.items():
+            setattr(title, name, value)
+        self.fields.update(data)
+        self.titles[index] = title
+
+    def check_unique(self) -> None:
+        """
+        Уникальность (category, name, year) внутри пакета и в БД.
+        Произведения без категории не проверяются: БД считает NULL
+        различными значениями, как и UniqueTogetherValidator.
+        """
+        keys = {}
+        for index, title in self.titles.items():
+            if title.category_id is not None:
+                keys.setdefault(get_key(title), []).append(index)
+        if not keys:
+            return
+        taken = set(Title.objects.filter(
+            name__in={name for _, name, _ in keys},
+            year__in={year for _, _, year in keys},
+            category__isnull=False,
+        ).exclude(
+            pk__in=[title.pk for title in self.titles.values() if title.pk]
+        ).values_list('category_id', 'name', 'year'))
+        message = UniqueTogetherValidator.message.format(
+            field_names=', '.join(UNIQUE_FIELDS)
+        )
+        for key, indexes in keys.items():
+            duplicates = indexes if key in taken else indexes[1:]
+            for index in duplicates:
+                self.errors[index] = {NON_FIELD_ERRORS: [message]}
+                del self.titles[index]
+
+    def validate(self) -> None:
+        for index, item in enumerate(self.items):
+            self.validate_item(index, item)
+        if self.titles:
+            self.check_unique()
+
+    def get_error_list(self) -> list:
+        return [{'index': index, 'errors': errors}
+                for index, errors in sorted(self.errors.items())]
+
+    def set_genres(self, titles) -> None:
+        """Заменяет жанры произведений с genre_ids двумя запросами."""
+        cache.save_genre_ids(
+            [title for title in titles if hasattr(title, 'genre_ids')],
+            replace=self.instances is not None
+        )
+
+    def create(self, titles) -> None:
+        Title.objects.bulk_create(titles)
+        if not connection.features.can_return_rows_from_bulk_insert:
+            rows = Title.objects.filter(
+                name__in={title.name for title in titles}
+            ).values_list('id', 'category_id', 'name', 'year')
+            pks = {tuple(key): pk for pk, *key in rows}
+            for title in titles:
+                title.pk = pks[get_key(title)]
+
+    def update(self, titles) -> None:
+        now = timezone.now()
+        for title in titles:
+            title.updated_at = now
+        Title.objects.bulk_update(titles, sorted(self.fields))
+
+    def save(self) -> list:
+        """Записывает проверенные произведения, возвращает их по порядку."""
+        titles = [title for _, title in sorted(self.titles.items())]
+        if not titles:
+            return []
+        with transaction.atomic():
+            if self.instances is None:
+                self.create(titles)
+                action_type = ChangeLogEntry.Action.CREATE
+            else:
+                self.update(titles)
+                action_type = ChangeLogEntry.Action.UPDATE
+            self.set_genres(titles)
+            ChangeLogEntry.record(*((Title, title.pk, action_type)
+                                    for title in titles))
+        return titles
+
+
+def parse_items(data) -> list:
+    if (not isinstance(data, list) or not data
+            or len(data) > batch_conf['MAX_WRITE']):
+        raise ValidationError({NON_FIELD_ERRORS: [
+            f'Ожидается список из 1-{batch_conf["MAX_WRITE"]} объектов.'
+        ]})
+    return data
+
+
+def get_instances(items) -> dict:
+    """Изменяемые произведения {индекс: произведение} по полю id."""
+    pks = {}
+    for index, item in enumerate(items):
+        if isinstance(item, dict) and isinstance(item.get('id'), int):
+            pks[index] = item['id']
+    titles = Title.objects.in_bulk(set(pks.values()))
+    return {index: titles[pk] for index, pk in pks.items() if pk in titles}
+
+
+class TitleBulkMixin:
+    """
+    Массовое создание (POST массива или bulk) и изменение (PATCH bulk)
+    произведений, ?mode=atomic|partial. Записанные произведения
+    возвращаются как в batch (BatchRetrieveMixin).
+    """
+
+    def create(self, request, *args, **kwargs):
+        if isinstance(request.data, list):
+            return self.bulk(request)
+        return super().create(request, *args, **kwargs)
+
+    @action(methods=['POST', 'PATCH'], detail=False)
+    def bulk(self, request):
+        mode = request.query_params.get(MODE_PARAM, MODE_ATOMIC)
+        if mode not in (MODE_ATOMIC, MODE_PARTIAL):
+            raise ValidationError({MODE_PARAM: [
+                f'Допустимые значения: {MODE_ATOMIC}, {MODE_PARTIAL}.'
+            ]})
+        items = parse_items(request.data)
+        instances = None
+        if request.method == 'PATCH':
+            instances = get_instances(items)
+        batch = TitleBatch(items, self.get_serializer_context(), instances)
+        batch.validate()
+        errors = batch.get_error_list()
+        if errors and (mode == MODE_ATOMIC or not batch.titles):
+            return Response({'results': [], 'errors': errors},
+                            status=status.HTTP_400_BAD_REQUEST)
+        pks = [title.pk for title in batch.save()]
+        found = dict(self.get_batch_data(Title.objects.filter(pk__in=pks)))
+        return Response(
+            {'results': [found[pk] for pk in pks], 'errors': errors},
+            status=(status.HTTP_201_CREATED if instances is None
+                    else status.HTTP_200_OK)
+        )
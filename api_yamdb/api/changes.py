@@ -0,0 +1,90 @@
+"""
+Incremental change feed over reviews.ChangeLogEntry.
+
+Entries are returned in token (commit) order after ?since=<token>.
+Creates and updates carry the current state of the object in the
+shape of the API lists (plus the parent id for reviews and comments),
+so clients apply both as an upsert; deletes are tombstones with
+"data": null. A client whose token is older than the retention
+horizon of compactchanges or than the last bulk import (fillyamdb,
+genyamdb write past the log) gets 410 and has to re-sync with an
+export: every export response carries the token to continue from in the
+X-Changes-Token header, read before the first row.
+"""
+from api.export import CommentExportList, ReviewExportList
+from api.fast import TitleFastList, format_datetime
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from reviews.models import ChangeLogEntry
+
+feed_conf = settings.CHANGE_FEED_SETTINGS
+
+FEED_LISTS: dict = {
+    fast_list.model._meta.model_name: fast_list
+    for fast_list in (TitleFastList, ReviewExportList, CommentExportList)
+}
+
+
+class ResyncRequired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = ('Записи журнала после этого токена удалены, '
+                      'выполните полную выгрузку.')
+    default_code = 'resync_required'
+
+
+def parse_int(params, name, default, minimum, maximum=None) -> int:
+    try:
+        value = int(params.get(name, default))
+    except (TypeError, ValueError):
+        value = None
+    if (value is None or value < minimum
+            or maximum is not None and value > maximum):
+        bounds = f'от {minimum}' + (f' до {maximum}' if maximum else '')
+        raise ValidationError({name: [f'Ожидается целое число {bounds}.']})
+    return value
+
+
+def get_objects(entries) -> dict:
+    """Текущее представление изменённых объектов {(модель, id): данные}."""
+    pks = {}
+    for entry in entries:
+        if entry['action'] != ChangeLogEntry.Action.DELETE:
+            pks.setdefault(entry['model'], set()).add(entry['object_id'])
+    objects = {}
+    for model, model_pks in pks.items():
+        fast_list = FEED_LISTS[model]
+        for item in fast_list.convert(fast_list.model.objects.filter(
+            pk__in=model_pks
+        ).values(*fast_list.get_columns())):
+            objects[model, item['id']] = item
+    return objects
+
+
+def get_changes(params) -> dict:
+    """Страница ленты изменений после токена ?since= (0 - с начала)."""
+    since = parse_int(params, 'since', 0, 0)
+    limit = parse_int(params, 'limit', feed_conf['PAGE_SIZE'], 1,
+                      feed_conf['MAX_PAGE_SIZE'])
+    if since < ChangeLogEntry.get_horizon():
+        raise ResyncRequired()
+    entries = list(ChangeLogEntry.objects.filter(
+        id__gt=since
+    ).order_by('id').values(
+        'id', 'model', 'object_id', 'action', 'changed_at'
+    )[:limit + 1])
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    objects = get_objects(entries)
+    return {
+        'next': str(entries[-1]['id'] if entries else since),
+        'has_more': has_more,
+        'results': [{
+            'token': str(entry['id']),
+            'model': entry['model'],
+            'id': entry['object_id'],
+            'action': entry['action'],
+            'changed_at': format_datetime(entry['changed_at']),
+            'data': objects.get((entry['model'], entry['object_id'])),
+        } for entry in entries],
+    }
@@ -0,0 +1,143 @@
+"""
+Streaming bulk export of titles, reviews and comments.
+
+The queryset is read in primary key order with values().iterator(),
+so rows come from a server-side cursor on PostgreSQL and memory does
+not depend on the table size. Every chunk of EXPORT_SETTINGS
+['CHUNK_SIZE'] rows is turned into dicts by the fast lists of
+api.fast (the same shape as the API responses) and written to the
+StreamingHttpResponse as NDJSON or CSV, chosen by content negotiation
+(Accept header or ?format=ndjson|csv). The X-Changes-Token header
+is the change feed token to continue from after the export.
+"""
+import csv
+import json
+from itertools import islice
+
+from api.fast import CommentFastList, ReviewFastList, TitleFastList, column
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework import generics, renderers
+from reviews.models import ChangeLogEntry
+
+export_conf = settings.EXPORT_SETTINGS
+
+CSV_LIST_SEPARATOR: str = ';'
+CHANGES_TOKEN_HEADER: str = 'X-Changes-Token'
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """Один JSON-объект на строку."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        items = data if isinstance(data, list) else [data]
+        return ''.join(self.render_line(item) for item in items).encode()
+
+    def render_header(self, keys) -> str:
+        return ''
+
+    def render_line(self, item) -> str:
+        return json.dumps(item, ensure_ascii=False,
+                          separators=(',', ':')) + '\n'
+
+
+class Echo:
+    """Файлоподобный объект для csv.writer, возвращающий строку."""
+
+    def write(self, value):
+        return value
+
+
+def format_csv_value(value):
+    """Вложенные объекты выводятся слагами, списки - через ';'."""
+    if value is None:
+        return ''
+    if isinstance(value, dict):
+        return value['slug']
+    if isinstance(value, list):
+        return CSV_LIST_SEPARATOR.join(map(format_csv_value, value))
+    return value
+
+
+class CSVRenderer(renderers.BaseRenderer):
+    """CSV с заголовком из ключей объектов."""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def __init__(self):
+        self.writer = csv.writer(Echo())
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        items = data if isinstance(data, list) else [data]
+        if not items:
+            return b''
+        return (self.render_header(items[0])
+                + ''.join(map(self.render_line, items))).encode()
+
+    def render_header(self, keys) -> str:
+        return self.writer.writerow(keys)
+
+    def render_line(self, item) -> str:
+        return self.writer.writerow(
+            [format_csv_value(value) for value in item.values()]
+        )
+
+
+def stream_rows(queryset, fast_list, renderer):
+    """Генератор частей ответа: заголовок, затем по строке на объект."""
+    yield renderer.render_header([key for key, _ in fast_list.fields])
+    rows = queryset.values(*fast_list.get_columns()).iterator(
+        chunk_size=export_conf['CHUNK_SIZE']
+    )
+    while True:
+        chunk = list(islice(rows, export_conf['CHUNK_SIZE']))
+        if not chunk:
+            return
+        yield ''.join(map(renderer.render_line, fast_list.convert(chunk)))
+
+
+class TitleExportList(TitleFastList):
+    # Выгрузка целиком вытеснила бы из кеша фрагменты страниц API.
+    fragment_tables = None
+
+
+class ReviewExportList(ReviewFastList):
+    fragment_tables = None
+    fields = (('title', column('title_id')),) + ReviewFastList.fields
+    field_columns = {'title': ('title_id',), **ReviewFastList.field_columns}
+
+
+class CommentExportList(CommentFastList):
+    fragment_tables = None
+    fields = (('review', column('review_id')),) + CommentFastList.fields
+    field_columns = {'review': ('review_id',),
+                     **CommentFastList.field_columns}
+
+
+class ExportViewAPI(generics.GenericAPIView):
+    """
+    Потоковая выгрузка всех объектов queryset (после фильтров)
+    в порядке первичного ключа через export_list_class.
+    """
+    renderer_classes = (NDJSONRenderer, CSVRenderer)
+    pagination_class = None
+    export_list_class = None
+    export_name = None
+    max_queries = 3
+
+    def get(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).order_by('pk')
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            stream_rows(queryset, self.export_list_class, renderer),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{self.export_name}.{renderer.format}"'
+        )
+        response[CHANGES_TOKEN_HEADER] = str(ChangeLogEntry.get_head())
+        return response
@@ -0,0 +1,248 @@
+"""
+Read-only fast path for list endpoints.
+
+Rows are fetched with QuerySet.values() (joins included) and turned
+into dicts by the fields of the class: (output key, function of the
+row and the page data), built from column(), datetime_column() and
+page_item() or written by hand. The output
+matches the serializers of api.serializers byte for byte after
+rendering, this is checked in tests/test_fast_lists.py.
+"""
+from operator import itemgetter
+
+from api.fragments import get_fragment_key, get_fragments
+from api.serializers import CategorySerializer, GenreSerializer
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.response import Response
+from reviews import cache
+from reviews.models import Category, Comment, Genre, Review, Title
+
+User = get_user_model()
+
+
+def format_datetime(value):
+    """Как DateTimeField DRF с форматом ISO 8601 по умолчанию."""
+    if value is None:
+        return None
+    value = timezone.localtime(value).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def column(name):
+    """Значение столбца строки как есть."""
+    get = itemgetter(name)
+    return lambda row, page: get(row)
+
+
+def datetime_column(name):
+    """Дата столбца строки в формате ответа API."""
+    get = itemgetter(name)
+    return lambda row, page: format_datetime(get(row))
+
+
+def page_item(part, name):
+    """Значение из данных страницы page[part] по столбцу строки."""
+    get = itemgetter(name)
+    return lambda row, page: page[part].get(get(row))
+
+
+def get_rating(row, page):
+    if not row['rating_count']:
+        return None
+    return row['rating_sum'] // row['rating_count']
+
+
+class Representations:
+    """Данные сериализатора для строк кешированной таблицы по id."""
+
+    def __init__(self, table_cache, serializer_class):
+        self.table_cache = table_cache
+        self.serializer_class = serializer_class
+        self.version = None
+        self.data = {}
+
+    def get(self) -> dict:
+        self.table_cache.load()
+        if self.version != self.table_cache.version:
+            self.data = {pk: self.serializer_class(obj).data
+                         for pk, obj in self.table_cache.by_id.items()}
+            self.version = self.table_cache.version
+        return self.data
+
+
+categories = Representations(cache.categories, CategorySerializer)
+genres = Representations(cache.genres, GenreSerializer)
+
+
+class FastList:
+    """
+    Базовый класс быстрого списка: fields - пары (ключ ответа,
+    функция от строки и данных страницы), field_columns - поля
+    values() для каждого ключа, prepare() - данные страницы, общие
+    для всех строк. fragment_tables - таблицы TableVersion, от которых
+    зависит объект: готовые объекты берутся из кеша фрагментов
+    (api.fragments), None - без кеша.
+    """
+    model = None
+    fields = ()
+    field_columns = {}
+    fragment_tables = None
+
+    @classmethod
+    def get_columns(cls, fields=None) -> list:
+        """Поля values() для ключей fields (по умолчанию - всех)."""
+        columns = ['id']
+        if cls.fragment_tables is not None:
+            columns.append('updated_at')
+        for key, _ in cls.fields:
+            if fields is None or key in fields:
+                columns.extend(column for column in cls.field_columns[key]
+                               if column not in columns)
+        return columns
+
+    @classmethod
+    def get_converter(cls, fields=None):
+        getters = [(key, get) for key, get in cls.fields
+                   if fields is None or key in fields]
+
+        def convert(row, page):
+            return {key: get(row, page) for key, get in getters}
+
+        return convert
+
+    @classmethod
+    def prepare(cls, rows, fields=None) -> dict:
+        return {}
+
+    @classmethod
+    def convert(cls, rows, fields=None) -> list:
+        rows = list(rows)
+        convert = cls.get_converter(fields)
+
+        def build(rows):
+            page = cls.prepare(rows, fields)
+            return [convert(row, page) for row in rows]
+
+        if cls.fragment_tables is None:
+            return build(rows)
+        variant = '' if fields is None else ','.join(sorted(fields))
+        keys = [get_fragment_key(cls.__name__, row['id'], row['updated_at'],
+                                 cls.fragment_tables, variant)
+                for row in rows]
+        return get_fragments(keys, rows, build)
+
+
+class TitleFastList(FastList):
+    model = Title
+    fragment_tables = (Category._meta.db_table, Genre._meta.db_table)
+    fields = (
+        ('id', column('id')),
+        ('genre', page_item('genres', 'id')),
+        ('category', page_item('categories', 'category_id')),
+        ('rating', get_rating),
+        ('description', column('description')),
+        ('name', column('name')),
+        ('year', column('year')),
+    )
+    field_columns = {
+        'id': ('id',),
+        'genre': (),
+        'category': ('category_id',),
+        'rating': ('rating_sum', 'rating_count'),
+        'description': ('description',),
+        'name': ('name',),
+        'year': ('year',),
+    }
+
+    @classmethod
+    def prepare(cls, rows, fields=None) -> dict:
+        page = {}
+        if fields is None or 'genre' in fields:
+            genre_data = genres.get()
+            page['genres'] = {row['id']: [] for row in rows}
+            if rows:
+                for title_id, genre_id in (
+                    Title.genre.through.objects.filter(
+                        title_id__in=page['genres']
+                    ).order_by('genre_id').values_list('title_id',
+                                                       'genre_id')
+                ):
+                    page['genres'][title_id].append(genre_data.get(genre_id))
+        if fields is None or 'category' in fields:
+            page['categories'] = categories.get()
+        return page
+
+
+class ReviewFastList(FastList):
+    model = Review
+    fragment_tables = (User._meta.db_table,)
+    fields = (
+        ('id', column('id')),
+        ('author', column('author__username')),
+        ('text', column('text')),
+        ('score', column('score')),
+        ('pub_date', datetime_column('pub_date')),
+    )
+    field_columns = {
+        'id': ('id',),
+        'author': ('author__username',),
+        'text': ('text',),
+        'score': ('score',),
+        'pub_date': ('pub_date',),
+    }
+
+
+class CommentFastList(FastList):
+    model = Comment
+    fragment_tables = (User._meta.db_table,)
+    fields = (
+        ('id', column('id')),
+        ('author', column('author__username')),
+        ('text', column('text')),
+        ('pub_date', datetime_column('pub_date')),
+    )
+    field_columns = {
+        'id': ('id',),
+        'author': ('author__username',),
+        'text': ('text',),
+        'pub_date': ('pub_date',),
+    }
+
+
+class FastListMixin:
+    """
+    Отдаёт list() через fast_list_class вместо сериализатора,
+    если FAST_LIST_SETTINGS['ENABLED'].
+    """
+    fast_list_class = None
+
+    def get_requested_fields(self):
+        """Ключи объектов в ответе, None - все."""
+        return None
+
+    def get_fast_columns(self, fields) -> list:
+        return self.fast_list_class.get_columns(fields)
+
+    def get_fast_data(self, rows, fields) -> list:
+        return self.fast_list_class.convert(rows, fields)
+
+    def list(self, request, *args, **kwargs):
+        if (self.fast_list_class is None
+                or not settings.FAST_LIST_SETTINGS['ENABLED']):
+            return super().list(request, *args, **kwargs)
+        fields = self.get_requested_fields()
+        # Предзагрузки связей рассчитаны на объекты моделей.
+        queryset = self.filter_queryset(
+            self.get_queryset()
+        ).prefetch_related(None)
+        rows = queryset.values(*self.get_fast_columns(fields))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(
+                self.get_fast_data(page, fields)
+            )
+        return Response(self.get_fast_data(list(rows), fields))
@@ -1,13 +1,127 @@
+from django.conf import settings
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework as filters
+from rest_framework.filters import BaseFilterBackend
+from reviews import bitmaps, cache
 from reviews.models import Title
+from reviews.search import search
+
+GENRE_MODE_ANY: str = 'any'
+GENRE_MODE_ALL: str = 'all'
+
+
+def get_ids(table_cache, value) -> list:
+    """id объектов по слагам через запятую, None для неизвестных."""
+    objects = (table_cache.get_by_slug(slug.strip())
+               for slug in value.split(',') if slug.strip())
+    return [obj.pk if obj is not None else None for obj in objects]
+
+
+def has_genre(genre_ids):
+    """EXISTS по промежуточной таблице вместо соединения с ней."""
+    return Exists(Title.genre.through.objects.filter(
+        title_id=OuterRef('pk'), genre_id__in=genre_ids
+    ))
 
 
 class TitleFilter(filters.FilterSet):
-    category = filters.CharFilter(field_name='category__slug')
-    genre = filters.CharFilter(field_name='genre__slug')
+    """
+    category и genre принимают несколько слагов через запятую,
+    genre_mode=all требует все жанры, any (по умолчанию) - любой.
+    Жанры проверяются подзапросами EXISTS, поэтому строки
+    произведений не размножаются соединением. Без фильтра по
+    названию количество и страницы берутся из битового индекса
+    (reviews.bitmaps), условия SQL остаются проверкой строк страницы.
+    """
+    category = filters.CharFilter(method='filter_category')
+    genre = filters.CharFilter(method='filter_genre')
+    genre_mode = filters.ChoiceFilter(
+        choices=((GENRE_MODE_ANY, 'Любой из жанров'),
+                 (GENRE_MODE_ALL, 'Все жанры')),
+        method='filter_genre_mode',
+    )
     name = filters.CharFilter(field_name='name', lookup_expr='icontains')
     year = filters.NumberFilter(field_name='year')
+    year_min = filters.NumberFilter(field_name='year', lookup_expr='gte')
+    year_max = filters.NumberFilter(field_name='year', lookup_expr='lte')
 
     class Meta:
         model = Title
-        fields = ('category', 'genre', 'year', 'name')
+        fields = ('category', 'genre', 'genre_mode', 'year', 'year_min',
+                  'year_max', 'name')
+
+    def filter_queryset(self, queryset):
+        indexable = (settings.TITLE_INDEX_SETTINGS['ENABLED']
+                     and not queryset.query.has_filters()
+                     and not self.form.cleaned_data.get('name'))
+        queryset = super().filter_queryset(queryset)
+        if not indexable or queryset.query.is_empty():
+            return queryset
+        return bitmaps.titles.filter(queryset, self.get_index_conditions())
+
+    def get_index_conditions(self) -> list:
+        """Условия фильтров для индекса: (группа, проверка значения)."""
+        data = self.form.cleaned_data
+        conditions = []
+        if data.get('category'):
+            conditions.append(('categories', set(
+                get_ids(cache.categories, data['category'])
+            ).difference((None,)).__contains__))
+        if data.get('genre'):
+            genre_ids = set(get_ids(cache.genres, data['genre']))
+            if data.get('genre_mode') == GENRE_MODE_ALL:
+                conditions.extend(('genres', {genre_id}.__contains__)
+                                  for genre_id in genre_ids)
+            else:
+                conditions.append(('genres', genre_ids.__contains__))
+        for name, check in (('year', '__eq__'), ('year_min', '__le__'),
+                            ('year_max', '__ge__')):
+            if data.get(name) is not None:
+                conditions.append(('years', getattr(data[name], check)))
+        return conditions
+
+    def filter_category(self, queryset, name, value):
+        category_ids = [pk for pk in get_ids(cache.categories, value)
+                        if pk is not None]
+        if not category_ids:
+            return queryset.none()
+        return queryset.filter(category_id__in=category_ids)
+
+    def filter_genre(self, queryset, name, value):
+        genre_ids = get_ids(cache.genres, value)
+        if self.form.cleaned_data.get('genre_mode') == GENRE_MODE_ALL:
+            if not genre_ids or None in genre_ids:
+                return queryset.none()
+            for genre_id in set(genre_ids):
+                queryset = queryset.filter(has_genre([genre_id]))
+            return queryset
+        genre_ids = [pk for pk in genre_ids if pk is not None]
+        if not genre_ids:
+            return queryset.none()
+        return queryset.filter(has_genre(genre_ids))
+
+    def filter_genre_mode(self, queryset, name, value):
+        return queryset
+
+
+class TitleSearchFilter(BaseFilterBackend):
+    """
+    Полнотекстовый поиск ?search= по названию и описанию
+    произведения, результаты упорядочены по релевантности.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param)
+        if query is None:
+            return queryset
+        return search(queryset, query)
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Full-text search by name and description.',
+            'schema': {'type': 'string'},
+        }]
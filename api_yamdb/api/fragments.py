@@ -0,0 +1,101 @@
+"""
+Cache of serialized objects (fragments) for list responses.
+
+A fragment key consists of the serializer, the primary key, the
+updated_at stamp of the object and the TableVersion of the tables
+whose rows are rendered inside the fragment (categories and genres
+for titles, users for authors) and the variant of the representation
+(e.g. the requested fields); a variant of None disables the cache.
+A list is built from the fragments found in the cache with a single
+get_many, only the misses are serialized and stored. Hits and misses
+are counted per process.
+
+Both list paths use the cache: FragmentListSerializer for serializers
+and api.fast.FastList for the default values() fast path, whose keys
+are built from the updated_at column of the rows.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import models
+from rest_framework import serializers
+from reviews.cache import get_versions
+
+cache_conf = settings.RESPONSE_CACHE_SETTINGS
+
+FRAGMENT_KEY: str = 'yamdb:fragment:{}:{}:{}:{}:{}'
+
+stats: dict = {'hits': 0, 'misses': 0}
+
+
+def get_stats() -> dict:
+    """Число попаданий и промахов кеша фрагментов в этом процессе."""
+    return dict(stats)
+
+
+def get_fragment_key(name, pk, updated_at, tables, variant) -> str:
+    """Ключ фрагмента: версии таблиц tables читаются раз за запрос."""
+    versions = get_versions() if tables else {}
+    stamp = '.'.join(str(versions.get(table, 0)) for table in tables)
+    return FRAGMENT_KEY.format(name, pk, updated_at.timestamp(), stamp,
+                               variant)
+
+
+def get_fragments(keys, items, build) -> list:
+    """
+    Представления объектов items по ключам keys: найденные в кеше
+    одним get_many, для промахов - build(промахи) с записью в кеш.
+    """
+    cache = caches[cache_conf['ALIAS']]
+    fragments = cache.get_many(keys) if keys else {}
+    misses = [(key, item) for key, item in zip(keys, items)
+              if key not in fragments]
+    stats['hits'] += len(items) - len(misses)
+    stats['misses'] += len(misses)
+    if misses:
+        fresh = dict(zip([key for key, _ in misses],
+                         build([item for _, item in misses])))
+        cache.set_many(fresh, cache_conf['FRAGMENT_TIMEOUT'])
+        fragments.update(fresh)
+    return [fragments[key] for key in keys]
+
+
+class FragmentListSerializer(serializers.ListSerializer):
+    """Собирает список из закешированных фрагментов дочернего сериализатора."""
+
+    def build(self, items) -> list:
+        self.child.prepare_fragments(items)
+        return [self.child.to_representation(item) for item in items]
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.Manager)
+                     else data)
+        if self.child.get_fragment_variant() is None:
+            return self.build(items)
+        return get_fragments(
+            [self.child.get_fragment_key(item) for item in items], items,
+            self.build
+        )
+
+
+class FragmentCacheMixin:
+    """
+    Сериализатор модели с полем updated_at, чьи списки строятся
+    из кеша фрагментов. fragment_tables - таблицы TableVersion,
+    от строк которых зависит представление объекта.
+    """
+    fragment_tables = ()
+
+    def get_fragment_key(self, instance) -> str:
+        return get_fragment_key(self.__class__.__name__, instance.pk,
+                                instance.updated_at, self.fragment_tables,
+                                self.get_fragment_variant())
+
+    def get_fragment_variant(self):
+        """
+        Вариант представления (например, набор полей) для ключа
+        фрагмента. None - представление не кешируется.
+        """
+        return ''
+
+    def prepare_fragments(self, instances) -> None:
+        """Догружает данные для сериализации промахов одной пачкой."""
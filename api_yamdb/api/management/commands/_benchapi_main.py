@@ -0,0 +1,301 @@
+"""
+Per-endpoint API benchmark.
+
+The run happens in a throwaway test database (the same one
+"manage.py test" would create), seeded by the genyamdb generator, so
+create requests never touch real data. Every route of api/urls.py is
+requested anonymously and with a token of a regular user or an admin,
+reads first and writes last. For each endpoint and role p50/p95/p99
+latency, the number of SQL queries, the SQL time and hits and misses
+of the fragment cache are recorded.
+Results are written as JSON and may be compared with a stored
+baseline: more queries than in the baseline, a changed status code
+or p95 slower than the baseline by more than the tolerance is a
+regression.
+"""
+import json
+import logging
+import math
+import statistics
+import time
+from collections import namedtuple
+
+from api.fragments import get_stats
+from core.middleware import strict_query_budget
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import (setup_databases, setup_test_environment,
+                               teardown_databases, teardown_test_environment)
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.management.commands import _genyamdb_main as generator
+from reviews.models import Category, ChangeLogEntry, Genre, Title
+
+User = get_user_model()
+
+API_URL: str = '/api/v1/'
+ANON: str = 'anon'
+USER: str = 'user'
+ADMIN: str = 'admin'
+# Разница p95 меньше этой величины считается шумом измерений.
+MIN_REGRESSION_MS: float = 1.0
+BATCH_SIZE: int = 20
+
+Scenario = namedtuple('Scenario', ('name', 'method', 'path', 'body',
+                                   'statuses'))
+
+SCENARIOS: tuple = (
+    Scenario('titles-list', 'get', 'titles/', None,
+             {ANON: 200, USER: 200}),
+    Scenario('titles-detail', 'get', 'titles/{title_id}/', None,
+             {ANON: 200, USER: 200}),
+    Scenario('titles-facets', 'get', 'titles/facets/?genre={genre}', None,
+             {ANON: 200, USER: 200}),
+    Scenario('titles-batch', 'get', 'titles/batch/?ids={batch_ids}', None,
+             {ANON: 200, USER: 200}),
+    Scenario('titles-suggest', 'get', 'titles/suggest/?q=про', None,
+             {ANON: 200, USER: 200}),
+    Scenario('reviews-list', 'get', 'titles/{title_id}/reviews/', None,
+             {ANON: 200, USER: 200}),
+    Scenario('reviews-detail', 'get',
+             'titles/{title_id}/reviews/{review_id}/', None,
+             {ANON: 200, USER: 200}),
+    Scenario('comments-list', 'get',
+             'titles/{title_id}/reviews/{review_id}/comments/', None,
+             {ANON: 200, USER: 200}),
+    Scenario('comments-detail', 'get',
+             'titles/{title_id}/reviews/{review_id}/comments/{comment_id}/',
+             None, {ANON: 200, USER: 200}),
+    Scenario('categories-list', 'get', 'categories/', None,
+             {ANON: 200, USER: 200}),
+    Scenario('genres-list', 'get', 'genres/', None,
+             {ANON: 200, USER: 200}),
+    Scenario('users-list', 'get', 'users/', None,
+             {ANON: 401, ADMIN: 200}),
+    Scenario('users-detail', 'get', 'users/{username}/', None,
+             {ANON: 401, ADMIN: 200}),
+    Scenario('users-me', 'get', 'users/me/', None,
+             {ANON: 401, USER: 200}),
+    Scenario('changes-list', 'get', 'changes/?since={changes_token}', None,
+             {ANON: 200}),
+    Scenario('titles-export', 'get', 'export/titles/', None,
+             {ANON: 401, ADMIN: 200}),
+    Scenario('reviews-search', 'get', 'search/reviews/?q=сюжет', None,
+             {ANON: 401, ADMIN: 200}),
+    Scenario('titles-create', 'post', 'titles/',
+             {'name': 'Bench title {number}', 'year': 2000,
+              'category': '{category}', 'genre': ['{genre}']},
+             {ANON: 401, ADMIN: 201}),
+    Scenario('reviews-create', 'post', 'titles/{free_title_id}/reviews/',
+             {'text': 'Bench review {number}', 'score': 7},
+             {ANON: 401, USER: 201}),
+    Scenario('comments-create', 'post',
+             'titles/{title_id}/reviews/{review_id}/comments/',
+             {'text': 'Bench comment {number}'},
+             {ANON: 401, USER: 201}),
+    Scenario('categories-create', 'post', 'categories/',
+             {'name': 'Bench category', 'slug': 'bench-{role}-{number}'},
+             {ANON: 401, ADMIN: 201}),
+    Scenario('genres-create', 'post', 'genres/',
+             {'name': 'Bench genre', 'slug': 'bench-{role}-{number}'},
+             {ANON: 401, ADMIN: 201}),
+    Scenario('users-create', 'post', 'users/',
+             {'username': 'bench_{role}_{number}',
+              'email': 'bench_{role}_{number}@yamdb.fake'},
+             {ANON: 401, ADMIN: 201}),
+    Scenario('auth-signup', 'post', 'auth/signup/',
+             {'username': 'bench_signup_{number}',
+              'email': 'bench_signup_{number}@yamdb.fake'},
+             {ANON: 200}),
+    Scenario('auth-token', 'post', 'auth/token/',
+             {'username': '{username}', 'confirmation_code': 'wrong'},
+             {ANON: 400}),
+)
+
+
+class QueryTimer:
+    """Считает запросы к БД и их суммарное время (execute_wrapper)."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+def percentile(values, share: float) -> float:
+    """Перцентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(share * len(ordered)) - 1)]
+
+
+def fill(template, values):
+    """Подставляет values во все строки шаблона запроса."""
+    if isinstance(template, str):
+        return template.format(**values)
+    if isinstance(template, dict):
+        return {key: fill(value, values) for key, value in template.items()}
+    if isinstance(template, list):
+        return [fill(value, values) for value in template]
+    return template
+
+
+def seed(options) -> None:
+    dataset = generator.DatasetGenerator(
+        seed=options['seed'],
+        users=options['users'],
+        categories=options['categories'],
+        genres=options['genres'],
+        titles=options['titles'],
+        reviews=options['reviews'],
+        comments=options['comments'],
+        exponent=options['skew'],
+    )
+    generator.run(generator.DbSink(options['batch_size']), dataset)
+
+
+def get_context() -> dict:
+    """Самые нагруженные объекты набора данных и пользователи для ролей."""
+    title = Title.objects.annotate(
+        review_total=Count('reviews')
+    ).order_by('-review_total', 'id').first()
+    review = title.reviews.annotate(
+        comment_total=Count('comments')
+    ).order_by('-comment_total', 'id').first()
+    comment = review.comments.order_by('id').first()
+    user = User.objects.create(username='bench_user',
+                               email='bench_user@yamdb.fake')
+    admin = User.objects.create(username='bench_admin',
+                                email='bench_admin@yamdb.fake',
+                                role=User.Role.ADMIN)
+    title_ids = list(Title.objects.order_by('id').values_list('id', flat=True))
+    return {
+        'title_id': title.pk,
+        'review_id': review.pk,
+        'comment_id': comment.pk if comment else 0,
+        'username': user.username,
+        'category': Category.objects.order_by('id').first().slug,
+        'genre': Genre.objects.order_by('id').first().slug,
+        'title_ids': title_ids,
+        'batch_ids': ','.join(map(str, title_ids[-BATCH_SIZE:])),
+        # Импорт генератора делает более ранние токены ленты устаревшими.
+        'changes_token': ChangeLogEntry.get_head(),
+        'headers': {
+            ANON: {},
+            USER: {
+                'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'
+            },
+            ADMIN: {
+                'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(admin)}'
+            },
+        },
+    }
+
+
+def send(client, scenario, role, context, number):
+    title_ids = context['title_ids']
+    values = dict(context, role=role, number=number,
+                  free_title_id=title_ids[number % len(title_ids)])
+    path = API_URL + fill(scenario.path, values)
+    headers = context['headers'][role]
+    if scenario.body is None:
+        response = client.get(path, **headers)
+        if response.streaming:
+            # Время потокового ответа - время получения всего тела.
+            for _ in response.streaming_content:
+                pass
+        return response
+    return client.generic(scenario.method.upper(), path,
+                          json.dumps(fill(scenario.body, values)),
+                          content_type='application/json', **headers)
+
+
+def measure(client, scenario, role, context, repeat, warmup) -> dict:
+    timings, sql_timings, query_counts = [], [], []
+    expected = scenario.statuses[role]
+    for number in range(warmup + repeat):
+        if number == warmup:
+            fragments = get_stats()
+        queries = QueryTimer()
+        with connection.execute_wrapper(queries):
+            started = time.perf_counter()
+            response = send(client, scenario, role, context, number)
+            elapsed = (time.perf_counter() - started) * 1000
+        if response.status_code != expected:
+            return {'status': response.status_code, 'expected': expected}
+        if number < warmup:
+            continue
+        timings.append(elapsed)
+        sql_timings.append(queries.seconds * 1000)
+        query_counts.append(queries.count)
+    return {
+        'status': expected,
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'queries': max(query_counts),
+        'sql_ms': round(statistics.mean(sql_timings), 3),
+        'sql_total_ms': round(sum(sql_timings), 3),
+        'fragment_hits': get_stats()['hits'] - fragments['hits'],
+        'fragment_misses': get_stats()['misses'] - fragments['misses'],
+    }
+
+
+@strict_query_budget()
+def benchmark(options) -> dict:
+    """
+    Создаёт тестовую БД, заполняет её и замеряет все эндпоинты.
+    Превышение max_queries представления прерывает замеры.
+    """
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    # Ответы 4xx ожидаемы, предупреждения о них только мешают отчёту.
+    request_logger = logging.getLogger('django.request')
+    log_level = request_logger.level
+    request_logger.setLevel(logging.ERROR)
+    try:
+        seed(options)
+        context = get_context()
+        client = Client()
+        results = {}
+        for scenario in SCENARIOS:
+            for role in scenario.statuses:
+                key = f'{scenario.name}:{role}'
+                if options['only'] and options['only'] not in key:
+                    continue
+                results[key] = measure(client, scenario, role, context,
+                                       options['repeat'], options['warmup'])
+        return results
+    finally:
+        request_logger.setLevel(log_level)
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+
+
+def compare(results, baseline, tolerance: float) -> list:
+    """Возвращает описания регрессий относительно baseline."""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if result['status'] != base['status']:
+            regressions.append(f'{key}: status {result["status"]}, '
+                               f'baseline {base["status"]}')
+            continue
+        if result['queries'] > base['queries']:
+            regressions.append(f'{key}: {result["queries"]} queries, '
+                               f'baseline {base["queries"]}')
+        limit = base['p95_ms'] * (1 + tolerance)
+        if (result['p95_ms'] > limit
+                and result['p95_ms'] - base['p95_ms'] > MIN_REGRESSION_MS):
+            regressions.append(f'{key}: p95 {result["p95_ms"]:.2f} ms, '
+                               f'baseline {base["p95_ms"]:.2f} ms')
+    return regressions
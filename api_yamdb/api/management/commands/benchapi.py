@@ -0,0 +1,136 @@
+import json
+
+from api.management.commands import _benchapi_main
+from core.middleware import QueryBudgetExceeded
+from django.core.management.base import BaseCommand, CommandError
+from reviews.management.commands import _fillyamdb_input_config as conf
+
+DEFAULT_OUTPUT: str = 'benchapi.json'
+
+
+class Command(BaseCommand):
+    help = ('Benchmarking every API endpoint for anonymous and authenticated '
+            'clients on a seeded test database and comparing the results '
+            'with a baseline')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            help='Defines how many measured requests are sent per endpoint',
+            default=50
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            help='Defines how many requests per endpoint are not measured',
+            default=5
+        )
+        parser.add_argument(
+            '--only',
+            type=str,
+            help=('Runs only endpoints whose name contains the value, '
+                  'e.g. "titles" or ":anon"'),
+            default=''
+        )
+        parser.add_argument(
+            '-o',
+            '--output',
+            type=str,
+            help='Defines the JSON file for the results',
+            default=DEFAULT_OUTPUT
+        )
+        parser.add_argument(
+            '--baseline',
+            type=str,
+            help=('Defines the JSON file of a previous run, the command '
+                  'fails if the results regress against it'),
+            default=None
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            help='Defines the allowed relative p95 slowdown, 0.2 is 20%%',
+            default=0.2
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Defines the random seed of the generated dataset',
+            default=42
+        )
+        for name, default in (('users', 2000), ('categories', 10),
+                              ('genres', 50), ('titles', 2000),
+                              ('reviews', 50000), ('comments', 100000)):
+            parser.add_argument(
+                f'--{name}',
+                type=int,
+                help=f'Defines the number of generated {name}',
+                default=default
+            )
+        parser.add_argument(
+            '--skew',
+            type=float,
+            help='Defines the Zipf exponent of title popularity',
+            default=1.0
+        )
+        parser.add_argument(
+            '-b',
+            '--batch-size',
+            type=int,
+            help='Defines the number of rows inserted per statement',
+            default=conf.DEFAULT_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] + options['warmup'] > options['titles']:
+            raise CommandError('--titles must be at least --repeat + '
+                               '--warmup: every review is created for '
+                               'another title.')
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as file:
+                baseline = json.load(file)['endpoints']
+
+        try:
+            results = _benchapi_main.benchmark(options)
+        except QueryBudgetExceeded as error:
+            raise CommandError(str(error))
+        self.report(results)
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump({
+                'settings': {name: options[name] for name in (
+                    'repeat', 'warmup', 'seed', 'users', 'categories',
+                    'genres', 'titles', 'reviews', 'comments', 'skew',
+                )},
+                'endpoints': results,
+            }, file, indent=2)
+            file.write('\n')
+
+        broken = [f'{key}: status {result["status"]}, expected '
+                  f'{result["expected"]}'
+                  for key, result in results.items() if 'expected' in result]
+        if broken:
+            raise CommandError('Unexpected responses:\n' + '\n'.join(broken))
+        if baseline is not None:
+            regressions = _benchapi_main.compare(results, baseline,
+                                                 options['tolerance'])
+            if regressions:
+                raise CommandError('Regressions against the baseline:\n'
+                                   + '\n'.join(regressions))
+            self.stdout.write('No regressions against the baseline.')
+
+    def report(self, results):
+        self.stdout.write(f'{"endpoint":<26}{"status":>7}{"p50, ms":>10}'
+                          f'{"p95, ms":>10}{"p99, ms":>10}{"queries":>9}'
+                          f'{"sql, ms":>10}')
+        for key, result in results.items():
+            if 'expected' in result:
+                self.stdout.write(f'{key:<26}{result["status"]:>7}')
+                continue
+            self.stdout.write(f'{key:<26}{result["status"]:>7}'
+                              f'{result["p50_ms"]:>10.2f}'
+                              f'{result["p95_ms"]:>10.2f}'
+                              f'{result["p99_ms"]:>10.2f}'
+                              f'{result["queries"]:>9}'
+                              f'{result["sql_ms"]:>10.2f}')
@@ -0,0 +1,95 @@
+import statistics
+import time
+
+from api.pagination import encode_cursor, get_position
+from api.views import TitleViewSet
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from reviews.models import Title
+
+TITLES_URL: str = '/api/v1/titles/'
+SEED_BATCH_SIZE: int = 5000
+
+
+class Command(BaseCommand):
+    help = ('Comparing per-page latency of page-number and keyset '
+            'pagination for titles at the first and a deep page')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page',
+            type=int,
+            help='Defines the deep page number to measure',
+            default=10000
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            help='Defines how many times every request is repeated',
+            default=20
+        )
+        parser.add_argument(
+            '--seed',
+            action='store_true',
+            help=('Adds missing synthetic titles inside a transaction '
+                  'that is rolled back after the run')
+        )
+
+    def handle(self, *args, **options):
+        page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+        deep_page = options['page']
+        required = deep_page * page_size
+        with transaction.atomic():
+            if options['seed']:
+                self.seed_titles(required - Title.objects.count())
+            if Title.objects.count() < required:
+                raise CommandError(
+                    f'At least {required} titles are needed to reach page '
+                    f'{deep_page}, use --seed or load more data.'
+                )
+            self.report(self.get_urls(deep_page, page_size),
+                        options['repeat'])
+            transaction.set_rollback(True)
+
+    def seed_titles(self, missing):
+        for start in range(0, max(missing, 0), SEED_BATCH_SIZE):
+            Title.objects.bulk_create(
+                Title(name=f'Benchmark title {number:09d}', year=2000)
+                for number in range(start, min(start + SEED_BATCH_SIZE,
+                                               missing))
+            )
+
+    def get_urls(self, deep_page, page_size):
+        ordering = TitleViewSet.keyset_ordering
+        last_before_deep = Title.objects.order_by(*ordering)[
+            (deep_page - 1) * page_size - 1
+        ]
+        deep_cursor = encode_cursor(get_position(last_before_deep, ordering))
+        return (
+            ('page-number', 1, f'{TITLES_URL}?page=1'),
+            ('page-number', deep_page, f'{TITLES_URL}?page={deep_page}'),
+            ('keyset', 1, f'{TITLES_URL}?pagination=cursor'),
+            ('keyset', deep_page, f'{TITLES_URL}?cursor={deep_cursor}'),
+        )
+
+    def report(self, urls, repeat):
+        client = Client()
+        self.stdout.write(f'{"mode":<12}{"page":>8}{"median, ms":>14}'
+                          f'{"p95, ms":>12}')
+        for mode, page, url in urls:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(
+                        f'{url} returned {response.status_code}'
+                    )
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(f'{mode:<12}{page:>8}'
+                              f'{statistics.median(timings):>14.2f}'
+                              f'{p95:>12.2f}')
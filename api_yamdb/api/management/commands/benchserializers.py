@@ -0,0 +1,107 @@
+import statistics
+import time
+
+from api.fast import CommentFastList, ReviewFastList, TitleFastList
+from api.management.commands import _benchapi_main
+from api.serializers import (CommentSerializer, ReviewSerializer,
+                             TitleSerializer)
+from django.core.management.base import BaseCommand
+from django.test.utils import (setup_databases, setup_test_environment,
+                               teardown_databases, teardown_test_environment)
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from reviews import cache
+from reviews.management.commands import _fillyamdb_input_config as conf
+from reviews.models import Comment, Review, Title
+
+PAGE_SIZES: tuple = (5, 100, 1000)
+
+LISTS: tuple = (
+    ('titles', Title.objects.order_by('name', 'id'),
+     TitleSerializer, TitleFastList),
+    ('reviews', Review.objects.select_related('author')
+     .order_by('-pub_date', '-id'), ReviewSerializer, ReviewFastList),
+    ('comments', Comment.objects.select_related('author')
+     .order_by('-pub_date', '-id'), CommentSerializer, CommentFastList),
+)
+
+
+def serialize(queryset, serializer_class, fast_list, size) -> bytes:
+    objects = list(queryset[:size])
+    if serializer_class is TitleSerializer:
+        cache.attach_genre_ids(objects)
+    serializer = serializers.ListSerializer(objects,
+                                            child=serializer_class())
+    return JSONRenderer().render(serializer.data)
+
+
+def serialize_fast(queryset, serializer_class, fast_list, size) -> bytes:
+    rows = queryset.values(*fast_list.get_columns())[:size]
+    return JSONRenderer().render(fast_list.convert(rows))
+
+
+def measure(function, args, repeat) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(*args)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = ('Comparing list serialization through ModelSerializer '
+            '(without the fragment cache) with the values() fast path '
+            'at page sizes of 5, 100 and 1000 on a seeded test database')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            help='Defines how many times every page is serialized',
+            default=20
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Defines the random seed of the generated dataset',
+            default=42
+        )
+        for name, default in (('users', 500), ('categories', 10),
+                              ('genres', 50), ('titles', 2000),
+                              ('reviews', 5000), ('comments', 5000)):
+            parser.add_argument(
+                f'--{name}',
+                type=int,
+                help=f'Defines the number of generated {name}',
+                default=default
+            )
+
+    def handle(self, *args, **options):
+        options.update(skew=1.0, batch_size=conf.DEFAULT_BATCH_SIZE)
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            _benchapi_main.seed(options)
+            # Версии кешированных таблиц читаются раз на запрос,
+            # весь замер считается одним запросом.
+            cache.start_request()
+            self.report(options['repeat'])
+        finally:
+            cache.finish_request()
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+    def report(self, repeat):
+        self.stdout.write(f'{"list":<10}{"page":>6}{"serializer, ms":>16}'
+                          f'{"fast, ms":>10}{"speedup":>9}')
+        for name, queryset, serializer_class, fast_list in LISTS:
+            for size in PAGE_SIZES:
+                args = (queryset, serializer_class, fast_list, size)
+                if serialize(*args) != serialize_fast(*args):
+                    self.stderr.write(f'{name}: the fast path output '
+                                      f'differs at page size {size}')
+                slow = measure(serialize, args, repeat)
+                fast = measure(serialize_fast, args, repeat)
+                self.stdout.write(f'{name:<10}{size:>6}{slow:>16.2f}'
+                                  f'{fast:>10.2f}{slow / fast:>8.1f}x')
@@ -0,0 +1,93 @@
+import random
+import resource
+import statistics
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from reviews.management.commands._genyamdb_main import WORDS, zipf_counts
+from reviews.suggest import PrefixIndex, normalize
+
+MAX_WORDS: int = 4
+PREFIX_LENGTHS: tuple = (1, 2, 3, 5, 8)
+
+
+class Command(BaseCommand):
+    help = ('Measuring memory, build time and query latency of the title '
+            'autocomplete index on synthetic names, without the database')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--titles',
+            type=int,
+            help='Defines the number of synthetic titles',
+            default=1000000
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            help='Defines the number of queries per prefix length',
+            default=200
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Defines the seed of the random name generator',
+            default=1
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        names = [self.make_name(rng, number)
+                 for number in range(options['titles'])]
+        weights = sorted(zipf_counts(options['titles'] * 10,
+                                     options['titles'], 1.0, 10 ** 6),
+                         reverse=True)
+        rows = [(pk, name, weight) for pk, (name, weight) in enumerate(
+            zip(names, weights), start=1
+        )]
+        peak_before = self.get_peak_rss()
+        started = time.perf_counter()
+        index = PrefixIndex(rows)
+        elapsed = time.perf_counter() - started
+        size = sum(map(sys.getsizeof, (
+            index.text, index.entries, index.entry_ranks, index.ids,
+            index.weights, index.sorted_ids, index.sorted_ranks
+        )))
+        self.stdout.write(
+            f'{len(rows)} titles, {len(index.entries)} word entries, '
+            f'built in {elapsed:.1f} s\n'
+            f'index size {size / 2 ** 20:.1f} MiB, peak RSS grew by '
+            f'{(self.get_peak_rss() - peak_before) / 2 ** 20:.1f} MiB '
+            f'while building'
+        )
+        self.report(index, names, rng, options['repeat'])
+
+    def get_peak_rss(self) -> int:
+        """Пиковый размер памяти процесса в байтах (Linux)."""
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def make_name(self, rng, number) -> str:
+        words = rng.choices(WORDS, k=rng.randint(1, MAX_WORDS))
+        return f'{" ".join(words).capitalize()} {number}'
+
+    def report(self, index, names, rng, repeat):
+        limit = settings.SUGGEST_SETTINGS['LIMIT']
+        self.stdout.write(f'{"prefix":>8}{"matches":>12}{"median, ms":>14}'
+                          f'{"p95, ms":>12}')
+        for length in PREFIX_LENGTHS:
+            timings = []
+            matches = 0
+            for _ in range(repeat):
+                prefix = normalize(rng.choice(names))[:length]
+                started = time.perf_counter()
+                index.search(prefix, limit, frozenset())
+                timings.append((time.perf_counter() - started) * 1000)
+                matches += (index.bound(prefix, True)
+                            - index.bound(prefix, False))
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(f'{length:>8}{matches // repeat:>12}'
+                              f'{statistics.median(timings):>14.2f}'
+                              f'{p95:>12.2f}')
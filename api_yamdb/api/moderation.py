@@ -0,0 +1,180 @@
+"""
+Tools for moderators (admins and moderators, IsStuff).
+
+Full-text search over review and comment text: ?q= is matched by the
+index of reviews.search, results are ordered by relevance and paged
+with keyset cursors over (search_rank, id). Every object carries the
+"snippet" of its text with the matched words in <mark>, the rest of
+the snippet is HTML-escaped.
+
+Bulk deletion: POST /api/v1/moderation/reviews/ (or comments/) with
+any of "ids", "author" (username), "title" (id), "since" and "until"
+(publication date) deletes every object matching all of them, reviews
+together with their comments. The rows are selected once and deleted
+by primary keys in chunks with reviews.deletion, the change log gets
+one insert, ratings are recalculated once for the affected titles.
+"dry_run": true only counts the objects. The response holds the counts
+of deleted reviews, comments and affected titles. A request matching
+more than BATCH_SETTINGS['MAX_WRITE'] objects is rejected with 400,
+the conditions have to be narrowed. Objects can only be deleted, not
+hidden: reviews and comments have no visibility flag.
+"""
+from api.export import CommentExportList, ReviewExportList
+from api.fast import page_item
+from api.pagination import KeysetPagination
+from core.permissions import IsStuff
+from django.conf import settings
+from django.db import transaction
+from rest_framework import generics, serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+from reviews.deletion import delete_reviews, get_chunks
+from reviews.models import Comment
+from reviews.search import get_terms, highlight, search
+
+batch_conf = settings.BATCH_SETTINGS
+
+NON_FIELD_ERRORS: str = api_settings.NON_FIELD_ERRORS_KEY
+
+QUERY_PARAM: str = 'q'
+SNIPPET_FIELD: str = 'text'
+
+
+class SnippetListMixin:
+    """Добавляет к объектам быстрого списка выделенный фрагмент текста."""
+
+    @classmethod
+    def prepare(cls, rows, fields=None) -> dict:
+        page = super().prepare(rows, fields)
+        page['snippets'] = {row['id']: highlight(row['search_snippet'])
+                            for row in rows}
+        return page
+
+
+class ReviewSearchList(SnippetListMixin, ReviewExportList):
+    fields = ReviewExportList.fields + (
+        ('snippet', page_item('snippets', 'id')),
+    )
+    field_columns = {'snippet': ('search_snippet',),
+                     **ReviewExportList.field_columns}
+
+
+class CommentSearchList(SnippetListMixin, CommentExportList):
+    fields = CommentExportList.fields + (
+        ('snippet', page_item('snippets', 'id')),
+    )
+    field_columns = {'snippet': ('search_snippet',),
+                     **CommentExportList.field_columns}
+
+
+class TextSearchViewAPI(generics.ListAPIView):
+    """
+    Полнотекстовый поиск ?q= по тексту объектов queryset
+    с курсорной пагинацией по релевантности.
+    """
+    permission_classes = (IsStuff,)
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-search_rank', 'id')
+    search_list_class = None
+    max_queries = 3
+
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get(QUERY_PARAM, '')
+        if not get_terms(query):
+            raise ValidationError({QUERY_PARAM: ['Введите слова для поиска.']})
+        queryset = search(self.get_queryset(), query, SNIPPET_FIELD)
+        rows = queryset.values(*self.search_list_class.get_columns(),
+                               'search_rank')
+        page = self.paginate_queryset(rows)
+        return self.get_paginated_response(
+            self.search_list_class.convert(page)
+        )
+
+
+class BulkDeleteSerializer(serializers.Serializer):
+    """Условия отбора объектов для удаления, все вместе."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False, max_length=batch_conf['MAX_WRITE'],
+        required=False
+    )
+    author = serializers.CharField(max_length=150, required=False)
+    title = serializers.IntegerField(min_value=1, required=False)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if not set(data) - {'dry_run'}:
+            raise serializers.ValidationError(
+                'Укажите ids, author, title, since или until.'
+            )
+        if data.get('since') and data.get('until') and (
+                data['since'] > data['until']):
+            raise serializers.ValidationError(
+                'Дата since должна быть не позже until.'
+            )
+        return data
+
+
+class BulkDeleteViewAPI(APIView):
+    """
+    Массовое удаление объектов queryset по условиям из тела запроса.
+    title_field - путь к id произведения объекта.
+    """
+    permission_classes = (IsStuff,)
+    queryset = None
+    title_field = 'title_id'
+    max_queries = 12
+
+    def filter_queryset(self, data):
+        queryset = self.queryset.order_by()
+        lookups = {
+            'ids': 'pk__in',
+            'author': 'author__username',
+            'title': self.title_field,
+            'since': 'pub_date__gte',
+            'until': 'pub_date__lte',
+        }
+        return queryset.filter(**{lookup: data[name]
+                                  for name, lookup in lookups.items()
+                                  if name in data})
+
+    def get_matched(self, data, *fields) -> list:
+        """Строки отобранных объектов, не больше MAX_WRITE."""
+        limit = batch_conf['MAX_WRITE']
+        rows = list(self.filter_queryset(data).values_list(
+            'pk', *fields
+        )[:limit + 1])
+        if len(rows) > limit:
+            raise ValidationError({NON_FIELD_ERRORS: [
+                f'Условиям соответствует больше {limit} объектов, '
+                'сузьте отбор.'
+            ]})
+        return rows
+
+    def get_deleted(self, data) -> tuple:
+        """Id удаляемых отзывов, комментариев и затронутых произведений."""
+        if self.queryset.model is Comment:
+            return [], [pk for pk, in self.get_matched(data)], set()
+        rows = self.get_matched(data, self.title_field)
+        reviews = [pk for pk, _ in rows]
+        comments = []
+        for chunk in get_chunks(reviews):
+            comments.extend(Comment.objects.filter(
+                review_id__in=chunk
+            ).values_list('pk', flat=True))
+        return reviews, comments, {title for _, title in rows}
+
+    def post(self, request):
+        serializer = BulkDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        with transaction.atomic():
+            reviews, comments, titles = self.get_deleted(data)
+            if not data['dry_run']:
+                delete_reviews(reviews, comments, titles)
+        return Response({'reviews': len(reviews), 'comments': len(comments),
+                         'titles': len(titles)})
@@ -0,0 +1,210 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from types import SimpleNamespace
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+INVALID_CURSOR_MESSAGE: str = 'Некорректный курсор.'
+
+
+def get_position(obj, ordering, model=None) -> list:
+    """
+    Возвращает значения полей сортировки объекта в виде строк,
+    числовые аннотации (например, релевантность) - как есть.
+    Вместо объекта может быть словарь из values(), тогда нужна модель.
+    """
+    if isinstance(obj, dict):
+        obj, opts = SimpleNamespace(**obj), model._meta
+    else:
+        opts = obj._meta
+    position = []
+    for field in ordering:
+        name = field.lstrip('-')
+        try:
+            position.append(opts.get_field(name).value_to_string(obj))
+        except FieldDoesNotExist:
+            position.append(getattr(obj, name))
+    return position
+
+
+def get_position_value(model, name, raw_value):
+    """Значение позиции курсора для поля модели или аннотации."""
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        if isinstance(raw_value, (int, float)) and not isinstance(
+                raw_value, bool):
+            return raw_value
+        raise NotFound(INVALID_CURSOR_MESSAGE)
+    try:
+        return field.to_python(raw_value)
+    except Exception:
+        raise NotFound(INVALID_CURSOR_MESSAGE)
+
+
+def encode_cursor(position, reverse: bool = False) -> str:
+    """Упаковывает позицию в непрозрачный для клиента курсор."""
+    payload = json.dumps({'p': position, 'r': int(reverse)},
+                         separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    """Распаковывает курсор в пару (позиция, признак обратного хода)."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return list(payload['p']), bool(payload['r'])
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise NotFound(INVALID_CURSOR_MESSAGE)
+
+
+def keyset_filter(model, ordering, position, reverse: bool) -> Q:
+    """
+    Строит условие "строго после позиции" для лексикографического
+    порядка: a >= x AND ((a > x) OR (a = x AND b > y) OR ...).
+    Избыточное условие на первое поле позволяет СУБД читать индекс
+    по диапазону в нужном порядке, без сортировки остатка таблицы.
+    """
+    if len(position) != len(ordering):
+        raise NotFound(INVALID_CURSOR_MESSAGE)
+    condition = Q()
+    leading = Q()
+    equal = {}
+    for field, raw_value in zip(ordering, position):
+        name = field.lstrip('-')
+        value = get_position_value(model, name, raw_value)
+        lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+        if not equal:
+            leading = Q(**{f'{name}__{lookup}e': value})
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    return leading & condition
+
+
+class KeysetPageNumberPagination(PageNumberPagination):
+    """
+    Постраничная пагинация с опциональным курсорным (keyset) режимом.
+    По умолчанию работает как PageNumberPagination. Курсорный режим
+    включается параметром ?pagination=cursor (или наличием ?cursor=)
+    у представлений с атрибутом keyset_ordering, например
+    ('name', 'id') или ('-pub_date', '-id'). В этом режиме не выполняется
+    COUNT(*) и OFFSET, а ответ содержит только next, previous и results.
+    """
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    mode_query_value = 'cursor'
+
+    def is_keyset_requested(self, request, view) -> bool:
+        if not getattr(view, 'keyset_ordering', None):
+            return False
+        return (self.cursor_query_param in request.query_params
+                or request.query_params.get(self.mode_query_param)
+                == self.mode_query_value)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.is_keyset_requested(request, view)
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.ordering = tuple(view.keyset_ordering)
+        self.model = queryset.model
+        self.display_page_controls = False
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        position, reverse = decode_cursor(cursor) if cursor else (None, False)
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(field[1:] if field.startswith('-') else
+                             f'-{field}' for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(keyset_filter(
+                queryset.model, self.ordering, position, reverse
+            ))
+
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        self.results = results
+        return results
+
+    def get_cursor_link(self, obj, reverse: bool):
+        url = remove_query_param(self.request.build_absolute_uri(),
+                                 self.page_query_param)
+        url = replace_query_param(url, self.mode_query_param,
+                                  self.mode_query_value)
+        return replace_query_param(
+            url,
+            self.cursor_query_param,
+            encode_cursor(get_position(obj, self.ordering, self.model),
+                          reverse)
+        )
+
+    def get_next_link(self):
+        if not getattr(self, 'keyset', False):
+            return super().get_next_link()
+        if not self.has_next or not self.results:
+            return None
+        return self.get_cursor_link(self.results[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not getattr(self, 'keyset', False):
+            return super().get_previous_link()
+        if not self.has_previous or not self.results:
+            return None
+        return self.get_cursor_link(self.results[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        if not getattr(view, 'keyset_ordering', None):
+            return parameters
+        return parameters + [
+            {
+                'name': self.mode_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Set to "cursor" to use keyset pagination.',
+                'schema': {'type': 'string', 'enum': [self.mode_query_value]},
+            },
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+        ]
+
+
+class KeysetPagination(KeysetPageNumberPagination):
+    """Только курсорный режим, без номеров страниц и COUNT(*)."""
+
+    def is_keyset_requested(self, request, view) -> bool:
+        return True
@@ -1,9 +1,14 @@
+from api.fragments import FragmentCacheMixin, FragmentListSerializer
 from core.validators import (TextMaxLengthValidator, YaMDbUsernameValidator,
                              YearValidator)
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils.encoding import smart_str
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
 from rest_framework.validators import UniqueTogetherValidator, UniqueValidator
+from reviews import cache
 from reviews.models import Category, Comment, Genre, Review, Title
 
 User = get_user_model()
@@ -92,19 +97,110 @@ class GenreSerializer(serializers.ModelSerializer):
         exclude = ('id',)
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class CachedTableField(serializers.Field):
+    """
+    Выводит объекты по id (или списку id) из кеша таблицы
+    в памяти процесса, без запросов к БД.
+    """
+
+    def __init__(self, table_cache, serializer_class, **kwargs):
+        self.table_cache = table_cache
+        self.serializer_class = serializer_class
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def represent(self, pk):
+        obj = self.table_cache.get(pk)
+        return None if obj is None else self.serializer_class(obj).data
+
+    def to_representation(self, value):
+        if isinstance(value, list):
+            return [self.represent(pk) for pk in value]
+        return self.represent(value)
+
+
+class CachedManyRelatedField(serializers.ManyRelatedField):
+    """
+    Берёт объекты из кеша таблицы по списку id в атрибуте <source>_ids,
+    если он есть у объекта, иначе - из связи.
+    """
+
+    def get_attribute(self, instance):
+        pks = getattr(instance, f'{self.source}_ids', None)
+        if pks is None:
+            return super().get_attribute(instance)
+        return [self.child_relation.table_cache.get(pk) for pk in pks]
+
+
+class CachedSlugRelatedField(serializers.SlugRelatedField):
+    """Ищет объект по slug в кеше таблицы в памяти процесса."""
+
+    def __init__(self, table_cache, **kwargs):
+        self.table_cache = table_cache
+        kwargs['queryset'] = table_cache.model.objects.all()
+        super().__init__(slug_field='slug', **kwargs)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return CachedManyRelatedField(**list_kwargs)
+
+    def to_internal_value(self, data):
+        obj = self.table_cache.get_by_slug(smart_str(data))
+        if obj is None:
+            self.fail('does_not_exist', slug_name=self.slug_field,
+                      value=smart_str(data))
+        return obj
+
+
+class TitleSerializer(FragmentCacheMixin, serializers.ModelSerializer):
     """
     Преобразовывает данные модели 'Title'.
     Обрабатывает GET, DELETE запросы.
     """
-    genre = GenreSerializer(read_only=True, many=True)
-    category = CategorySerializer(read_only=True)
+    genre = CachedTableField(cache.genres, GenreSerializer,
+                             source='genre_ids')
+    category = CachedTableField(cache.categories, CategorySerializer,
+                                source='category_id')
     rating = serializers.IntegerField(read_only=True, default=None)
     description = serializers.CharField(required=False)
+    fragment_tables = (Category._meta.db_table, Genre._meta.db_table)
 
     class Meta:
-        fields = '__all__'
+        exclude = ('rating_sum', 'rating_count', 'updated_at')
         model = Title
+        list_serializer_class = FragmentListSerializer
+
+    def get_fields(self):
+        """Учитывает ?fields= и ?include= из контекста представления."""
+        fields = super().get_fields()
+        requested = self.context.get('fields')
+        if requested is not None:
+            fields = {name: field for name, field in fields.items()
+                      if name in requested}
+        if 'reviews' in self.context.get('include', {}):
+            fields['reviews'] = ReviewSerializer(
+                many=True, read_only=True, source='included_reviews'
+            )
+        return fields
+
+    def get_fragment_variant(self):
+        # Включённые отзывы меняются без изменения произведения.
+        if self.context.get('include'):
+            return None
+        return ','.join(self.fields)
+
+    def prepare_fragments(self, instances):
+        if 'genre' in self.fields:
+            cache.attach_genre_ids(instances)
+
+    def to_representation(self, instance):
+        if 'genre' in self.fields and not hasattr(instance, 'genre_ids'):
+            cache.attach_genre_ids([instance])
+        return super().to_representation(instance)
 
 
 class TitlePostSerializer(TitleSerializer):
@@ -112,16 +208,13 @@ class TitlePostSerializer(TitleSerializer):
     Преобразовывает данные модели 'Title'.
     Обрабатывает POST, PATCH запросы.
     """
-    genre = serializers.SlugRelatedField(queryset=Genre.objects.all(),
-                                         slug_field='slug',
-                                         many=True)
-    category = serializers.SlugRelatedField(queryset=Category.objects.all(),
-                                            slug_field='slug',)
+    genre = CachedSlugRelatedField(cache.genres, many=True)
+    category = CachedSlugRelatedField(cache.categories)
     description = serializers.CharField(required=False, allow_blank=True)
     year = serializers.IntegerField(validators=(YearValidator(),))
 
     class Meta:
-        fields = '__all__'
+        exclude = ('rating_sum', 'rating_count', 'updated_at')
         model = Title
 
         validators = (
@@ -131,16 +224,41 @@ class TitlePostSerializer(TitleSerializer):
             ),
         )
 
+    def save_genres(self, title, genres, replace: bool) -> None:
+        """
+        Жанры пишутся одной вставкой без сигналов m2m_changed:
+        сохранение произведения уже отметило его в журнале.
+        """
+        title.genre_ids = sorted(genre.pk for genre in genres)
+        cache.save_genre_ids([title], replace)
+
+    def create(self, validated_data):
+        genres = validated_data.pop('genre', [])
+        with transaction.atomic():
+            title = super().create(validated_data)
+            self.save_genres(title, genres, replace=False)
+        return title
+
+    def update(self, instance, validated_data):
+        genres = validated_data.pop('genre', None)
+        with transaction.atomic():
+            title = super().update(instance, validated_data)
+            if genres is not None:
+                self.save_genres(title, genres, replace=True)
+        return title
+
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(FragmentCacheMixin, serializers.ModelSerializer):
     """Преобразовывает данные модели 'Review'."""
     author = serializers.SlugRelatedField(
         read_only=True, slug_field='username',
     )
+    fragment_tables = (User._meta.db_table,)
 
     class Meta:
         model = Review
-        exclude = ('title',)
+        exclude = ('title', 'updated_at')
+        list_serializer_class = FragmentListSerializer
         read_only_fields = ('author',)
 
     def validate(self, data):
@@ -155,13 +273,15 @@ class ReviewSerializer(serializers.ModelSerializer):
         return data
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(FragmentCacheMixin, serializers.ModelSerializer):
     """Преобразовывает данные модели 'Comment'."""
     author = serializers.SlugRelatedField(
         read_only=True, slug_field='username'
     )
+    fragment_tables = (User._meta.db_table,)
 
     class Meta:
         model = Comment
-        exclude = ('review',)
+        exclude = ('review', 'updated_at')
+        list_serializer_class = FragmentListSerializer
         read_only_fields = ('author',)
@@ -0,0 +1,144 @@
+"""
+Sparse fieldsets and compound includes for list and detail responses.
+
+?fields=id,name,rating limits both the keys of every object and the
+columns read from the database (values() on the fast path, only()
+for serializers). ?include=reviews or ?include=reviews:n adds the n
+latest reviews of every object under the "reviews" key; they are
+read by a single query for the whole page.
+"""
+import re
+
+from api.fast import ReviewFastList
+from django.db.models import OuterRef, Prefetch, Subquery
+from rest_framework.exceptions import ValidationError
+from reviews.models import Review
+
+FIELDS_PARAM: str = 'fields'
+INCLUDE_PARAM: str = 'include'
+INCLUDE_PATTERN = re.compile(r'^(?P<name>[a-z_]+)(?::(?P<limit>\d+))?$')
+INCLUDED_REVIEWS: str = 'included_reviews'
+
+
+def split_param(value) -> list:
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def parse_fields(value, allowed):
+    """Множество запрошенных полей или None, если параметр не передан."""
+    if value is None:
+        return None
+    fields = set(split_param(value))
+    unknown = fields.difference(allowed)
+    if not fields or unknown:
+        raise ValidationError({FIELDS_PARAM: [
+            f'Доступные поля: {", ".join(allowed)}.'
+        ]})
+    return fields
+
+
+def parse_includes(value, options) -> dict:
+    """
+    Словарь {связь: число объектов}. options - {связь: (число
+    по умолчанию, максимальное число)}.
+    """
+    includes = {}
+    for item in split_param(value or ''):
+        match = INCLUDE_PATTERN.match(item)
+        if match is None or match['name'] not in options:
+            raise ValidationError({INCLUDE_PARAM: [
+                f'Доступные связи: {", ".join(options)}.'
+            ]})
+        default, maximum = options[match['name']]
+        limit = int(match['limit'] or default)
+        if not 1 <= limit <= maximum:
+            raise ValidationError({INCLUDE_PARAM: [
+                f'Число объектов {match["name"]} - от 1 до {maximum}.'
+            ]})
+        includes[match['name']] = limit
+    return includes
+
+
+def latest_reviews(limit):
+    """Отзывы, входящие в limit последних отзывов своего произведения."""
+    latest = Review.objects.filter(
+        title=OuterRef('title')
+    ).order_by('-pub_date', '-id').values('pk')[:limit]
+    return Review.objects.filter(
+        pk__in=Subquery(latest)
+    ).select_related('author').order_by('-pub_date', '-id')
+
+
+class SparseFieldsetMixin:
+    """
+    Поддержка ?fields= и ?include=reviews[:n] в действиях
+    sparse_actions. Допустимые поля берутся из fast_list_class,
+    include_options - {связь: (по умолчанию, максимум)}, only_required -
+    поля, нужные сериализатору при любом наборе (ключ кеша фрагментов).
+    """
+    sparse_actions = ('list', 'retrieve')
+    include_options = {'reviews': (3, 20)}
+    only_required = ('updated_at',)
+
+    def get_requested_fields(self):
+        if self.action not in self.sparse_actions:
+            return None
+        if not hasattr(self, '_requested_fields'):
+            self._requested_fields = parse_fields(
+                self.request.query_params.get(FIELDS_PARAM),
+                [key for key, _ in self.fast_list_class.fields]
+            )
+        return self._requested_fields
+
+    def get_includes(self) -> dict:
+        if self.action not in self.sparse_actions:
+            return {}
+        if not hasattr(self, '_includes'):
+            self._includes = parse_includes(
+                self.request.query_params.get(INCLUDE_PARAM),
+                self.include_options
+            )
+        return self._includes
+
+    def get_fast_columns(self, fields) -> list:
+        # Поля сортировки нужны курсору даже вне набора полей ответа.
+        columns = super().get_fast_columns(fields)
+        return columns + [field.lstrip('-') for field
+                          in getattr(self, 'keyset_ordering', ())
+                          if field.lstrip('-') not in columns]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_requested_fields()
+        if fields is not None:
+            queryset = queryset.only(*self.get_fast_columns(fields),
+                                     *self.only_required)
+        limit = self.get_includes().get('reviews')
+        if limit is not None:
+            queryset = queryset.prefetch_related(Prefetch(
+                'reviews', queryset=latest_reviews(limit),
+                to_attr=INCLUDED_REVIEWS
+            ))
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.get_requested_fields()
+        context['include'] = self.get_includes()
+        return context
+
+    def get_fast_data(self, rows, fields) -> list:
+        data = super().get_fast_data(rows, fields)
+        limit = self.get_includes().get('reviews')
+        if limit is None:
+            return data
+        reviews = {row['id']: [] for row in rows}
+        review_rows = list(latest_reviews(limit).filter(
+            title_id__in=reviews
+        ).values('title_id', *ReviewFastList.get_columns()))
+        for row, review in zip(review_rows,
+                               ReviewFastList.convert(review_rows)):
+            reviews[row['title_id']].append(review)
+        for row, item in zip(rows, data):
+            item['reviews'] = reviews[row['id']]
+        return data
@@ -0,0 +1,29 @@
+"""
+Title autocomplete: /api/v1/titles/suggest/?q=<prefix>&limit=<k>.
+
+Matching and ranking are done by the per-process prefix index of
+reviews.suggest, the database is only asked for the fields of the
+found titles by primary key.
+"""
+from api.changes import parse_int
+from django.conf import settings
+from reviews import suggest
+from reviews.models import Title
+
+suggest_conf = settings.SUGGEST_SETTINGS
+
+QUERY_PARAM: str = 'q'
+FIELDS: tuple = ('id', 'name', 'year')
+
+
+def get_suggestions(params) -> list:
+    """Произведения со словом названия, начинающимся с ?q=."""
+    limit = parse_int(params, 'limit', suggest_conf['LIMIT'], 1,
+                      suggest_conf['MAX_LIMIT'])
+    pks = suggest.titles.suggest(params.get(QUERY_PARAM, ''), limit)
+    if not pks:
+        return []
+    titles = {title['id']: title for title in Title.objects.filter(
+        pk__in=pks
+    ).values(*FIELDS)}
+    return [titles[pk] for pk in pks if pk in titles]
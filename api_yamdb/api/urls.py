@@ -1,6 +1,10 @@
-from api.views import (CategoryViewSet, CommentViewSet, CreateTokenViewAPI,
-                       GenreViewSet, RegistrationViewAPI, ReviewViewSet,
-                       TitleViewSet, UserViewSet)
+from api.views import (CategoryViewSet, ChangeFeedViewAPI,
+                       CommentDeleteViewAPI, CommentExportViewAPI,
+                       CommentSearchViewAPI, CommentViewSet,
+                       CreateTokenViewAPI, GenreViewSet, RegistrationViewAPI,
+                       ReviewDeleteViewAPI, ReviewExportViewAPI,
+                       ReviewSearchViewAPI, ReviewViewSet,
+                       TitleExportViewAPI, TitleViewSet, UserViewSet)
 from django.urls import include, path
 from rest_framework import routers
 
@@ -45,7 +49,31 @@ auth_url_patterns = [
     path('token/', CreateTokenViewAPI.as_view(), name='token'),
 ]
 
+export_url_patterns = [
+    path('titles/', TitleExportViewAPI.as_view(), name='export-titles'),
+    path('reviews/', ReviewExportViewAPI.as_view(), name='export-reviews'),
+    path('comments/', CommentExportViewAPI.as_view(),
+         name='export-comments'),
+]
+
+search_url_patterns = [
+    path('reviews/', ReviewSearchViewAPI.as_view(), name='search-reviews'),
+    path('comments/', CommentSearchViewAPI.as_view(),
+         name='search-comments'),
+]
+
+moderation_url_patterns = [
+    path('reviews/', ReviewDeleteViewAPI.as_view(),
+         name='moderation-reviews'),
+    path('comments/', CommentDeleteViewAPI.as_view(),
+         name='moderation-comments'),
+]
+
 urlpatterns = [
     path('v1/', include(router_v1.urls)),
     path('v1/auth/', include(auth_url_patterns)),
+    path('v1/export/', include(export_url_patterns)),
+    path('v1/search/', include(search_url_patterns)),
+    path('v1/moderation/', include(moderation_url_patterns)),
+    path('v1/changes/', ChangeFeedViewAPI.as_view(), name='changes'),
 ]
@@ -1,15 +1,28 @@
-from api.filters import TitleFilter
+from api.batch import BatchRetrieveMixin
+from api.bulk import TitleBulkMixin
+from api.changes import get_changes
+from api.export import (CommentExportList, ExportViewAPI, ReviewExportList,
+                        TitleExportList)
+from api.fast import (CommentFastList, FastListMixin, ReviewFastList,
+                      TitleFastList)
+from api.facets import get_facets
+from api.filters import TitleFilter, TitleSearchFilter
+from api.moderation import (BulkDeleteViewAPI, CommentSearchList,
+                            ReviewSearchList, TextSearchViewAPI)
+from api.pagination import KeysetPageNumberPagination
 from api.serializers import (CategorySerializer, CommentSerializer,
                              GenreSerializer, RegistrationSerializer,
                              ReviewSerializer, TitlePostSerializer,
                              TitleSerializer, TokenSerializer, UserSerializer)
+from api.sparse import SparseFieldsetMixin
+from api.suggest import get_suggestions
+from core.cache import CachedResponseMixin
 from core.permissions import (AllowAny, IsAdmin, IsAdminOrReadOnly,
                               IsAuthenticated, IsAuthenticatedOrReadOnly,
                               IsOwner, IsStuff)
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
-from django.db.models.aggregates import Avg
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, status, viewsets
@@ -17,7 +30,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Genre, Review, Title
+from reviews.models import Category, Comment, Genre, Review, Title
 
 User = get_user_model()
 
@@ -31,7 +44,8 @@ email_form: dict = {
 }
 
 
-class BaseCreateDestroyListViewSet(mixins.CreateModelMixin,
+class BaseCreateDestroyListViewSet(CachedResponseMixin,
+                                   mixins.CreateModelMixin,
                                    mixins.DestroyModelMixin,
                                    mixins.ListModelMixin,
                                    viewsets.GenericViewSet):
@@ -39,10 +53,21 @@ class BaseCreateDestroyListViewSet(mixins.CreateModelMixin,
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
+    # Список с JWT: пользователь, версии таблиц, COUNT и страница.
+    max_queries = {'list': 4, 'create': 4}
+
+
+class ChangeFeedViewAPI(APIView):
+    permission_classes = (AllowAny,)
+    max_queries = 7
+
+    def get(self, request):
+        return Response(get_changes(request.query_params))
 
 
 class RegistrationViewAPI(APIView):
     permission_classes = (AllowAny,)
+    max_queries = 4
 
     def post(self, request):
         serializer = RegistrationSerializer(data=request.data)
@@ -63,6 +88,7 @@ class RegistrationViewAPI(APIView):
 
 class CreateTokenViewAPI(APIView):
     permission_classes = (AllowAny,)
+    max_queries = 1
 
     def post(self, request):
         serializer = TokenSerializer(data=request.data)
@@ -87,6 +113,8 @@ class UserViewSet(viewsets.ModelViewSet):
     filter_backends = (filters.SearchFilter,)
     search_fields = ('username',)
     http_method_names = ['get', 'post', 'patch', 'delete']
+    max_queries = {'list': 3, 'retrieve': 2, 'create': 4,
+                   'partial_update': 4, 'current_user_info': 4}
 
     @action(
         methods=['PATCH', 'GET'],
@@ -111,33 +139,67 @@ class UserViewSet(viewsets.ModelViewSet):
 class CategoryViewSet(BaseCreateDestroyListViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_models = ('reviews.Category',)
 
 
 class GenreViewSet(BaseCreateDestroyListViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_models = ('reviews.Genre',)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')).order_by('name')
+class TitleViewSet(CachedResponseMixin, SparseFieldsetMixin, FastListMixin,
+                   BatchRetrieveMixin, TitleBulkMixin, viewsets.ModelViewSet):
+    queryset = Title.objects.order_by('name', 'id')
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, TitleSearchFilter)
     filterset_class = TitleFilter
+    pagination_class = KeysetPageNumberPagination
+    keyset_ordering = ('name', 'id')
+    fast_list_class = TitleFastList
+    # POST массива в create обрабатывается как bulk (api.bulk).
+    # Чтение с JWT включает запрос пользователя.
+    max_queries = {'list': 5, 'retrieve': 4, 'create': 10, 'update': 10,
+                   'partial_update': 10, 'bulk': 11, 'suggest': 3,
+                   'facets': 5, 'batch': 4}
+    # Записи произведений, отзывов и комментариев увеличивают версию
+    # журнала изменений, импорт - версии своих таблиц.
+    cache_models = ('reviews.ChangeLogEntry', 'reviews.Title',
+                    'reviews.Review', 'reviews.Category', 'reviews.Genre',
+                    'users.YamdbUser')
+    cached_actions = ('list', 'retrieve', 'facets', 'batch')
+    sparse_actions = ('list', 'retrieve', 'batch')
 
     def get_serializer_class(self):
-        if self.request.method in ['POST', 'PATCH']:
+        # Пакеты проверяет api.bulk, ответ на них - объекты для чтения.
+        if (self.request.method in ['POST', 'PATCH']
+                and not isinstance(self.request.data, list)):
             return TitlePostSerializer
         return TitleSerializer
 
+    @action(methods=['GET'], detail=False)
+    def facets(self, request):
+        return Response(get_facets(self.filter_queryset(
+            self.get_queryset()
+        )))
+
+    @action(methods=['GET'], detail=False)
+    def suggest(self, request):
+        return Response(get_suggestions(request.query_params))
+
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(FastListMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
+    fast_list_class = ReviewFastList
     permission_classes = (IsStuff | IsOwner | IsAuthenticatedOrReadOnly,)
+    pagination_class = KeysetPageNumberPagination
+    keyset_ordering = ('-pub_date', '-id')
+    max_queries = {'list': 5, 'retrieve': 3, 'create': 7, 'update': 9,
+                   'partial_update': 9}
 
     def get_queryset(self):
         title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        return title.reviews.all()
+        return title.reviews.select_related('author')
 
     def perform_create(self, serializer):
         title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
@@ -147,15 +209,20 @@ class ReviewViewSet(viewsets.ModelViewSet):
         )
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(FastListMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
+    fast_list_class = CommentFastList
     permission_classes = (IsStuff | IsOwner | IsAuthenticatedOrReadOnly,)
+    pagination_class = KeysetPageNumberPagination
+    keyset_ordering = ('-pub_date', '-id')
+    max_queries = {'list': 5, 'retrieve': 3, 'create': 5, 'update': 6,
+                   'partial_update': 6}
 
     def get_queryset(self):
         review = get_object_or_404(Review,
                                    pk=self.kwargs.get('review_id'),
                                    title=self.kwargs.get('title_id'))
-        return review.comments.all()
+        return review.comments.select_related('author')
 
     def perform_create(self, serializer):
         review = get_object_or_404(Review,
@@ -165,3 +232,47 @@ class CommentViewSet(viewsets.ModelViewSet):
             author=self.request.user,
             review=review
         )
+
+
+class TitleExportViewAPI(ExportViewAPI):
+    queryset = Title.objects.all()
+    permission_classes = (IsAdmin,)
+    filter_backends = (DjangoFilterBackend, TitleSearchFilter)
+    filterset_class = TitleFilter
+    export_list_class = TitleExportList
+    export_name = 'titles'
+
+
+class ReviewExportViewAPI(ExportViewAPI):
+    queryset = Review.objects.all()
+    permission_classes = (IsAdmin,)
+    filter_backends = ()
+    export_list_class = ReviewExportList
+    export_name = 'reviews'
+
+
+class CommentExportViewAPI(ExportViewAPI):
+    queryset = Comment.objects.all()
+    permission_classes = (IsAdmin,)
+    filter_backends = ()
+    export_list_class = CommentExportList
+    export_name = 'comments'
+
+
+class ReviewSearchViewAPI(TextSearchViewAPI):
+    queryset = Review.objects.all()
+    search_list_class = ReviewSearchList
+
+
+class CommentSearchViewAPI(TextSearchViewAPI):
+    queryset = Comment.objects.all()
+    search_list_class = CommentSearchList
+
+
+class ReviewDeleteViewAPI(BulkDeleteViewAPI):
+    queryset = Review.objects.all()
+
+
+class CommentDeleteViewAPI(BulkDeleteViewAPI):
+    queryset = Comment.objects.all()
+    title_field = 'review__title_id'
@@ -38,6 +38,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -181,3 +182,55 @@ USER_CREDENTIAL_SETTINGS = {
     'USERNAME_MAX_LENGTH': 150,
     'EMAIL_MAX_LENGTH': 254,
 }
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND',
+                             'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 10000)),
+        },
+    }
+}
+
+RESPONSE_CACHE_SETTINGS = {
+    'ALIAS': 'default',
+    'TIMEOUT': 60,
+    'FRAGMENT_TIMEOUT': 3600,
+}
+
+FAST_LIST_SETTINGS = {
+    'ENABLED': os.getenv('FAST_LISTS', 'True') == 'True',
+}
+
+EXPORT_SETTINGS = {
+    'CHUNK_SIZE': 2000,
+}
+
+CHANGE_FEED_SETTINGS = {
+    'PAGE_SIZE': 100,
+    'MAX_PAGE_SIZE': 1000,
+    'RETENTION_DAYS': 30,
+}
+
+SUGGEST_SETTINGS = {
+    'LIMIT': 10,
+    'MAX_LIMIT': 50,
+    'MAX_OVERLAY': 10000,
+}
+
+BATCH_SETTINGS = {
+    'MAX_IDS': 100,
+    'MAX_WRITE': 5000,
+}
+
+TITLE_INDEX_SETTINGS = {
+    'ENABLED': os.getenv('TITLE_INDEX', 'True') == 'True',
+    'MAX_OVERLAY': 1000,
+}
+
+QUERY_BUDGET_SETTINGS = {
+    'RAISE': os.getenv('QUERY_BUDGET_RAISE', str(DEBUG)) == 'True',
+    'STACK_DEPTH': 8,
+}
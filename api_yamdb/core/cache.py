@@ -0,0 +1,105 @@
+import hashlib
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, urlencode
+from rest_framework.response import Response
+from reviews.cache import get_versions as get_table_versions
+
+cache_conf = settings.RESPONSE_CACHE_SETTINGS
+
+RESPONSE_KEY: str = 'yamdb:response:{}:{}'
+SAFE_METHODS: tuple = ('GET', 'HEAD')
+
+
+def get_cache():
+    return caches[cache_conf['ALIAS']]
+
+
+def get_versions(labels) -> list:
+    """
+    Версии таблиц моделей из TableVersion. Они хранятся в БД и
+    увеличиваются в транзакции записи, поэтому изменения видны всем
+    процессам при любом бэкенде кеша; в рамках запроса версии
+    читаются одним запросом (reviews.cache).
+    """
+    versions = get_table_versions()
+    return [versions.get(apps.get_model(label)._meta.db_table, 0)
+            for label in labels]
+
+
+class CachedResponse(Exception):
+    """Готовый ответ из кеша, прерывает обработку запроса."""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class CachedResponseMixin:
+    """
+    Кеширует ответы безопасных запросов действий cached_actions.
+    Ключ - хеш пути, нормализованной строки запроса, формата ответа
+    и версий таблиц моделей cache_models, он же служит сильным ETag.
+    Запрос с совпадающим If-None-Match получает 304 без обращения
+    к кешу (версии - один запрос к БД), изменение любой из моделей
+    меняет ключ.
+    Browsable API не кешируется: страница содержит данные пользователя.
+    """
+    cache_models = ()
+    cached_actions = ('list', 'retrieve')
+    cached_formats = ('json',)
+
+    def get_response_fingerprint(self, request) -> str:
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        source = '|'.join((
+            request.get_host(),
+            request.path,
+            query,
+            request.accepted_renderer.format,
+            ','.join(map(str, get_versions(self.cache_models))),
+        ))
+        return hashlib.blake2b(source.encode(), digest_size=16).hexdigest()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.response_cache_key = self.response_etag = None
+        if (request.method not in SAFE_METHODS
+                or self.action not in self.cached_actions
+                or request.accepted_renderer.format
+                not in self.cached_formats):
+            return
+        fingerprint = self.get_response_fingerprint(request)
+        self.response_etag = f'"{fingerprint}"'
+        etags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+        if self.response_etag in etags or '*' in etags:
+            raise CachedResponse(HttpResponseNotModified())
+        self.response_cache_key = RESPONSE_KEY.format(
+            self.__class__.__name__, fingerprint
+        )
+        cached = get_cache().get(self.response_cache_key)
+        if cached is not None:
+            content, content_type = cached
+            raise CachedResponse(HttpResponse(content,
+                                              content_type=content_type))
+
+    def handle_exception(self, exc):
+        if isinstance(exc, CachedResponse):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args,
+                                             **kwargs)
+        if getattr(self, 'response_etag', None) is None:
+            return response
+        response['ETag'] = self.response_etag
+        if (self.response_cache_key and isinstance(response, Response)
+                and response.status_code == 200):
+            response.render()
+            get_cache().set(self.response_cache_key,
+                            (response.content, response['Content-Type']),
+                            cache_conf['TIMEOUT'])
+        return response
@@ -0,0 +1,139 @@
+import logging
+import os
+import threading
+import traceback
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import override_settings
+
+logger = logging.getLogger(__name__)
+
+budget_conf = settings.QUERY_BUDGET_SETTINGS
+
+DB_PACKAGE: str = os.path.join('django', 'db', '')
+# Число этих команд зависит от вложенности atomic() и от СУБД
+# (PostgreSQL начинает транзакцию без отдельной команды), а не от
+# работы представления: в тестах каждый atomic() становится SAVEPOINT.
+TRANSACTION_STATEMENTS: tuple = ('BEGIN', 'SAVEPOINT', 'RELEASE SAVEPOINT',
+                                 'ROLLBACK TO SAVEPOINT')
+
+_local = threading.local()
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление выполнило больше SQL-запросов, чем max_queries."""
+
+
+def strict_query_budget():
+    """
+    Включает исключение при превышении бюджета вместо записи в лог.
+    Используется в тестах и замерах как декоратор или контекстный менеджер.
+    """
+    return override_settings(QUERY_BUDGET_SETTINGS={**budget_conf,
+                                                    'RAISE': True})
+
+
+@contextmanager
+def unbudgeted_queries():
+    """
+    Запросы внутри блока не учитываются в бюджете. Для редких
+    загрузок кешей, которые не зависят от обрабатываемого запроса.
+    """
+    previous = getattr(_local, 'paused', False)
+    _local.paused = True
+    try:
+        yield
+    finally:
+        _local.paused = previous
+
+
+def get_stack() -> list:
+    """Ближайшие к месту запроса кадры стека, кроме кадров ORM."""
+    frames = [frame for frame in traceback.extract_stack()[:-2]
+              if DB_PACKAGE not in frame.filename
+              and frame.filename != __file__]
+    return traceback.format_list(frames[-budget_conf['STACK_DEPTH']:])
+
+
+def get_budget(view_func, request):
+    """
+    Возвращает пару (бюджет, имя представления) или None.
+    Атрибут max_queries представления - число на все запросы
+    или словарь {действие: число}, действия без бюджета не проверяются.
+    """
+    view_class = (getattr(view_func, 'cls', None)
+                  or getattr(view_func, 'view_class', None))
+    budget = getattr(view_class, 'max_queries', None)
+    if isinstance(budget, dict):
+        actions = getattr(view_func, 'actions', None) or {}
+        budget = budget.get(actions.get(request.method.lower()))
+    if budget is None:
+        return None
+    return budget, view_class.__name__
+
+
+class QueryRecorder:
+    """
+    Считает SQL-запросы (execute_wrapper). Стек сохраняется только
+    при первом повторе одинакового SQL, это и есть признак N+1.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.statements = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if (getattr(_local, 'paused', False)
+                or sql.startswith(TRANSACTION_STATEMENTS)):
+            return execute(sql, params, many, context)
+        self.count += 1
+        entry = self.statements.get(sql)
+        if entry is None:
+            self.statements[sql] = [1, None]
+        else:
+            entry[0] += 1
+            if entry[1] is None:
+                entry[1] = get_stack()
+        return execute(sql, params, many, context)
+
+    def repeated(self):
+        return sorted(((count, sql, stack) for sql, (count, stack)
+                       in self.statements.items() if count > 1),
+                      key=lambda item: -item[0])
+
+
+class QueryBudgetMiddleware:
+    """
+    Проверяет число SQL-запросов на запрос к представлению
+    с атрибутом max_queries. При превышении пишет в лог повторяющиеся
+    запросы со стеками, а в строгом режиме выбрасывает исключение.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        budget = getattr(request, 'query_budget', None)
+        if budget is not None and recorder.count > budget[0]:
+            self.report(request, budget, recorder)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = get_budget(view_func, request)
+
+    def report(self, request, budget, recorder):
+        max_queries, view_name = budget
+        lines = [f'{request.method} {request.path}: {recorder.count} SQL '
+                 f'queries, {view_name}.max_queries is {max_queries}.']
+        for count, sql, stack in recorder.repeated():
+            lines.append(f'Repeated {count} times: {sql}')
+            lines.extend(line.rstrip() for line in stack)
+        message = '\n'.join(lines)
+        if settings.QUERY_BUDGET_SETTINGS['RAISE']:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -93,6 +93,7 @@ class YearValidator:
             raise ValidationError(self.message, code=self.code, params=params)
 
     def is_valid_year(self, value):
+        self.message = self.result
         if not isinstance(value, int) or value < 0:
             self.message = f'Указан некорректный год ({value})'
         if value > self.current_year:
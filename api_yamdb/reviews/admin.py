@@ -4,6 +4,7 @@ from import_export.admin import ImportExportModelAdmin
 from import_export.fields import Field
 from import_export.widgets import DateTimeWidget
 from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.search import search
 
 DEFAULT_FOR_EMPTY: str = '-empty-'
 
@@ -51,6 +52,18 @@ class CommentResource(resources.ModelResource):
         fields = ('id', 'review', 'text', 'author', 'pub_date',)
 
 
+class FullTextSearchMixin:
+    """
+    Поиск в админ-зоне по полнотекстовому индексу (reviews.search)
+    вместо LIKE по search_fields, поля нужны только для строки поиска.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return search(queryset, search_term), False
+
+
 @admin.register(Category)
 class CategoryAdmin(ImportExportModelAdmin):
     """Настраивает модель отображения данных в админ-зоне ресурса."""
@@ -80,20 +93,20 @@ class TitleAdmin(ImportExportModelAdmin):
 
 
 @admin.register(Review)
-class ReviewAdmin(ImportExportModelAdmin):
+class ReviewAdmin(FullTextSearchMixin, ImportExportModelAdmin):
     """Настраивает модель отображения данных в админ-зоне ресурса."""
     resource_class = ReviewResource
     list_display = ('pk', 'title', 'text', 'score', 'author', 'pub_date',)
-    search_fields = ('pk', 'title', 'text', 'score', 'author', 'pub_date',)
+    search_fields = ('text',)
     list_filter = ('author', 'score', 'pub_date',)
     empty_value_display = DEFAULT_FOR_EMPTY
 
 
 @admin.register(Comment)
-class CommentAdmin(ImportExportModelAdmin):
+class CommentAdmin(FullTextSearchMixin, ImportExportModelAdmin):
     """Настраивает модель отображения данных в админ-зоне ресурса."""
     resource_class = CommentResource
     list_display = ('pk', 'review', 'text', 'author', 'pub_date',)
-    search_fields = ('pk', 'review', 'text', 'author', 'pub_date',)
+    search_fields = ('text',)
     list_filter = ('author', 'review', 'pub_date',)
     empty_value_display = DEFAULT_FOR_EMPTY
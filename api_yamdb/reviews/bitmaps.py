@@ -0,0 +1,347 @@
+"""
+Per-process bitmap index of titles for the list filters.
+
+Titles are numbered by their position in the (name, id) order read
+from the database, so names are compared by the same collation as in
+SQL. Every genre, category and year has a bitmap of positions - a
+Python int, so the set operations over the whole table run in C. The
+bitmaps are not compressed: one bit per title and value. A filter is
+the OR of the bitmaps of its values and the AND of the filters, the
+count of titles is the number of set bits, and a page is the run of
+set bits from the offset, read from the database by one pk__in query.
+
+The index follows the change log like reviews.suggest. A changed title
+with the same name is rewritten in place (changes of the rating do not
+touch the index at all), a new or renamed title goes to a small
+overlay of titles outside the name order, a deleted one is cleared
+from the bitmap of alive positions. Overlay titles are matched in
+Python and merged into the page by the order of the fetched rows. The
+index is rebuilt when the overlay and the deleted positions outgrow
+TITLE_INDEX_SETTINGS['MAX_OVERLAY'].
+"""
+import copy
+from array import array
+from bisect import bisect_left
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.db.models.query import ModelIterable, ValuesIterable
+from reviews.cache import ChangeLogIndex
+from reviews.models import Title, TitleQuerySet
+
+index_conf = settings.TITLE_INDEX_SETTINGS
+
+ORDERING: tuple = ('name', 'id')
+GROUPS: tuple = ('genres', 'categories', 'years')
+CHUNK_SIZE: int = 4096
+POPCOUNTS: bytes = bytes(bin(byte).count('1') for byte in range(256))
+
+
+def popcount(bitmap: int) -> int:
+    return bin(bitmap).count('1')
+
+
+def to_bitmap(positions, size: int) -> int:
+    """Битовая карта из номеров позиций."""
+    data = bytearray((size + 7) // 8)
+    for position in positions:
+        data[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(data, 'little')
+
+
+def skip_chunks(data: bytes, skip: int):
+    """Пропускает блоки с не более чем skip битами: (байт, остаток)."""
+    for start in range(0, len(data), CHUNK_SIZE):
+        size = popcount(int.from_bytes(data[start:start + CHUNK_SIZE],
+                                       'little'))
+        if skip < size:
+            return start, skip
+        skip -= size
+    return len(data), skip
+
+
+def select_bits(bitmap: int, skip: int, count: int) -> list:
+    """Позиции count установленных битов после первых skip."""
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    start, skip = skip_chunks(data, skip)
+    positions = []
+    for number in range(start, len(data)):
+        byte = data[number]
+        if skip >= POPCOUNTS[byte]:
+            skip -= POPCOUNTS[byte]
+            continue
+        for bit in range(8):
+            if not byte >> bit & 1:
+                continue
+            if skip:
+                skip -= 1
+                continue
+            positions.append(number * 8 + bit)
+            if len(positions) >= count:
+                return positions
+    return positions
+
+
+def get_signature(genres, categories, years) -> int:
+    """Хеш значений групп произведения для проверки изменений."""
+    return hash((tuple(sorted(genres)), tuple(categories), tuple(years)))
+
+
+class BitmapIndex:
+    """
+    Позиции произведений в порядке (название, id), битовые карты
+    {группа: {значение: карта}} для групп GROUPS и наложение
+    {id: значения групп} новых и переименованных произведений.
+    Построенный индекс не изменяется, apply() возвращает копию.
+    """
+
+    def __init__(self, rows, genre_rows):
+        self.ids = array('I')
+        self.names = array('q')
+        categories = array('I')
+        years = array('i')
+        positions = {group: {} for group in GROUPS}
+        for position, (pk, name, category_id, year) in enumerate(rows):
+            self.ids.append(pk)
+            self.names.append(hash(name))
+            categories.append(category_id or 0)
+            years.append(year)
+            positions['categories'].setdefault(
+                category_id, array('I')
+            ).append(position)
+            positions['years'].setdefault(year, array('I')).append(position)
+        order = sorted(range(len(self.ids)), key=self.ids.__getitem__)
+        self.sorted_ids = array('I', (self.ids[position]
+                                      for position in order))
+        self.sorted_positions = array('I', order)
+        self.signatures = array('q', (
+            get_signature((), (category_id or None,), (year,))
+            for category_id, year in zip(categories, years)
+        ))
+        for title_id, group in groupby(genre_rows, key=itemgetter(0)):
+            position = self.get_position(title_id)
+            if position is None:
+                continue
+            genre_ids = [genre_id for _, genre_id in group]
+            self.signatures[position] = get_signature(
+                genre_ids, (categories[position] or None,),
+                (years[position],)
+            )
+            for genre_id in genre_ids:
+                positions['genres'].setdefault(
+                    genre_id, array('I')
+                ).append(position)
+        self.bitmaps = self.to_bitmaps(positions)
+        self.alive = (1 << len(self.ids)) - 1
+        self.dead = 0
+        self.overlay = {}
+
+    def get_position(self, pk):
+        """Позиция произведения с первичным ключом pk или None."""
+        index = bisect_left(self.sorted_ids, pk)
+        if index < len(self.sorted_ids) and self.sorted_ids[index] == pk:
+            return self.sorted_positions[index]
+        return None
+
+    def to_bitmaps(self, positions) -> dict:
+        return {group: {value: to_bitmap(value_positions, len(self.ids))
+                        for value, value_positions in group_positions.items()}
+                for group, group_positions in positions.items()}
+
+    def is_alive(self, position) -> bool:
+        return bool(self.alive >> position & 1)
+
+    def rewrite(self, changes: dict) -> None:
+        """Заменяет значения групп на позициях {позиция: значения}."""
+        changes = {position: values for position, values in changes.items()
+                   if not self.is_alive(position)
+                   or get_signature(*map(values.get, GROUPS))
+                   != self.signatures[position]}
+        if not changes:
+            return
+        mask = to_bitmap(changes, len(self.ids))
+        self.signatures = array('q', self.signatures)
+        positions = {group: {} for group in GROUPS}
+        for position, values in changes.items():
+            self.signatures[position] = get_signature(
+                *map(values.get, GROUPS)
+            )
+            for group in GROUPS:
+                for value in values[group]:
+                    positions[group].setdefault(value, []).append(position)
+        changed = self.to_bitmaps(positions)
+        self.bitmaps = {group: {
+            value: self.bitmaps[group].get(value, 0) & ~mask
+            | changed[group].get(value, 0)
+            for value in self.bitmaps[group].keys() | changed[group].keys()
+        } for group in GROUPS}
+        self.alive |= mask
+
+    def apply(self, pks) -> 'BitmapIndex':
+        """Копия индекса с текущими данными произведений pks."""
+        title_values = {
+            pk: {'genres': set(), 'categories': {category_id},
+                 'years': {year}, 'name': name}
+            for pk, name, category_id, year in Title.objects.filter(
+                pk__in=pks
+            ).values_list('id', 'name', 'category_id', 'year')
+        }
+        for title_id, genre_id in Title.genre.through.objects.filter(
+            title_id__in=title_values
+        ).values_list('title_id', 'genre_id'):
+            title_values[title_id]['genres'].add(genre_id)
+        index = copy.copy(self)
+        index.overlay = dict(self.overlay)
+        rewritten = {}
+        removed = []
+        for pk in pks:
+            index.overlay.pop(pk, None)
+            position = self.get_position(pk)
+            values = title_values.get(pk)
+            if (values is not None and position is not None
+                    and hash(values['name']) == self.names[position]):
+                rewritten[position] = values
+                continue
+            if values is not None:
+                index.overlay[pk] = values
+            if position is not None:
+                removed.append(position)
+        index.rewrite(rewritten)
+        index.alive &= ~to_bitmap(removed, len(self.ids))
+        index.dead = len(self.ids) - popcount(index.alive)
+        return index
+
+    def select(self, conditions) -> 'IndexMatch':
+        """
+        Произведения, подходящие под все условия (группа, проверка
+        значения): в группе достаточно одного подходящего значения.
+        """
+        bits = self.alive
+        for group, test in conditions:
+            union = 0
+            for value, bitmap in self.bitmaps[group].items():
+                if test(value):
+                    union |= bitmap
+            bits &= union
+        return IndexMatch(self, bits, [
+            pk for pk, values in self.overlay.items()
+            if all(any(map(test, values[group]))
+                   for group, test in conditions)
+        ])
+
+
+class IndexMatch:
+    """Результат фильтрации: биты основы и id из наложения."""
+
+    def __init__(self, index, bits, overlay):
+        self.index = index
+        self.bits = bits
+        self.overlay = overlay
+        self.count = popcount(bits) + len(overlay)
+
+    def get_ids(self, skip: int, count: int) -> list:
+        """id count подходящих произведений основы после первых skip."""
+        return [self.index.ids[position]
+                for position in select_bits(self.bits, skip, count)]
+
+
+class IndexedTitleQuerySet(TitleQuerySet):
+    """
+    Выборка, отфильтрованная ещё и индексом: count() и срезы
+    отвечают по битовым картам, строки страницы читаются по pk__in
+    с исходными условиями выборки (двойная проверка). Операции, не
+    меняющие набор и порядок строк, сохраняют результат индекса,
+    остальные возвращают обычную выборку.
+    """
+    match = None
+
+    def keep_match(self, clone):
+        clone.match = self.match
+        return clone
+
+    def values(self, *fields, **expressions):
+        clone = super().values(*fields, **expressions)
+        return clone if expressions else self.keep_match(clone)
+
+    def only(self, *fields):
+        return self.keep_match(super().only(*fields))
+
+    def defer(self, *fields):
+        return self.keep_match(super().defer(*fields))
+
+    def select_related(self, *fields):
+        return self.keep_match(super().select_related(*fields))
+
+    def prefetch_related(self, *lookups):
+        return self.keep_match(super().prefetch_related(*lookups))
+
+    def order_by(self, *field_names):
+        clone = super().order_by(*field_names)
+        return self.keep_match(clone) if field_names == ORDERING else clone
+
+    def is_indexed(self) -> bool:
+        return (self.match is not None and self._result_cache is None
+                and not self.query.is_sliced
+                and self._iterable_class in (ModelIterable, ValuesIterable)
+                and (not self._fields or 'id' in self._fields))
+
+    def count(self):
+        if not self.is_indexed():
+            return super().count()
+        return self.match.count
+
+    def __getitem__(self, k):
+        if (not self.is_indexed() or not isinstance(k, slice)
+                or k.step is not None or k.stop is None):
+            return super().__getitem__(k)
+        start = k.start or 0
+        if start >= k.stop:
+            return []
+        # Строки наложения могут стоять перед страницей, поэтому основа
+        # читается с запасом на их число. Строка основы с номером first
+        # идёт после всех прочитанных строк наложения, стоящих перед
+        # ней, поэтому номер i-й прочитанной строки (начиная с неё) -
+        # first + i, а строки до неё на страницу не попадают.
+        overlay = self.match.overlay
+        first = max(0, start - len(overlay))
+        rows = list(super().filter(
+            pk__in=self.match.get_ids(first, k.stop - first) + overlay
+        )[:k.stop - first])
+        return rows[start - first:]
+
+
+class TitleIndex(ChangeLogIndex):
+    """Индекс фильтров списка произведений."""
+    max_overlay = index_conf['MAX_OVERLAY']
+
+    def build(self):
+        return BitmapIndex(
+            Title.objects.order_by(*ORDERING).values_list(
+                'id', 'name', 'category_id', 'year'
+            ).iterator(),
+            Title.genre.through.objects.order_by(
+                'title_id', 'genre_id'
+            ).values_list('title_id', 'genre_id').iterator(),
+        )
+
+    def apply(self, state, pks):
+        return state.apply(pks)
+
+    def get_overlay_size(self, state) -> int:
+        return len(state.overlay) + state.dead
+
+    def filter(self, queryset, conditions):
+        """
+        Выборка queryset, упорядоченная по ORDERING, со страницами
+        и количеством из индекса для условий conditions.
+        """
+        if tuple(queryset.query.order_by) != ORDERING:
+            return queryset
+        indexed = queryset._chain()
+        indexed.__class__ = IndexedTitleQuerySet
+        indexed.match = self.get_state().select(conditions)
+        return indexed
+
+
+titles = TitleIndex()
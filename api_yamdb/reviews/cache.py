@@ -0,0 +1,194 @@
+"""
+Read-through cache of the small hot tables (categories, genres)
+in the memory of every server process.
+
+Each table has a version in TableVersion that is bumped in the same
+transaction as the write. A process reads all versions with a single
+query at most once per request (outside of requests - on every
+access) and reloads a table only when its version has changed.
+Cached objects are shared between requests and must not be modified.
+
+ChangeLogIndex is the base of the larger per-process indexes over
+titles (reviews.suggest, reviews.bitmaps): they are built once and
+then follow the title entries of the change log.
+"""
+import threading
+
+from core.middleware import unbudgeted_queries
+from django.core.signals import request_finished, request_started
+from django.db import transaction
+from reviews.models import (Category, ChangeLogEntry, Genre, TableVersion,
+                            Title)
+
+_local = threading.local()
+
+
+def start_request(**kwargs):
+    _local.in_request = True
+    _local.versions = None
+
+
+def finish_request(**kwargs):
+    _local.in_request = False
+    _local.versions = None
+
+
+request_started.connect(start_request, dispatch_uid='table_cache_start')
+request_finished.connect(finish_request, dispatch_uid='table_cache_finish')
+
+
+def get_versions() -> dict:
+    """Версии таблиц, в рамках запроса читаются из БД один раз."""
+    versions = getattr(_local, 'versions', None)
+    if versions is None:
+        versions = dict(TableVersion.objects.values_list('table', 'version'))
+        if getattr(_local, 'in_request', False):
+            _local.versions = versions
+    return versions
+
+
+def bump_table_version(model) -> None:
+    """Отмечает изменение таблицы модели для всех процессов."""
+    TableVersion.bump(model._meta.db_table)
+    _local.versions = None
+    transaction.on_commit(lambda: setattr(_local, 'versions', None))
+
+
+class TableCache:
+    """Все строки таблицы модели по id и по slug."""
+
+    def __init__(self, model):
+        self.model = model
+        self.table = model._meta.db_table
+        self.version = None
+        self.by_id = {}
+        self.by_slug = {}
+
+    def __deepcopy__(self, memo):
+        # DRF копирует поля сериализатора вместе с аргументами,
+        # копия кеша загружала бы таблицу заново.
+        return self
+
+    def load(self) -> None:
+        # Версия читается до строк: запись между двумя запросами
+        # даст более новые строки со старой версией и лишнюю загрузку
+        # в следующий раз, но не устаревшие данные.
+        version = get_versions().get(self.table, 0)
+        if version == self.version:
+            return
+        with unbudgeted_queries():
+            objects = list(self.model.objects.all())
+        self.by_id = {obj.pk: obj for obj in objects}
+        self.by_slug = {obj.slug: obj for obj in objects}
+        self.version = version
+
+    def get(self, pk):
+        self.load()
+        return self.by_id.get(pk)
+
+    def get_by_slug(self, slug):
+        self.load()
+        return self.by_slug.get(slug)
+
+
+categories = TableCache(Category)
+genres = TableCache(Genre)
+
+
+class ChangeLogIndex:
+    """
+    Индекс произведений в памяти процесса. build() строит состояние
+    по всей таблице, apply(state, pks) возвращает состояние с учётом
+    произведений pks, изменённых после токена журнала, а
+    get_overlay_size(state) - число накопленных изменений: после
+    max_overlay индекс перестраивается, как и после импорта (версия
+    таблицы произведений) или удаления записей журнала после токена.
+    Состояние заменяется целиком, поэтому параллельные запросы читают
+    его без блокировки.
+    """
+    max_overlay = 0
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.state = None
+        self.version = None
+        self.log_version = None
+        self.token = 0
+
+    def build(self):
+        raise NotImplementedError
+
+    def apply(self, state, pks):
+        raise NotImplementedError
+
+    def get_overlay_size(self, state) -> int:
+        raise NotImplementedError
+
+    def rebuild(self, version) -> None:
+        token = ChangeLogEntry.get_head()
+        self.state = self.build()
+        self.version = version
+        self.token = token
+
+    def apply_changes(self) -> None:
+        """Применяет записи журнала о произведениях после токена."""
+        changes = dict(ChangeLogEntry.objects.filter(
+            id__gt=self.token, model=Title._meta.model_name
+        ).order_by('id').values_list('object_id', 'id'))
+        if not changes:
+            return
+        self.state = self.apply(self.state, set(changes))
+        self.token = max(self.token, *changes.values())
+
+    def get_state(self):
+        """Актуальное состояние, версии проверяются раз за запрос."""
+        log_table = ChangeLogEntry._meta.db_table
+        versions = get_versions()
+        version = versions.get(Title._meta.db_table, 0)
+        log_version = versions.get(log_table, 0)
+        if self.state is not None and (version, log_version) == (
+                self.version, self.log_version):
+            return self.state
+        with self.lock, unbudgeted_queries():
+            if (self.state is None or version != self.version
+                    or self.token < versions.get(f'{log_table}_horizon', 0)):
+                self.rebuild(version)
+            else:
+                self.apply_changes()
+            if self.get_overlay_size(self.state) > self.max_overlay:
+                self.rebuild(version)
+            self.log_version = log_version
+        return self.state
+
+
+def attach_genre_ids(titles) -> None:
+    """
+    Добавляет произведениям атрибут genre_ids одним запросом
+    к промежуточной таблице, без обращения к таблице жанров.
+    """
+    genre_ids = {title.pk: [] for title in titles}
+    if genre_ids:
+        for title_id, genre_id in Title.genre.through.objects.filter(
+            title_id__in=genre_ids
+        ).order_by('genre_id').values_list('title_id', 'genre_id'):
+            genre_ids[title_id].append(genre_id)
+    for title in titles:
+        title.genre_ids = genre_ids[title.pk]
+
+
+def save_genre_ids(titles, replace: bool = True) -> None:
+    """
+    Записывает жанры из атрибута genre_ids произведений: удаляет
+    прежние связи одним запросом (replace) и вставляет новые одним.
+    Сигнал m2m_changed не отправляется - изменение произведений
+    записывает в журнал тот, кто их сохраняет.
+    """
+    through = Title.genre.through
+    if replace and titles:
+        through.objects.filter(
+            title_id__in=[title.pk for title in titles]
+        ).delete()
+    through.objects.bulk_create(
+        through(title_id=title.pk, genre_id=genre_id)
+        for title in titles for genre_id in title.genre_ids
+    )
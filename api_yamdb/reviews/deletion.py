@@ -0,0 +1,56 @@
+"""
+Set-based deletion of reviews and comments.
+
+QuerySet.delete() loads every object to send post_delete, so removing
+thousands of reviews costs a few queries per object (change log,
+rating). delete_reviews() removes the rows with plain DELETE
+statements by primary key and does the bookkeeping of the post_delete
+receivers (reviews.signals) once for the whole set: change log entries
+(their version also invalidates cached responses) and ratings of the
+affected titles.
+Both paths record deletions with record_deleted().
+"""
+from django.db import connection, transaction
+from reviews.models import ChangeLogEntry, Comment, Review, Title
+
+
+def get_chunks(pks) -> list:
+    """Части списка id, помещающиеся в один запрос к БД."""
+    size = connection.ops.bulk_batch_size(['pk'], pks) or len(pks)
+    return [pks[start:start + size] for start in range(0, len(pks), size)]
+
+
+def record_deleted(*groups) -> None:
+    """
+    Добавляет в журнал изменений записи об удалении объектов,
+    groups - пары (модель, id объектов).
+    """
+    ChangeLogEntry.record(*((model, pk, ChangeLogEntry.Action.DELETE)
+                            for model, pks in groups for pk in pks))
+
+
+def delete_rows(model, pks) -> None:
+    """Удаляет строки таблицы модели по id, без загрузки объектов."""
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(model._meta.pk.column)
+    with connection.cursor() as cursor:
+        for chunk in get_chunks(pks):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(
+                f'DELETE FROM {table} WHERE {column} IN ({placeholders})',
+                chunk
+            )
+
+
+def delete_reviews(reviews, comments, titles) -> None:
+    """
+    Удаляет отзывы и комментарии по id, comments должны включать все
+    комментарии к удаляемым отзывам. titles - id произведений отзывов,
+    их рейтинг пересчитывается.
+    """
+    with transaction.atomic():
+        delete_rows(Comment, comments)
+        delete_rows(Review, reviews)
+        record_deleted((Comment, comments), (Review, reviews))
+        for chunk in get_chunks(sorted(titles)):
+            Title.objects.filter(pk__in=chunk).recalculate_rating()
@@ -0,0 +1,99 @@
+"""
+Export of the tables from IMPORT_CONFIG to csv-files readable by fillyamdb.
+
+Every table is written to its own file with the columns of
+IMPORT_COLUMNS (attname, e.g. category_id), rows ordered by primary
+key, so the files pass fillyamdb --validate-only and import as they
+are. Password hashes and derived columns are not exported.
+On PostgreSQL rows are streamed by COPY ... TO STDOUT, on other
+databases through a server-side cursor (QuerySet.iterator), so memory
+does not depend on the table size. Tables are exported in parallel
+processes, each with its own DB connection; files can be gzip-compressed.
+"""
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import connection, connections
+from reviews.management.commands import _fillyamdb_input_config as conf
+from reviews.management.commands._fillyamdb_main import (can_copy, get_model,
+                                                         init_worker, logger,
+                                                         open_file)
+
+
+def get_file_path(folder_path, file_name, compress) -> str:
+    return os.path.join(folder_path,
+                        f'{file_name}.gz' if compress else file_name)
+
+
+def format_value(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def copy_table(_model, fields, csv_file) -> int:
+    """Выгружает таблицу через COPY (SELECT ...) TO STDOUT."""
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in fields)
+    order = quote(_model._meta.pk.column)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY (SELECT {columns} FROM {quote(_model._meta.db_table)} '
+            f'ORDER BY {order}) TO STDOUT WITH (FORMAT csv)',
+            csv_file
+        )
+        return cursor.rowcount
+
+
+def iterate_table(_model, fields, csv_file, chunk_size) -> int:
+    """Выгружает таблицу построчно через серверный курсор."""
+    writer = csv.writer(csv_file, delimiter=',', quotechar='"')
+    rows = _model.objects.order_by('pk').values_list(
+        *(field.attname for field in fields)
+    ).iterator(chunk_size=chunk_size)
+    row_count = 0
+    for row in rows:
+        writer.writerow([format_value(value) for value in row])
+        row_count += 1
+    return row_count
+
+
+def dump_table(folder_path, entry, compress, chunk_size, use_copy) -> tuple:
+    file_name, app_model, m2m_flag, _ = entry
+    _model = get_model(app_model, m2m_flag)
+    fields = [_model._meta.get_field(column)
+              for column in conf.IMPORT_COLUMNS[file_name]]
+    file_path = get_file_path(folder_path, file_name, compress)
+    started = time.monotonic()
+    with open_file(file_path, 'wt') as csv_file:
+        csv.writer(csv_file, delimiter=',', quotechar='"').writerow(
+            [field.attname for field in fields]
+        )
+        if use_copy and can_copy():
+            row_count = copy_table(_model, fields, csv_file)
+        else:
+            row_count = iterate_table(_model, fields, csv_file, chunk_size)
+    elapsed = time.monotonic() - started
+    rate = row_count / elapsed if elapsed else row_count
+    logger.info(f'Exported {_model._meta.label} to {file_path}, '
+                f'{row_count} row(s) in {elapsed:.2f} s ({rate:.0f} rows/s).')
+    return file_path, row_count
+
+
+def run(folder_path, compress=False, jobs=conf.DEFAULT_JOBS,
+        chunk_size=conf.DEFAULT_BATCH_SIZE, use_copy=True) -> list:
+    os.makedirs(folder_path or '.', exist_ok=True)
+    args = (compress, chunk_size, use_copy)
+    if jobs <= 1:
+        return [dump_table(folder_path, entry, *args)
+                for entry in conf.IMPORT_CONFIG]
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=jobs,
+                             initializer=init_worker) as executor:
+        futures = [executor.submit(dump_table, folder_path, entry, *args)
+                   for entry in conf.IMPORT_CONFIG]
+        return [future.result() for future in futures]
@@ -4,27 +4,85 @@ Configuration for data import script from csv-file to DB.
 Specify in first position in IMPORT_CONFIG the filename,
 import that shall be done. In second position - the name of application
 and model which you want to fill with data.
-Specify like the <app_name.Model_name>, in an order that respects
-foreign key dependencies.
+Specify like the <app_name.Model_name>.
 For Many-to-Many relation table set the flag '1' to third position
 and specify model name like the
 <app_name>.<first_Model_name>_<second_Model_name>
+In fourth position list the files this file depends on
+(the tables its foreign keys point to). Files without pending
+dependencies are loaded concurrently, a dependent file starts
+as soon as all of its parents are loaded.
+
+Each file is loaded in one transaction with bulk inserts of
+DEFAULT_BATCH_SIZE rows (COPY on PostgreSQL), Many-to-Many tables
+are written straight into the intermediate (through) table.
 
 Run script:
-manage.py csvtodb -p <path to folder with tables>
+manage.py fillyamdb -p <path to folder with tables> -b <batch size> -j <N>
 
 Argument '-p' ('--path') is optional, you can use constant DEFAULT_PATH
+Argument '-b' ('--batch-size') is optional, default is DEFAULT_BATCH_SIZE
+Argument '-j' ('--jobs') is optional, default is DEFAULT_JOBS,
+on SQLite files are always loaded one by one
+Flag '--upsert' inserts new rows and updates existing ones matched by
+the natural key from UPSERT_KEYS (primary key 'id' by default),
+every batch is committed and checkpointed to DEFAULT_STATE_FILE,
+repeated keys within a batch keep the last row, rows violating other
+constraints are written to DEFAULT_REPORT_FILE ('--report') and skipped
+Flag '--resume' continues from the last checkpoint in the state file
+Flag '--no-input' skips the confirmation prompt
+Flag '--validate-only' checks the files without touching the database
+and writes errors to DEFAULT_REPORT_FILE ('--report' to override)
 """
 
 # Correlation table <file_name.csv> -- > <app_name>.<Model_name>
 IMPORT_CONFIG: tuple = (
-    ('yamdbuser.csv', 'users.YamdbUser', 0),
-    ('categories.csv', 'reviews.Category', 0,),
-    ('genres.csv', 'reviews.Genre', 0,),
-    ('titles.csv', 'reviews.Title', 0,),
-    ('titles_genres.csv', 'reviews.Title_Genre', 1,),
-    ('reviews.csv', 'reviews.Review', 0,),
-    ('comments.csv', 'reviews.Comment', 0,),
+    ('yamdbuser.csv', 'users.YamdbUser', 0, ()),
+    ('categories.csv', 'reviews.Category', 0, ()),
+    ('genres.csv', 'reviews.Genre', 0, ()),
+    ('titles.csv', 'reviews.Title', 0, ('categories.csv',)),
+    ('titles_genres.csv', 'reviews.Title_Genre', 1,
+     ('titles.csv', 'genres.csv')),
+    ('reviews.csv', 'reviews.Review', 0, ('titles.csv', 'yamdbuser.csv')),
+    ('comments.csv', 'reviews.Comment', 0, ('reviews.csv', 'yamdbuser.csv')),
 )
 
+# Columns of the files, <file_name.csv> --> header. Files written by
+# genyamdb and dumpyamdb have exactly these columns: passwords and
+# derived fields (updated_at, stored ratings) are never exported, they
+# are set or recalculated on import
+IMPORT_COLUMNS: dict = {
+    'yamdbuser.csv': ('id', 'username', 'email', 'role', 'bio',
+                      'first_name', 'last_name'),
+    'categories.csv': ('id', 'name', 'slug'),
+    'genres.csv': ('id', 'name', 'slug'),
+    'titles.csv': ('id', 'name', 'year', 'category_id', 'description'),
+    'titles_genres.csv': ('id', 'title_id', 'genre_id'),
+    'reviews.csv': ('id', 'title_id', 'text', 'author_id', 'score',
+                    'pub_date'),
+    'comments.csv': ('id', 'review_id', 'text', 'author_id', 'pub_date'),
+}
+
+# Natural keys for the upsert mode, <app_name>.<Model_name> --> fields
+UPSERT_KEYS: dict = {
+    'reviews.Category': ('slug',),
+    'reviews.Genre': ('slug',),
+    'reviews.Title_Genre': ('title_id', 'genre_id'),
+}
+
 DEFAULT_PATH = ''
+
+DEFAULT_BATCH_SIZE = 5000
+
+DEFAULT_JOBS = 1
+
+DEFAULT_STATE_FILE = '.fillyamdb_state.jsonl'
+
+DEFAULT_REPORT_FILE = 'fillyamdb_report.jsonl'
+
+VALIDATE_CHUNK_SIZE = 500000
+
+# Ids below this bound are kept in a bitset (16 MiB per table at most),
+# larger ones in a set, so a single huge id does not allocate memory
+# proportional to its value
+VALIDATE_DENSE_IDS = 1 << 27
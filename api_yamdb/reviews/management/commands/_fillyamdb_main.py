@@ -1,8 +1,21 @@
 import csv
+import gzip
+import io
+import json
 import logging
 import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
 
+import django
 from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.exceptions import FieldDoesNotExist
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.models import Q
 from reviews.management.commands import _fillyamdb_input_config as conf
 
 logger = logging.getLogger(__name__)
@@ -21,21 +34,27 @@ ERROR_MESSAGE_FILENOTFOUND: str = ('Ошибка обработки запрос
 ERROR_MESSAGE_CONSTRAINT: str = ('Для корректной обработки импорта '
                                  'имя файла должно соответствовать '
                                  'указанному в таблице соответствия.')
+ERROR_MESSAGE_DEPENDENCY: str = ('Ошибка в таблице соответствия. '
+                                 'Файл {} зависит от {}, который '
+                                 'не указан в таблице или образует цикл.')
+ERROR_MESSAGE_HEADER: str = ('Ошибка обработки файла {}. '
+                             'Столбец {} не соответствует ни одному '
+                             'полю модели {}.')
 
 
-def confirmation() -> None:
+def confirmation(interactive=True) -> None:
     print('Данный скрипт импортирует данные '
           'из .csv файлов в базу данных проекта.')
     for i, value in enumerate(conf.IMPORT_CONFIG, start=1):
         file_name = value[0]
         app_model = value[1]
         print(f'{i}. {file_name} --> {app_model}')
-    print('Импорт будет произведён в указанном выше порядке и'
+    print('Импорт будет произведён с учётом зависимостей между файлами и '
           'в соответствии со связью <имя_файла> --> <app_name>.<Model_name>')
     print('Проверьте соответствие имён файлов в каталоге '
           'на соответствие указанным выше, прежде чем продолжить.')
 
-    while True:
+    while interactive:
         q = input('Подтвердить (yes/no)? ') or ''
         if q.lower() in CONTINUE_COMMANDS_LIST:
             break
@@ -52,62 +71,472 @@ def get_file_path(folder_path, file_name) -> str:
     for root, dirs, files in os.walk(folder_path):
         if file_name in files:
             return str(os.path.join(root, file_name))
+        if f'{file_name}.gz' in files:
+            return str(os.path.join(root, f'{file_name}.gz'))
         logger.error(err_msg(file_name))
         raise SystemExit(ERROR_MESSAGE_CONSTRAINT)
 
 
-def process_m2m_field(reader, _model_1, _model_2, file_name) -> None:
-    next(reader)
-    row_count = 0
+def open_file(file_path, mode='rb'):
+    """Открывает файл импорта, сжатые gzip файлы (.gz) - прозрачно."""
+    opener = gzip.open if file_path.endswith('.gz') else open
+    if 'b' in mode:
+        return opener(file_path, mode)
+    return opener(file_path, mode, encoding='utf-8', newline='')
+
+
+def get_model(app_model, m2m_flag):
+    """
+    Возвращает модель для импорта. Для связи Many-to-Many
+    (<app_name>.<first_Model_name>_<second_Model_name>) возвращается
+    промежуточная (through) модель, которая заполняется напрямую.
+    """
+    app_name, model_name = app_model.split('.')
+    if m2m_flag != 1:
+        return apps.get_model(app_label=app_name, model_name=model_name)
+    model_1_name, model_2_name = model_name.split('_')
+    _model_1 = apps.get_model(app_label=app_name, model_name=model_1_name)
+    _model_2 = apps.get_model(app_label=app_name, model_name=model_2_name)
+    for field in _model_1._meta.many_to_many:
+        if field.related_model is _model_2:
+            return field.remote_field.through
+    raise SystemExit(f'Связь {app_model} не найдена.')
+
+
+def get_header_fields(header, _model, file_name) -> list:
+    fields = []
+    for column in header:
+        try:
+            fields.append(_model._meta.get_field(column))
+        except FieldDoesNotExist:
+            logger.error(ERROR_MESSAGE_HEADER.format(
+                file_name, column, _model._meta.label
+            ))
+            raise SystemExit(ERROR_MESSAGE_CONSTRAINT)
+    return fields
+
+
+@contextmanager
+def keep_file_dates(fields):
+    """
+    Отключает auto_now/auto_now_add у полей, значения которых
+    есть в файле, чтобы при импорте сохранялись исходные даты.
+    """
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields
+             if getattr(field, 'auto_now', False)
+             or getattr(field, 'auto_now_add', False)]
+    for field, _, _ in saved:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class TrackedLines:
+    """
+    Построчно читает бинарный файл для csv.reader и запоминает
+    смещение (в байтах) конца последней прочитанной строки.
+    """
+
+    def __init__(self, csv_file):
+        self.csv_file = csv_file
+        self.offset = csv_file.tell()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.csv_file.readline()
+        if not line:
+            raise StopIteration
+        self.offset = self.csv_file.tell()
+        return line.decode('utf-8')
+
+    def seek(self, offset):
+        self.csv_file.seek(offset)
+        self.offset = offset
+
+
+def read_checkpoints(state_file) -> dict:
+    """
+    Читает журнал контрольных точек (JSON Lines), для каждого файла
+    берётся последняя полностью записанная точка.
+    """
+    checkpoints = {}
+    if not state_file or not os.path.exists(state_file):
+        return checkpoints
+    with open(state_file, 'r', encoding='utf-8') as state:
+        for line in state:
+            try:
+                checkpoint = json.loads(line)
+            except ValueError:
+                continue
+            checkpoints[checkpoint['file']] = checkpoint
+    return checkpoints
+
+
+def write_checkpoint(state_file, file_name, offset, line=1,
+                     done=False) -> None:
+    """Смещение и номер последней загруженной строки файла."""
+    if not state_file:
+        return
+    checkpoint = json.dumps({'file': file_name, 'offset': offset,
+                             'line': line, 'done': done})
+    with open(state_file, 'a', encoding='utf-8') as state:
+        state.write(checkpoint + '\n')
+        state.flush()
+        os.fsync(state.fileno())
+
+
+def report_conflict(report_file, file_name, line, error) -> None:
+    """
+    Дописывает в отчёт строку файла, которую не удалось загрузить
+    из-за ограничения БД (формат отчёта --validate-only).
+    """
+    if not report_file:
+        return
+    with open(report_file, 'a', encoding='utf-8') as report:
+        report.write(json.dumps({
+            'file': file_name,
+            'line': line,
+            'location': f'{file_name}:{line}',
+            'column': None,
+            'code': 'conflict',
+            'message': str(error).strip(),
+        }, ensure_ascii=False) + '\n')
+
+
+def read_objects(reader, _model, fields):
     for row in reader:
-        title = _model_1.objects.get(id=row[1])
-        genre = _model_2.objects.get(id=row[2])
-        title.genre.add(genre)
-        title.save()
-        row_count += 1
-    logger.info(f'End processing file {file_name}, '
-                f'imported {row_count} row(s).')
+        if not row:
+            continue
+        yield _model(**{
+            field.attname: None if value == '' and field.null else value
+            for field, value in zip(fields, row)
+        })
+
+
+def read_batches(objects, batch_size):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def can_copy() -> bool:
+    """COPY доступен только для PostgreSQL через psycopg2."""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        return hasattr(cursor, 'copy_expert')
+
 
+def get_insert_fields(_model, batch) -> list:
+    return [field for field in _model._meta.concrete_fields
+            if not (field.primary_key
+                    and getattr(batch[0], field.attname) is None)]
 
-def process_table(reader, _model, file_name) -> None:
+
+def copy_batch(_model, batch) -> None:
+    """Загружает пачку объектов в таблицу через COPY ... FROM STDIN."""
+    fields = get_insert_fields(_model, batch)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+    for obj in batch:
+        writer.writerow([
+            field.get_db_prep_save(field.pre_save(obj, True), connection)
+            for field in fields
+        ])
+    buffer.seek(0)
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY {quote(_model._meta.db_table)} ({columns}) '
+            'FROM STDIN WITH (FORMAT csv)',
+            buffer
+        )
+
+
+def unique_by_key(batch, key_fields) -> list:
+    """
+    Оставляет в пачке по одному объекту на значение ключа, побеждает
+    последний. Объекты без значения ключа остаются все.
+    """
+    objects = {}
+    for obj in batch:
+        key = tuple(field.to_python(getattr(obj, field.attname))
+                    for field in key_fields)
+        objects[key if None not in key else id(obj)] = obj
+    return list(objects.values())
+
+
+def upsert_batch(_model, batch, key_fields, file_fields) -> None:
+    """
+    Вставляет пачку объектов через INSERT ... ON CONFLICT по
+    естественному ключу: существующие строки обновляются значениями
+    из файла (кроме ключа и первичного ключа), новые - добавляются.
+    Поля auto_now, которых нет в файле, при обновлении тоже меняются.
+    Повторы ключа внутри пачки схлопываются до последней строки:
+    PostgreSQL не обновляет одну строку дважды за команду.
+    """
+    batch = unique_by_key(batch, key_fields)
+    fields = get_insert_fields(_model, batch)
+    update_fields = [field for field in file_fields
+                     if field not in key_fields and not field.primary_key]
+    if update_fields:
+        update_fields += [field for field in fields
+                          if getattr(field, 'auto_now', False)
+                          and field not in file_fields]
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in fields)
+    conflict = ', '.join(quote(field.column) for field in key_fields)
+    if update_fields:
+        action = 'DO UPDATE SET ' + ', '.join(
+            f'{quote(field.column)} = EXCLUDED.{quote(field.column)}'
+            for field in update_fields
+        )
+    else:
+        action = 'DO NOTHING'
+    row_sql = '(' + ', '.join(['%s'] * len(fields)) + ')'
+    chunk_size = connection.ops.bulk_batch_size(fields, batch) or len(batch)
+    with connection.cursor() as cursor:
+        for start in range(0, len(batch), chunk_size):
+            chunk = batch[start:start + chunk_size]
+            params = [
+                field.get_db_prep_save(field.pre_save(obj, True), connection)
+                for obj in chunk for field in fields
+            ]
+            cursor.execute(
+                f'INSERT INTO {quote(_model._meta.db_table)} ({columns}) '
+                f'VALUES {", ".join([row_sql] * len(chunk))} '
+                f'ON CONFLICT ({conflict}) {action}',
+                params
+            )
+
+
+def upsert_rows(_model, rows, key_fields, file_fields, file_name,
+                report_file=None) -> int:
+    """
+    Загружает пары (номер строки, объект) одной командой, а при
+    нарушении ограничения (например, unique_title) - по одной строке:
+    такие строки пишутся в отчёт, остальные загружаются.
+    Возвращает число строк в отчёте.
+    """
+    try:
+        with transaction.atomic():
+            upsert_batch(_model, [obj for _, obj in rows], key_fields,
+                         file_fields)
+        return 0
+    except IntegrityError:
+        pass
+    conflicts = 0
+    with transaction.atomic():
+        for line, obj in rows:
+            try:
+                with transaction.atomic():
+                    upsert_batch(_model, [obj], key_fields, file_fields)
+            except IntegrityError as error:
+                report_conflict(report_file, file_name, line, error)
+                conflicts += 1
+    return conflicts
+
+
+def get_upsert_keys(_model, app_model) -> list:
+    return [_model._meta.get_field(name)
+            for name in conf.UPSERT_KEYS.get(app_model, ('id',))]
+
+
+def process_table(csv_file, _model, file_name,
+                  batch_size=conf.DEFAULT_BATCH_SIZE, use_copy=True,
+                  upsert_keys=None, state_file=None, offset=0, line=1,
+                  report_file=None) -> int:
+    """
+    Импортирует файл пачками. В обычном режиме весь файл загружается
+    в одной транзакции. В режиме upsert каждая пачка фиксируется
+    отдельно, а после неё в журнал пишется смещение в файле: повторная
+    загрузка пачки безопасна, поэтому импорт можно продолжить с точки.
+    Строки, нарушающие ограничения БД, в этом режиме пишутся в отчёт.
+    """
+    lines = TrackedLines(csv_file)
+    reader = csv.reader(lines, delimiter=',', quotechar='"')
     header = next(reader)
-    row_count = row_success = 0
-    for row in reader:
-        _object_dict = {key: value for key, value
-                        in zip(header, row)}
-        _, is_create = _model.objects.get_or_create(**_object_dict)
-        row_count += 1
-        if is_create:
-            row_success += 1
-    logger.info(f'End processing file {file_name}, '
-                f'imported {row_count} row(s), '
-                f'{row_success} successfully.')
-
-
-def run(folder_path) -> None:
-    _model = _model_1 = _model_2 = None
-    for current_import in conf.IMPORT_CONFIG:
-        file_name, app_model, m2m_flag = current_import
-        app_name, model_name = app_model.split('.')
-        file_path = get_file_path(folder_path, file_name)
-
-        if m2m_flag == 1:
-            model_1_name, model_2_name = model_name.split('_')
-            logger.info('Start processing m2m field for '
-                        f'{app_name}.{model_1_name} '
-                        f'and {app_name}.{model_2_name}')
-            _model_1 = apps.get_model(app_label=app_name,
-                                      model_name=model_1_name)
-            _model_2 = apps.get_model(app_label=app_name,
-                                      model_name=model_2_name)
-        else:
-            logger.info(f'Start processing model {app_name}.{model_name}')
-            _model = apps.get_model(app_label=app_name, model_name=model_name)
-
-        logger.info(f'Start processing file {file_name}')
-        with open(file_path, 'r') as csv_file:
-            reader = csv.reader(csv_file, delimiter=',', quotechar='"')
-            if m2m_flag == 1:
-                process_m2m_field(reader, _model_1, _model_2, file_name)
+    # Номера строк после продолжения отсчитываются от контрольной точки.
+    first_line = 0
+    if offset > lines.offset:
+        lines.seek(offset)
+        first_line = line - 1
+        logger.info(f'Resuming file {file_name} from byte {offset}')
+    fields = get_header_fields(header, _model, file_name)
+    upsert = upsert_keys is not None
+    use_copy = use_copy and not upsert and can_copy()
+    method = 'upsert' if upsert else 'COPY' if use_copy else 'bulk_create'
+    row_count = conflicts = 0
+    started = time.monotonic()
+    file_transaction = nullcontext() if upsert else transaction.atomic()
+    with file_transaction, keep_file_dates(fields):
+        objects = read_objects(reader, _model, fields)
+        if upsert:
+            objects = ((first_line + reader.line_num, obj) for obj in objects)
+        for batch in read_batches(objects, batch_size):
+            if upsert:
+                conflicts += upsert_rows(_model, batch, upsert_keys, fields,
+                                         file_name, report_file)
+                write_checkpoint(state_file, file_name, lines.offset,
+                                 first_line + reader.line_num)
+            elif use_copy:
+                copy_batch(_model, batch)
             else:
-                process_table(reader, _model, file_name)
+                _model.objects.bulk_create(batch, batch_size=batch_size)
+            row_count += len(batch)
+    write_checkpoint(state_file, file_name, lines.offset,
+                     first_line + reader.line_num, done=True)
+    elapsed = time.monotonic() - started
+    rate = row_count / elapsed if elapsed else row_count
+    logger.info(f'End processing file {file_name}, '
+                f'imported {row_count - conflicts} row(s) in {elapsed:.2f} s '
+                f'({rate:.0f} rows/s, {method}).')
+    if conflicts:
+        logger.warning(f'{conflicts} row(s) of {file_name} violate database '
+                       f'constraints and were skipped, see {report_file}.')
+    return row_count
+
+
+def finalize_import(models) -> None:
+    """
+    Приводит БД в согласованное состояние после массовой вставки,
+    которая не вызывает save(): сдвигает счётчики первичных ключей,
+    выставляет is_staff администраторам, пересчитывает рейтинги
+    и сбрасывает кеши категорий, жанров и ответов API. Вставка не
+    пишет журнал изменений, поэтому выданные токены ленты устаревают.
+    """
+    sequence_sql = connection.ops.sequence_reset_sql(no_style(), models)
+    if sequence_sql:
+        with connection.cursor() as cursor:
+            for sql in sequence_sql:
+                cursor.execute(sql)
+    User = get_user_model()
+    if User in models:
+        User.objects.filter(
+            Q(role=User.Role.ADMIN) | Q(is_superuser=True)
+        ).update(is_staff=True)
+    call_command('recalcratings')
+    # Версии таблиц сбрасывают кеши процессов и ответов API.
+    table_version = apps.get_model('reviews.TableVersion')
+    for _model in models:
+        table_version.bump(_model._meta.db_table)
+    apps.get_model('reviews.ChangeLogEntry').expire_tokens()
+
+
+def get_import_order() -> list:
+    """
+    Упорядочивает IMPORT_CONFIG топологически по зависимостям
+    (четвёртая позиция), сохраняя исходный порядок независимых файлов.
+    """
+    pending = list(conf.IMPORT_CONFIG)
+    done = set()
+    order = []
+    while pending:
+        ready = [entry for entry in pending if set(entry[3]) <= done]
+        if not ready:
+            file_name, *_, parents = pending[0]
+            missing = ', '.join(sorted(set(parents) - done))
+            raise SystemExit(ERROR_MESSAGE_DEPENDENCY.format(file_name,
+                                                             missing))
+        for entry in ready:
+            pending.remove(entry)
+            done.add(entry[0])
+            order.append(entry)
+    return order
+
+
+def import_file(folder_path, entry, batch_size, use_copy,
+                upsert=False, state_file=None, checkpoint=None,
+                report_file=None) -> str:
+    file_name, app_model, m2m_flag, _ = entry
+    _model = get_model(app_model, m2m_flag)
+    checkpoint = checkpoint or {}
+    if checkpoint.get('done'):
+        logger.info(f'Skipping file {file_name}, already imported')
+        return _model._meta.label
+    file_path = get_file_path(folder_path, file_name)
+    logger.info(f'Start processing model {_model._meta.label}')
+    logger.info(f'Start processing file {file_name}')
+    upsert_keys = get_upsert_keys(_model, app_model) if upsert else None
+    with open_file(file_path) as csv_file:
+        process_table(csv_file, _model, file_name, batch_size, use_copy,
+                      upsert_keys, state_file, checkpoint.get('offset', 0),
+                      checkpoint.get('line', 1), report_file)
+    return _model._meta.label
+
+
+def init_worker() -> None:
+    """Готовит процесс-исполнитель: свой Django и своё соединение с БД."""
+    django.setup()
+    connections.close_all()
+
+
+def run_parallel(order, jobs, folder_path, batch_size, use_copy,
+                 upsert, state_file, checkpoints, report_file) -> list:
+    remaining = list(order)
+    done = set()
+    labels = []
+    running = {}
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=jobs,
+                             initializer=init_worker) as executor:
+        while remaining or running:
+            for entry in [entry for entry in remaining
+                          if set(entry[3]) <= done]:
+                remaining.remove(entry)
+                future = executor.submit(
+                    import_file, folder_path, entry, batch_size, use_copy,
+                    upsert, state_file, checkpoints.get(entry[0]),
+                    report_file
+                )
+                running[future] = entry
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                entry = running.pop(future)
+                try:
+                    labels.append(future.result())
+                except BaseException:
+                    for other in running:
+                        other.cancel()
+                    raise
+                done.add(entry[0])
+    return labels
+
+
+def run(folder_path, batch_size=conf.DEFAULT_BATCH_SIZE,
+        use_copy=True, jobs=conf.DEFAULT_JOBS, upsert=False,
+        resume=False, state_file=conf.DEFAULT_STATE_FILE,
+        report_file=conf.DEFAULT_REPORT_FILE) -> None:
+    order = get_import_order()
+    if resume:
+        checkpoints = read_checkpoints(state_file)
+    else:
+        checkpoints = {}
+        for path in (state_file, upsert and report_file):
+            if path and os.path.exists(path):
+                os.remove(path)
+    if jobs > 1 and connection.vendor == 'sqlite':
+        logger.info('SQLite does not support concurrent writes, '
+                    'files will be imported one by one.')
+        jobs = 1
+    if jobs > 1:
+        labels = run_parallel(order, jobs, folder_path, batch_size,
+                              use_copy, upsert, state_file, checkpoints,
+                              report_file)
+    else:
+        labels = [import_file(folder_path, entry, batch_size, use_copy,
+                              upsert, state_file, checkpoints.get(entry[0]),
+                              report_file)
+                  for entry in order]
+    finalize_import([apps.get_model(label) for label in labels])
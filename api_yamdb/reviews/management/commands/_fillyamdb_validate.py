@@ -0,0 +1,298 @@
+"""
+Pre-import validation of csv-files from IMPORT_CONFIG.
+
+Every file is read once, the database is not used. Primary keys of
+loaded files are kept in bitsets (one bit per id, ids above
+VALIDATE_DENSE_IDS go to a plain set) to check foreign keys of
+dependent files. Unique constraints are checked with 8-byte
+hashes of the key values: they are sorted in chunks of
+VALIDATE_CHUNK_SIZE, spilled to temporary files and merged, so memory
+stays bounded for any number of rows.
+Errors are written to the report file as JSON Lines with
+<file_name>:<line> references.
+"""
+import csv
+import hashlib
+import heapq
+import json
+import tempfile
+from array import array
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.backends.base.operations import BaseDatabaseOperations
+from django.db.models import UniqueConstraint
+from reviews.management.commands import _fillyamdb_input_config as conf
+from reviews.management.commands._fillyamdb_main import (get_file_path,
+                                                         get_import_order,
+                                                         get_model, logger,
+                                                         open_file)
+
+LINE_BITS: int = 40
+LINE_MASK: int = (1 << LINE_BITS) - 1
+READ_BLOCK_SIZE: int = 65536
+
+
+class IdBitset:
+    """
+    Множество неотрицательных целых id: один бит на значение до
+    dense_limit, редкие большие id хранятся в обычном множестве.
+    """
+
+    def __init__(self, dense_limit: int = conf.VALIDATE_DENSE_IDS):
+        self.bits = bytearray()
+        self.dense_limit = dense_limit
+        self.sparse = set()
+
+    def add(self, value: int) -> bool:
+        """Добавляет id, возвращает False, если он уже был в множестве."""
+        if value >= self.dense_limit:
+            if value in self.sparse:
+                return False
+            self.sparse.add(value)
+            return True
+        index, mask = value >> 3, 1 << (value & 7)
+        if index >= len(self.bits):
+            self.bits.extend(bytes(max(index + 1 - len(self.bits),
+                                       len(self.bits))))
+        if self.bits[index] & mask:
+            return False
+        self.bits[index] |= mask
+        return True
+
+    def __contains__(self, value: int) -> bool:
+        if value >= self.dense_limit:
+            return value in self.sparse
+        index = value >> 3
+        return (index < len(self.bits)
+                and bool(self.bits[index] & (1 << (value & 7))))
+
+
+class UniqueKeyChecker:
+    """
+    Ищет повторы ключей с внешней сортировкой: пары (хеш, строка)
+    сортируются порциями, сбрасываются во временные файлы и сливаются.
+    """
+
+    def __init__(self, chunk_size=conf.VALIDATE_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.chunk = []
+        self.spills = []
+
+    @staticmethod
+    def make_key(values) -> int:
+        digest = hashlib.blake2b(repr(values).encode(), digest_size=8)
+        return int.from_bytes(digest.digest(), 'big')
+
+    def add(self, values, line: int) -> None:
+        self.chunk.append((self.make_key(values) << LINE_BITS) | line)
+        if len(self.chunk) >= self.chunk_size:
+            self.spill()
+
+    def spill(self) -> None:
+        if not self.chunk:
+            return
+        self.chunk.sort()
+        keys = array('Q', (item >> LINE_BITS for item in self.chunk))
+        lines = array('Q', (item & LINE_MASK for item in self.chunk))
+        spill = tempfile.TemporaryFile()
+        # Ключи и номера строк пишутся чередующимися блоками одной длины.
+        for start in range(0, len(keys), READ_BLOCK_SIZE):
+            keys[start:start + READ_BLOCK_SIZE].tofile(spill)
+            lines[start:start + READ_BLOCK_SIZE].tofile(spill)
+        spill.seek(0)
+        self.spills.append((spill, len(keys)))
+        self.chunk = []
+
+    @staticmethod
+    def read_spill(spill, size):
+        while size:
+            block = min(size, READ_BLOCK_SIZE)
+            keys, lines = array('Q'), array('Q')
+            keys.fromfile(spill, block)
+            lines.fromfile(spill, block)
+            yield from zip(keys, lines)
+            size -= block
+
+    def duplicates(self):
+        """Возвращает пары (строка первого вхождения, строка повтора)."""
+        self.spill()
+        previous_key = previous_line = None
+        for key, line in heapq.merge(*(self.read_spill(spill, size)
+                                       for spill, size in self.spills)):
+            if key == previous_key:
+                yield previous_line, line
+            else:
+                previous_key, previous_line = key, line
+        for spill, _ in self.spills:
+            spill.close()
+        self.spills = []
+
+
+class Report:
+    """Пишет ошибки валидации в файл в формате JSON Lines."""
+
+    def __init__(self, report_file):
+        self.report = open(report_file, 'w', encoding='utf-8')
+        self.error_count = 0
+
+    def error(self, file_name, line, column, code, message) -> None:
+        self.error_count += 1
+        self.report.write(json.dumps({
+            'file': file_name,
+            'line': line,
+            'location': f'{file_name}:{line}',
+            'column': column,
+            'code': code,
+            'message': message,
+        }, ensure_ascii=False) + '\n')
+
+    def close(self) -> None:
+        self.report.close()
+
+
+def get_unique_sets(_model, fields) -> list:
+    """Возвращает уникальные наборы полей, все поля которых есть в файле."""
+    present = {field.name: field for field in fields}
+    candidates = [(field.name, (field.name,))
+                  for field in _model._meta.concrete_fields
+                  if field.unique and not field.primary_key]
+    candidates += [('_'.join(names), tuple(names))
+                   for names in _model._meta.unique_together]
+    candidates += [(constraint.name, tuple(constraint.fields))
+                   for constraint in _model._meta.constraints
+                   if isinstance(constraint, UniqueConstraint)
+                   and constraint.condition is None]
+    return [(name, tuple(present[field_name] for field_name in names))
+            for name, names in candidates
+            if all(field_name in present for field_name in names)]
+
+
+def check_header(header, _model, file_name, report):
+    fields = []
+    for column in header:
+        try:
+            fields.append(_model._meta.get_field(column))
+        except FieldDoesNotExist:
+            report.error(file_name, 1, column, 'unknown_column',
+                         f'Столбец не соответствует ни одному полю модели '
+                         f'{_model._meta.label}.')
+    names = {field.name for field in fields}
+    for field in _model._meta.concrete_fields:
+        required = not (field.null or field.has_default()
+                        or field.empty_strings_allowed
+                        or getattr(field, 'auto_now_add', False)
+                        or getattr(field, 'auto_now', False)
+                        or field.primary_key)
+        if required and field.name not in names:
+            report.error(file_name, 1, field.attname, 'missing_column',
+                         'Обязательный столбец отсутствует в файле.')
+    return fields if len(fields) == len(header) else None
+
+
+def check_id(field, value):
+    """Проверяет, что id не отрицателен и помещается в столбец."""
+    value = field.to_python(value)
+    if value < 0:
+        raise ValidationError('Отрицательный id.', code='invalid')
+    _, max_value = BaseDatabaseOperations.integer_field_ranges.get(
+        field.get_internal_type(), (None, None)
+    )
+    if max_value is not None and value > max_value:
+        raise ValidationError(
+            f'id={value} больше максимума столбца {max_value}.',
+            code='max_value'
+        )
+    return value
+
+
+def check_value(field, value, known_ids):
+    """Проверяет одно значение, возвращает его в нормализованном виде."""
+    if value == '' and field.null:
+        return None
+    if field.is_relation:
+        value = check_id(field.target_field, value)
+        related = known_ids.get(field.related_model._meta.label)
+        if (related is not None and field.target_field.primary_key
+                and value not in related):
+            raise ValidationError(
+                f'Объект {field.related_model._meta.label} с id={value} '
+                'отсутствует в импортируемых данных.',
+                code='missing_foreign_key'
+            )
+        return value
+    if field.primary_key:
+        return check_id(field, value)
+    return field.clean(value, None)
+
+
+def check_row(row, fields, file_name, line, known_ids, report) -> dict:
+    values = {}
+    for field, value in zip(fields, row):
+        try:
+            values[field.name] = check_value(field, value, known_ids)
+        except ValidationError as error:
+            for item in error.error_list:
+                report.error(file_name, line, field.attname,
+                             item.code or 'invalid', ' '.join(item.messages))
+    return values
+
+
+def validate_file(csv_file, _model, file_name, known_ids, report) -> int:
+    reader = csv.reader(csv_file, delimiter=',', quotechar='"')
+    header = next(reader)
+    fields = check_header(header, _model, file_name, report)
+    if fields is None:
+        return 0
+    pk_field = _model._meta.pk
+    ids = known_ids[_model._meta.label] = IdBitset()
+    unique_sets = [(name, unique_fields, UniqueKeyChecker())
+                   for name, unique_fields in get_unique_sets(_model, fields)]
+    row_count = 0
+    line = reader.line_num + 1
+    for row in reader:
+        if not row:
+            line = reader.line_num + 1
+            continue
+        row_count += 1
+        if len(row) != len(header):
+            report.error(file_name, line, None, 'invalid_row',
+                         f'Ожидалось {len(header)} значений, '
+                         f'получено {len(row)}.')
+            line = reader.line_num + 1
+            continue
+        values = check_row(row, fields, file_name, line, known_ids, report)
+        pk = values.get(pk_field.name)
+        if pk is not None and not ids.add(pk):
+            report.error(file_name, line, pk_field.attname, 'duplicate_id',
+                         f'Повторяющийся id={pk}.')
+        for _, unique_fields, checker in unique_sets:
+            key = tuple(values.get(field.name) for field in unique_fields)
+            if None not in key:
+                checker.add(key, line)
+        line = reader.line_num + 1
+    for name, unique_fields, checker in unique_sets:
+        columns = ', '.join(field.attname for field in unique_fields)
+        for first_line, line in checker.duplicates():
+            report.error(file_name, line, columns, 'unique',
+                         f'Нарушено ограничение уникальности {name}, '
+                         f'совпадает со строкой {first_line}.')
+    return row_count
+
+
+def run(folder_path, report_file=conf.DEFAULT_REPORT_FILE) -> int:
+    """Проверяет все файлы IMPORT_CONFIG, возвращает число ошибок."""
+    report = Report(report_file)
+    known_ids = {}
+    try:
+        for file_name, app_model, m2m_flag, _ in get_import_order():
+            _model = get_model(app_model, m2m_flag)
+            file_path = get_file_path(folder_path, file_name)
+            errors_before = report.error_count
+            with open_file(file_path, 'rt') as csv_file:
+                row_count = validate_file(csv_file, _model, file_name,
+                                          known_ids, report)
+            logger.info(f'Validated file {file_name}, {row_count} row(s), '
+                        f'{report.error_count - errors_before} error(s).')
+    finally:
+        report.close()
+    return report.error_count
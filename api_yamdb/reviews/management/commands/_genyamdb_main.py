@@ -0,0 +1,298 @@
+"""
+Deterministic synthetic dataset for scale testing.
+
+All values are drawn from one random.Random(seed) in a fixed order,
+so the same arguments always give the same data. Popularity is
+skewed: reviews are spread over titles by a Zipf law (title rank ->
+id through a fixed permutation), active users and popular genres
+get most of the picks, comments per review follow a Pareto tail.
+Every model constraint is respected: unique usernames/emails/slugs,
+unique_title, unique_review (one review per author and title),
+scores from Review.Score and years not later than the last one.
+Rows are written in IMPORT_CONFIG file format, either to csv-files
+or straight into the database in bulk.
+"""
+import csv
+import math
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+from django.db import transaction
+from reviews.management.commands import _fillyamdb_input_config as conf
+from reviews.management.commands import _fillyamdb_main as importer
+from reviews.management.commands._fillyamdb_main import logger
+
+WORDS: tuple = (
+    'фильм', 'книга', 'музыка', 'сюжет', 'герой', 'финал', 'актёр', 'автор',
+    'сцена', 'глава', 'звук', 'ритм', 'идея', 'смысл', 'образ', 'стиль',
+    'отлично', 'скучно', 'сильно', 'слабо', 'красиво', 'неожиданно',
+    'затянуто', 'ярко', 'честно', 'наивно', 'глубоко', 'смешно', 'грустно',
+    'очень', 'совсем', 'почти', 'снова', 'впервые', 'всегда', 'никогда',
+    'понравился', 'разочаровал', 'удивил', 'запомнился', 'рекомендую',
+    'пересмотрю', 'перечитаю', 'не', 'и', 'но', 'а', 'это', 'тот', 'весь',
+)
+# Распределение оценок смещено к 7-9, как у реальных отзывов.
+SCORE_WEIGHTS: tuple = (1, 1, 2, 3, 5, 8, 13, 17, 15, 10)
+FIRST_YEAR: int = 1950
+LAST_YEAR: int = 2023
+FIRST_DATE = datetime(2010, 1, 1, tzinfo=timezone.utc)
+DATE_SPAN_SECONDS: int = 14 * 365 * 24 * 3600
+COMMENT_DELAY_SECONDS: int = 30 * 24 * 3600
+MODERATOR_SHARE: float = 0.001
+ADMIN_COUNT: int = 3
+MAX_GENRES_PER_TITLE: int = 3
+COMMENTS_TAIL: float = 1.5
+
+
+def zipf_counts(total, size, exponent, cap):
+    """
+    Делит total между size позициями пропорционально 1 / rank**exponent,
+    не превышая cap на позицию; излишек переносится на следующие.
+    """
+    norm = math.fsum(1 / (rank + 1) ** exponent for rank in range(size))
+    cumulative = 0.0
+    previous_target = carry = 0
+    for rank in range(size):
+        cumulative += 1 / (rank + 1) ** exponent
+        target = (total if rank == size - 1
+                  else min(total, int(total * cumulative / norm)))
+        count = target - previous_target + carry
+        previous_target = target
+        given = min(count, cap)
+        carry = count - given
+        yield given
+
+
+def permutation_step(size) -> int:
+    """Шаг, взаимно простой с size: rank -> rank * step % size - биекция."""
+    step = max(1, int(size * 0.6180339887)) | 1
+    while math.gcd(step, size) != 1:
+        step += 2
+    return step
+
+
+def format_date(value) -> str:
+    milliseconds = value.microsecond // 1000
+    return value.strftime('%Y-%m-%dT%H:%M:%S.') + f'{milliseconds:03d}Z'
+
+
+class DatasetGenerator:
+    """Генерирует строки таблиц IMPORT_CONFIG в детерминированном порядке."""
+
+    def __init__(self, seed, users, categories, genres, titles, reviews,
+                 comments, exponent):
+        self.rng = random.Random(seed)
+        self.users = users
+        self.categories = categories
+        self.genres = genres
+        self.titles = titles
+        self.reviews = min(reviews, users * titles)
+        self.comments = comments
+        self.exponent = exponent
+
+    def skewed_id(self, size) -> int:
+        """Id от 1 до size, малые id выпадают заметно чаще."""
+        return int(size * self.rng.random() ** 2) + 1
+
+    def text(self, min_words, max_words) -> str:
+        length = min_words + int((max_words - min_words)
+                                 * self.rng.random() ** 3)
+        return ' '.join(self.rng.choices(WORDS, k=length)).capitalize() + '.'
+
+    def user_rows(self):
+        moderators = max(1, int(self.users * MODERATOR_SHARE))
+        for user_id in range(1, self.users + 1):
+            if user_id <= ADMIN_COUNT:
+                role = 'admin'
+            elif user_id <= ADMIN_COUNT + moderators:
+                role = 'moderator'
+            else:
+                role = 'user'
+            yield (user_id, f'user{user_id}', f'user{user_id}@yamdb.fake',
+                   role, '', '', '')
+
+    def category_rows(self):
+        for category_id in range(1, self.categories + 1):
+            yield (category_id, f'Категория {category_id}',
+                   f'category-{category_id}')
+
+    def genre_rows(self):
+        for genre_id in range(1, self.genres + 1):
+            yield genre_id, f'Жанр {genre_id}', f'genre-{genre_id}'
+
+    def title_rows(self):
+        for title_id in range(1, self.titles + 1):
+            yield (title_id, f'Произведение {title_id}',
+                   self.rng.randint(FIRST_YEAR, LAST_YEAR),
+                   self.skewed_id(self.categories), self.text(5, 40))
+
+    def title_genre_rows(self):
+        row_id = 0
+        for title_id in range(1, self.titles + 1):
+            genres = set()
+            for _ in range(self.rng.randint(1, MAX_GENRES_PER_TITLE)):
+                genres.add(self.skewed_id(self.genres))
+            for genre_id in sorted(genres):
+                row_id += 1
+                yield row_id, title_id, genre_id
+
+    def authors(self, count):
+        """count различных авторов, активные пользователи - чаще."""
+        if count > self.users // 4:
+            return self.rng.sample(range(1, self.users + 1), count)
+        authors = set()
+        while len(authors) < count:
+            authors.add(self.skewed_id(self.users))
+        return sorted(authors)
+
+    def comment_count(self, average) -> int:
+        """Хвост Парето со средним average (с округлением без смещения)."""
+        factor = (self.rng.paretovariate(COMMENTS_TAIL) - 1) * (
+            COMMENTS_TAIL - 1)
+        return int(average * factor + self.rng.random())
+
+    def review_and_comment_rows(self):
+        """Отзывы и комментарии к ним: пары (имя файла, строка)."""
+        step = permutation_step(self.titles)
+        average = self.comments / self.reviews if self.reviews else 0
+        review_id = comment_id = 0
+        counts = zipf_counts(self.reviews, self.titles, self.exponent,
+                             self.users)
+        for rank, count in enumerate(counts):
+            title_id = rank * step % self.titles + 1
+            for author_id in self.authors(count):
+                review_id += 1
+                pub_date = FIRST_DATE + timedelta(
+                    seconds=self.rng.randrange(DATE_SPAN_SECONDS))
+                yield 'reviews.csv', (
+                    review_id, title_id, self.text(5, 80), author_id,
+                    self.rng.choices(range(1, 11), SCORE_WEIGHTS)[0],
+                    format_date(pub_date),
+                )
+                for _ in range(self.comment_count(average)):
+                    comment_id += 1
+                    comment_date = pub_date + timedelta(
+                        seconds=self.rng.randrange(COMMENT_DELAY_SECONDS))
+                    yield 'comments.csv', (
+                        comment_id, review_id, self.text(2, 40),
+                        self.skewed_id(self.users), format_date(comment_date),
+                    )
+
+    def rows(self):
+        """Все строки в порядке, совместимом с внешними ключами."""
+        tables = (
+            ('yamdbuser.csv', self.user_rows),
+            ('categories.csv', self.category_rows),
+            ('genres.csv', self.genre_rows),
+            ('titles.csv', self.title_rows),
+            ('titles_genres.csv', self.title_genre_rows),
+        )
+        for file_name, table_rows in tables:
+            for row in table_rows():
+                yield file_name, row
+        yield from self.review_and_comment_rows()
+
+
+class CsvSink:
+    """Пишет строки в csv-файлы с заголовками из IMPORT_COLUMNS."""
+
+    def __init__(self, folder_path):
+        os.makedirs(folder_path, exist_ok=True)
+        self.files = {}
+        self.writers = {}
+        for file_name, header in conf.IMPORT_COLUMNS.items():
+            csv_file = open(os.path.join(folder_path, file_name), 'w',
+                            encoding='utf-8', newline='')
+            self.files[file_name] = csv_file
+            self.writers[file_name] = csv.writer(csv_file, delimiter=',',
+                                                 quotechar='"')
+            self.writers[file_name].writerow(header)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        for csv_file in self.files.values():
+            csv_file.close()
+
+    def write(self, file_name, row) -> None:
+        self.writers[file_name].writerow(row)
+
+
+class DbSink:
+    """
+    Копит строки по таблицам и вставляет их пачками средствами
+    импорта fillyamdb (COPY на PostgreSQL или bulk_create).
+    Перед вставкой пачки сбрасываются все таблицы, от которых
+    она зависит, поэтому внешние ключи всегда согласованы.
+    """
+
+    def __init__(self, batch_size, use_copy=True):
+        self.batch_size = batch_size
+        self.use_copy = use_copy and importer.can_copy()
+        self.order = [entry[0] for entry in importer.get_import_order()]
+        self.models = {}
+        self.fields = {}
+        for file_name, app_model, m2m_flag, _ in importer.get_import_order():
+            _model = importer.get_model(app_model, m2m_flag)
+            self.models[file_name] = _model
+            self.fields[file_name] = importer.get_header_fields(
+                conf.IMPORT_COLUMNS[file_name], _model, file_name
+            )
+        self.buffers = {file_name: [] for file_name in self.order}
+        self.file_dates = importer.keep_file_dates(
+            [field for fields in self.fields.values() for field in fields]
+        )
+
+    def __enter__(self):
+        self.file_dates.__enter__()
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        try:
+            if exc_type is None:
+                for file_name in self.order:
+                    self.flush_table(file_name)
+        finally:
+            self.file_dates.__exit__(exc_type, *exc_info)
+        if exc_type is None:
+            importer.finalize_import(list(self.models.values()))
+
+    def write(self, file_name, row) -> None:
+        buffer = self.buffers[file_name]
+        buffer.append([str(value) for value in row])
+        if len(buffer) >= self.batch_size:
+            self.flush(file_name)
+
+    def flush(self, file_name) -> None:
+        for parent in self.order[:self.order.index(file_name)]:
+            self.flush_table(parent)
+        self.flush_table(file_name)
+
+    def flush_table(self, file_name) -> None:
+        rows = self.buffers[file_name]
+        if not rows:
+            return
+        _model = self.models[file_name]
+        batch = list(importer.read_objects(rows, _model,
+                                           self.fields[file_name]))
+        with transaction.atomic():
+            if self.use_copy:
+                importer.copy_batch(_model, batch)
+            else:
+                _model.objects.bulk_create(batch,
+                                           batch_size=self.batch_size)
+        self.buffers[file_name] = []
+
+
+def run(sink, generator) -> dict:
+    """Передаёт все строки генератора в sink, возвращает число строк."""
+    counts = dict.fromkeys(conf.IMPORT_COLUMNS, 0)
+    with sink:
+        for file_name, row in generator.rows():
+            sink.write(file_name, row)
+            counts[file_name] += 1
+    for file_name, count in counts.items():
+        logger.info(f'Generated {count} row(s) for {file_name}')
+    return counts
@@ -0,0 +1,45 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef
+from django.utils import timezone
+from reviews.models import ChangeLogEntry
+
+
+class Command(BaseCommand):
+    help = ('Compacting the change log: removing entries superseded by a '
+            'later entry for the same object and all entries older than '
+            'the retention period')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help=('Defines the retention period in days, clients with an '
+                  'older token have to re-sync'),
+            default=settings.CHANGE_FEED_SETTINGS['RETENTION_DAYS']
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        with transaction.atomic():
+            horizon = ChangeLogEntry.objects.filter(
+                changed_at__lt=cutoff
+            ).aggregate(token=Max('id'))['token']
+            expired = 0
+            if horizon is not None:
+                expired, _ = ChangeLogEntry.objects.filter(
+                    id__lte=horizon
+                ).delete()
+                ChangeLogEntry.set_horizon(horizon)
+            superseded, _ = ChangeLogEntry.objects.filter(Exists(
+                ChangeLogEntry.objects.filter(
+                    model=OuterRef('model'),
+                    object_id=OuterRef('object_id'),
+                    id__gt=OuterRef('id'),
+                )
+            )).delete()
+        self.stdout.write(f'Removed {expired} expired and {superseded} '
+                          f'superseded change log entries.')
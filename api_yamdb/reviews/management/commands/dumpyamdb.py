@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from reviews.management.commands import _dumpyamdb_main
+from reviews.management.commands import _fillyamdb_input_config as conf
+
+
+class Command(BaseCommand):
+    help = ('Exporting model objects to csv-files in the format of '
+            'fillyamdb according the file folder path specified')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-p',
+            type=str,
+            help='Defines the path to folder for exported files',
+            default=conf.DEFAULT_PATH
+        )
+        parser.add_argument(
+            '-j',
+            '--jobs',
+            type=int,
+            help='Defines the number of tables exported concurrently',
+            default=conf.DEFAULT_JOBS
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Compresses exported files with gzip (<file_name>.csv.gz)'
+        )
+        parser.add_argument(
+            '-c',
+            '--chunk-size',
+            type=int,
+            help='Defines the number of rows fetched from the cursor at once',
+            default=conf.DEFAULT_BATCH_SIZE
+        )
+        parser.add_argument(
+            '--no-copy',
+            action='store_true',
+            help='Disables COPY on PostgreSQL and uses a cursor instead'
+        )
+
+    def handle(self, *args, **options):
+        _dumpyamdb_main.run(options['p'],
+                            compress=options['gzip'],
+                            jobs=options['jobs'],
+                            chunk_size=options['chunk_size'],
+                            use_copy=not options['no_copy'])
+        print('Complete!')
@@ -1,6 +1,6 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from reviews.management.commands import _fillyamdb_input_config as conf
-from reviews.management.commands import _fillyamdb_main
+from reviews.management.commands import _fillyamdb_main, _fillyamdb_validate
 
 
 class Command(BaseCommand):
@@ -13,8 +13,81 @@ class Command(BaseCommand):
             help='Defines the path to folder with imported files',
             default=conf.DEFAULT_PATH
         )
+        parser.add_argument(
+            '-b',
+            '--batch-size',
+            type=int,
+            help='Defines the number of rows inserted per statement',
+            default=conf.DEFAULT_BATCH_SIZE
+        )
+        parser.add_argument(
+            '-j',
+            '--jobs',
+            type=int,
+            help=('Defines the number of files imported concurrently, '
+                  'SQLite always imports one file at a time'),
+            default=conf.DEFAULT_JOBS
+        )
+        parser.add_argument(
+            '--no-copy',
+            action='store_true',
+            help='Disables COPY on PostgreSQL and uses bulk_create instead'
+        )
+
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            help=('Inserts new rows and updates existing ones by natural '
+                  'key, committing and checkpointing every batch')
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continues the import from the last saved checkpoint'
+        )
+        parser.add_argument(
+            '--state-file',
+            type=str,
+            help='Defines the path to the import checkpoint file',
+            default=conf.DEFAULT_STATE_FILE
+        )
+        parser.add_argument(
+            '--noinput',
+            '--no-input',
+            action='store_false',
+            dest='interactive',
+            help='Does not prompt for confirmation'
+        )
+
+        parser.add_argument(
+            '--validate-only',
+            action='store_true',
+            help=('Checks the files against the models and each other '
+                  'without touching the database')
+        )
+        parser.add_argument(
+            '--report',
+            type=str,
+            help=('Defines the path to the report of validation errors '
+                  'and of rows skipped by --upsert'),
+            default=conf.DEFAULT_REPORT_FILE
+        )
 
     def handle(self, *args, **options):
-        _fillyamdb_main.confirmation()
-        _fillyamdb_main.run(options['p'])
+        if options['validate_only']:
+            errors = _fillyamdb_validate.run(options['p'], options['report'])
+            if errors:
+                raise CommandError(f'Validation failed: {errors} error(s), '
+                                   f'see {options["report"]}')
+            print('Validation passed!')
+            return
+        _fillyamdb_main.confirmation(options['interactive'])
+        _fillyamdb_main.run(options['p'],
+                            batch_size=options['batch_size'],
+                            use_copy=not options['no_copy'],
+                            jobs=options['jobs'],
+                            upsert=options['upsert'],
+                            resume=options['resume'],
+                            state_file=options['state_file'],
+                            report_file=options['report'])
         print('Complete!')
@@ -0,0 +1,80 @@
+from django.core.management.base import BaseCommand
+from reviews.management.commands import _fillyamdb_input_config as conf
+from reviews.management.commands import _genyamdb_main
+
+
+class Command(BaseCommand):
+    help = ('Generating a deterministic synthetic dataset with skewed '
+            'popularity as csv-files for fillyamdb or straight into the DB')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            choices=('csv', 'db'),
+            help='Defines where the generated rows are written',
+            default='csv'
+        )
+        parser.add_argument(
+            '-p',
+            type=str,
+            help='Defines the path to folder for generated csv-files',
+            default=conf.DEFAULT_PATH
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Defines the random seed, equal seeds give equal data',
+            default=42
+        )
+        for name, default in (('users', 1000), ('categories', 10),
+                              ('genres', 50), ('titles', 500),
+                              ('reviews', 20000)):
+            parser.add_argument(
+                f'--{name}',
+                type=int,
+                help=f'Defines the number of {name}',
+                default=default
+            )
+        parser.add_argument(
+            '--comments',
+            type=int,
+            help='Defines the approximate number of comments',
+            default=50000
+        )
+        parser.add_argument(
+            '--skew',
+            type=float,
+            help='Defines the Zipf exponent of title popularity',
+            default=1.0
+        )
+        parser.add_argument(
+            '-b',
+            '--batch-size',
+            type=int,
+            help='Defines the number of rows inserted per statement',
+            default=conf.DEFAULT_BATCH_SIZE
+        )
+        parser.add_argument(
+            '--no-copy',
+            action='store_true',
+            help='Disables COPY on PostgreSQL and uses bulk_create instead'
+        )
+
+    def handle(self, *args, **options):
+        generator = _genyamdb_main.DatasetGenerator(
+            seed=options['seed'],
+            users=options['users'],
+            categories=options['categories'],
+            genres=options['genres'],
+            titles=options['titles'],
+            reviews=options['reviews'],
+            comments=options['comments'],
+            exponent=options['skew'],
+        )
+        if options['output'] == 'db':
+            sink = _genyamdb_main.DbSink(options['batch_size'],
+                                         use_copy=not options['no_copy'])
+        else:
+            sink = _genyamdb_main.CsvSink(options['p'])
+        _genyamdb_main.run(sink, generator)
+        print('Complete!')
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+from reviews.models import Title
+
+DEFAULT_CHUNK_SIZE: int = 10000
+
+
+class Command(BaseCommand):
+    help = ('Recalculating stored title ratings from reviews '
+            'in chunks of titles to repair drift, only titles whose '
+            'rating differs are updated')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-c',
+            '--chunk-size',
+            type=int,
+            help='Defines the number of titles recalculated per transaction',
+            default=DEFAULT_CHUNK_SIZE
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        bounds = Title.objects.aggregate(first=Min('pk'), last=Max('pk'))
+        if bounds['first'] is None:
+            self.stdout.write('No titles found.')
+            return
+        updated = 0
+        for start in range(bounds['first'], bounds['last'] + 1, chunk_size):
+            with transaction.atomic():
+                updated += Title.objects.filter(
+                    pk__gte=start, pk__lt=start + chunk_size
+                ).recalculate_rating()
+        self.stdout.write(f'Corrected rating of {updated} title(s).')
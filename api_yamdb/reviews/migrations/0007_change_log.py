@@ -0,0 +1,33 @@
+# Generated by Django 3.2.16 on 2026-10-18 19:19
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('model', models.CharField(help_text='Имя модели изменённого объекта', max_length=16, verbose_name='Модель')),
+                ('object_id', models.PositiveBigIntegerField(help_text='Первичный ключ изменённого объекта', verbose_name='Id объекта')),
+                ('action', models.CharField(choices=[('create', 'Создание'), ('update', 'Изменение'), ('delete', 'Удаление')], help_text='Создание, изменение или удаление объекта', max_length=6, verbose_name='Действие')),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Дата изменения объекта', verbose_name='Дата изменения')),
+            ],
+            options={
+                'verbose_name': 'Запись журнала изменений',
+                'verbose_name_plural': 'Журнал изменений',
+                'db_table': 'change_log',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='changelogentry',
+            index=models.Index(fields=['model', 'object_id', 'id'], name='change_log_object_idx'),
+        ),
+    ]
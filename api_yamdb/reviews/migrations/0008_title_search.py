@@ -0,0 +1,67 @@
+from django.db import migrations
+
+POSTGRES_FORWARD = (
+    "CREATE INDEX title_search_idx ON titles USING gin ("
+    "to_tsvector('simple'::regconfig, coalesce(name, '') || ' ' "
+    "|| coalesce(description, '')))",
+)
+POSTGRES_BACKWARD = (
+    'DROP INDEX IF EXISTS title_search_idx',
+)
+
+SQLITE_FORWARD = (
+    "CREATE VIRTUAL TABLE titles_fts USING fts5(name, description, "
+    "content='titles', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "INSERT INTO titles_fts(titles_fts) VALUES ('rebuild')",
+    "CREATE TRIGGER titles_fts_insert AFTER INSERT ON titles BEGIN "
+    "INSERT INTO titles_fts(rowid, name, description) "
+    "VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER titles_fts_delete AFTER DELETE ON titles BEGIN "
+    "INSERT INTO titles_fts(titles_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER titles_fts_update AFTER UPDATE OF name, description "
+    "ON titles BEGIN "
+    "INSERT INTO titles_fts(titles_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO titles_fts(rowid, name, description) "
+    "VALUES (new.id, new.name, new.description); END",
+)
+SQLITE_BACKWARD = (
+    'DROP TRIGGER IF EXISTS titles_fts_update',
+    'DROP TRIGGER IF EXISTS titles_fts_delete',
+    'DROP TRIGGER IF EXISTS titles_fts_insert',
+    'DROP TABLE IF EXISTS titles_fts',
+)
+
+STATEMENTS = {
+    'postgresql': (POSTGRES_FORWARD, POSTGRES_BACKWARD),
+    'sqlite': (SQLITE_FORWARD, SQLITE_BACKWARD),
+}
+
+
+def run_statements(schema_editor, backward):
+    statements = STATEMENTS.get(schema_editor.connection.vendor)
+    if statements is None:
+        return
+    for sql in statements[backward]:
+        schema_editor.execute(sql)
+
+
+def create_search_index(apps, schema_editor):
+    run_statements(schema_editor, backward=False)
+
+
+def drop_search_index(apps, schema_editor):
+    run_statements(schema_editor, backward=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_change_log'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
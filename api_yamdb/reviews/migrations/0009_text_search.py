@@ -0,0 +1,72 @@
+from django.db import migrations
+
+TABLES = ('reviews', 'comments')
+
+
+def postgres_statements(table):
+    return (
+        (f"CREATE INDEX {table}_search_idx ON {table} USING gin ("
+         f"to_tsvector('simple'::regconfig, coalesce(text, '')))",),
+        (f'DROP INDEX IF EXISTS {table}_search_idx',),
+    )
+
+
+def sqlite_statements(table):
+    fts = f'{table}_fts'
+    return (
+        (
+            f"CREATE VIRTUAL TABLE {fts} USING fts5(text, "
+            f"content='{table}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2')",
+            f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+            f"CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, text) VALUES (new.id, new.text); END",
+            f"CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, text) "
+            f"VALUES ('delete', old.id, old.text); END",
+            f"CREATE TRIGGER {fts}_update AFTER UPDATE OF text ON {table} "
+            f"BEGIN INSERT INTO {fts}({fts}, rowid, text) "
+            f"VALUES ('delete', old.id, old.text); "
+            f"INSERT INTO {fts}(rowid, text) VALUES (new.id, new.text); END",
+        ),
+        (
+            f'DROP TRIGGER IF EXISTS {fts}_update',
+            f'DROP TRIGGER IF EXISTS {fts}_delete',
+            f'DROP TRIGGER IF EXISTS {fts}_insert',
+            f'DROP TABLE IF EXISTS {fts}',
+        ),
+    )
+
+
+STATEMENTS = {
+    'postgresql': postgres_statements,
+    'sqlite': sqlite_statements,
+}
+
+
+def run_statements(schema_editor, backward):
+    statements = STATEMENTS.get(schema_editor.connection.vendor)
+    if statements is None:
+        return
+    for table in TABLES:
+        for sql in statements(table)[backward]:
+            schema_editor.execute(sql)
+
+
+def create_search_indexes(apps, schema_editor):
+    run_statements(schema_editor, backward=False)
+
+
+def drop_search_indexes(apps, schema_editor):
+    run_statements(schema_editor, backward=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_title_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
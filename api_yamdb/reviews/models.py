@@ -2,7 +2,10 @@ from typing import Tuple
 
 from core.validators import YearValidator
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -61,6 +64,185 @@ class Genre(models.Model):
         return self.name
 
 
+class TableVersion(models.Model):
+    """
+    Версии редко изменяемых таблиц. Номер увеличивается в той же
+    транзакции, что и запись в таблицу, по нему процессы сервера
+    узнают об устаревании своих кешей в памяти.
+    """
+    table = models.CharField(
+        max_length=64,
+        primary_key=True,
+        verbose_name='Таблица',
+        help_text='Имя таблицы в БД',
+    )
+    version = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Версия',
+        help_text='Номер изменения таблицы',
+    )
+
+    class Meta:
+        db_table = 'table_versions'
+        verbose_name = 'Версия таблицы'
+        verbose_name_plural = 'Версии таблиц'
+
+    def __str__(self):
+        return f'{self.table}: {self.version}'
+
+    @classmethod
+    def bump(cls, table: str) -> None:
+        """Увеличивает версию таблицы, создавая запись при отсутствии."""
+        if not cls.objects.filter(table=table).update(
+                version=F('version') + 1):
+            cls.objects.get_or_create(table=table, defaults={'version': 1})
+
+
+class ChangeLogEntry(models.Model):
+    """
+    Журнал изменений произведений, отзывов и комментариев для ленты
+    /api/v1/changes/. Записи добавляются в транзакции изменения,
+    id служит монотонным токеном ленты.
+    """
+    class Action(models.TextChoices):
+        CREATE = 'create', 'Создание'
+        UPDATE = 'update', 'Изменение'
+        DELETE = 'delete', 'Удаление'
+
+    # Метка expire_tokens(), лента её не возвращает: горизонт равен её id.
+    EXPIRE_MARKER: str = 'import'
+
+    id = models.BigAutoField(primary_key=True)
+    model = models.CharField(
+        max_length=16,
+        verbose_name='Модель',
+        help_text='Имя модели изменённого объекта',
+    )
+    object_id = models.PositiveBigIntegerField(
+        verbose_name='Id объекта',
+        help_text='Первичный ключ изменённого объекта',
+    )
+    action = models.CharField(
+        max_length=6,
+        choices=Action.choices,
+        verbose_name='Действие',
+        help_text='Создание, изменение или удаление объекта',
+    )
+    changed_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Дата изменения',
+        help_text='Дата изменения объекта',
+    )
+
+    class Meta:
+        db_table = 'change_log'
+        verbose_name = 'Запись журнала изменений'
+        verbose_name_plural = 'Журнал изменений'
+        indexes = [models.Index(
+            fields=('model', 'object_id', 'id'),
+            name='change_log_object_idx')
+        ]
+
+    def __str__(self):
+        return f'{self.id}: {self.action} {self.model} {self.object_id}'
+
+    @classmethod
+    def record(cls, *changes) -> None:
+        """
+        Добавляет записи об изменениях (модель, id объекта, действие).
+        Блокировка счётчика журнала держится до фиксации транзакции,
+        поэтому порядок id совпадает с порядком фиксации.
+        """
+        if not changes:
+            return
+        with transaction.atomic(savepoint=False):
+            TableVersion.bump(cls._meta.db_table)
+            cls.objects.bulk_create(
+                cls(model=model._meta.model_name, object_id=pk,
+                    action=action)
+                for model, pk, action in changes
+            )
+
+    @classmethod
+    def get_head(cls) -> int:
+        """Токен последней записи журнала, 0 - журнал пуст."""
+        return cls.objects.order_by('-id').values_list(
+            'id', flat=True
+        ).first() or 0
+
+    @classmethod
+    def get_horizon(cls) -> int:
+        """Наибольший токен, записи до которого удалены по сроку хранения."""
+        return TableVersion.objects.filter(
+            table=f'{cls._meta.db_table}_horizon'
+        ).values_list('version', flat=True).first() or 0
+
+    @classmethod
+    def set_horizon(cls, token: int) -> None:
+        """Сдвигает горизонт вперёд, назад он не возвращается."""
+        TableVersion.objects.update_or_create(
+            table=f'{cls._meta.db_table}_horizon',
+            defaults={'version': max(token, cls.get_horizon())}
+        )
+
+    @classmethod
+    def expire_tokens(cls) -> int:
+        """
+        Делает устаревшими все выданные токены после изменений мимо
+        журнала (массовый импорт): добавляет запись-метку и сдвигает
+        к ней горизонт. Возвращает токен метки.
+        """
+        with transaction.atomic():
+            TableVersion.bump(cls._meta.db_table)
+            marker = cls.objects.create(model=cls.EXPIRE_MARKER, object_id=0,
+                                        action=cls.Action.UPDATE)
+            cls.set_horizon(marker.pk)
+        return marker.pk
+
+
+class TitleQuerySet(models.QuerySet):
+    """Операции с хранимым рейтингом произведений."""
+
+    def change_rating(self, score_delta: int, count_delta: int) -> int:
+        """Сдвигает сумму и количество оценок на переданные величины."""
+        if not score_delta and not count_delta:
+            return 0
+        return self.update(
+            rating_sum=F('rating_sum') + score_delta,
+            rating_count=F('rating_count') + count_delta,
+            updated_at=timezone.now(),
+        )
+
+    def recalculate_rating(self) -> int:
+        """
+        Пересчитывает сумму и количество оценок по таблице отзывов.
+        Изменяются и отмечаются в журнале только произведения,
+        хранимый рейтинг которых расходится с отзывами.
+        """
+        scores = Review.objects.filter(
+            title=OuterRef('pk'), score__isnull=False
+        ).order_by().values('title')
+        rating = {
+            'rating_sum': Coalesce(
+                Subquery(scores.annotate(total=Sum('score')).values('total')),
+                0,
+            ),
+            'rating_count': Coalesce(
+                Subquery(scores.annotate(total=Count('pk')).values('total')),
+                0,
+            ),
+        }
+        pks = list(self.exclude(**rating).values_list('pk', flat=True))
+        if not pks:
+            return 0
+        updated = Title.objects.filter(pk__in=pks).update(
+            **rating, updated_at=timezone.now()
+        )
+        ChangeLogEntry.record(*((Title, pk, ChangeLogEntry.Action.UPDATE)
+                                for pk in pks))
+        return updated
+
+
 class Title(models.Model):
     """Произведения добавленные в БД."""
     name = models.CharField(
@@ -95,6 +277,25 @@ class Title(models.Model):
         verbose_name='Описание произведения',
         help_text='Описание произведения',
     )
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сумма оценок',
+        help_text='Сумма оценок из отзывов к произведению',
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество оценок',
+        help_text='Количество отзывов с оценкой к произведению',
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+        help_text='Дата последнего изменения произведения или его рейтинга',
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         db_table = 'titles'
@@ -105,10 +306,28 @@ class Title(models.Model):
             fields=['category', 'name', 'year'],
             name='unique_title')
         ]
+        indexes = [models.Index(
+            fields=('name', 'id'),
+            name='title_name_id_idx')
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            action = (ChangeLogEntry.Action.CREATE if self._state.adding
+                      else ChangeLogEntry.Action.UPDATE)
+            super().save(*args, **kwargs)
+            ChangeLogEntry.record((Title, self.pk, action))
+
+    @property
+    def rating(self):
+        """Средняя оценка произведения (целое число) или None."""
+        if not self.rating_count:
+            return None
+        return self.rating_sum // self.rating_count
+
 
 class Review(models.Model):
     """Отзывы оставленные к произведению."""
@@ -153,6 +372,11 @@ class Review(models.Model):
         verbose_name='Дата публикации',
         help_text='Дата публикации отзыва',
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+        help_text='Дата последнего изменения отзыва',
+    )
 
     class Meta:
         db_table = 'reviews'
@@ -163,10 +387,42 @@ class Review(models.Model):
             fields=('author', 'title',),
             name='unique_review')
         ]
+        indexes = [models.Index(
+            fields=('title', 'pub_date', 'id'),
+            name='review_title_pub_date_idx')
+        ]
 
     def __str__(self):
         return self.text
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            deltas = {}
+            action = (ChangeLogEntry.Action.CREATE if self._state.adding
+                      else ChangeLogEntry.Action.UPDATE)
+            if self.pk is not None:
+                previous = Review.objects.select_for_update().filter(
+                    pk=self.pk
+                ).values_list('title_id', 'score').first()
+                if previous is not None and previous[1] is not None:
+                    deltas[previous[0]] = (-previous[1], -1)
+            super().save(*args, **kwargs)
+            if self.score is not None:
+                score_delta, count_delta = deltas.get(self.title_id, (0, 0))
+                deltas[self.title_id] = (score_delta + int(self.score),
+                                         count_delta + 1)
+            changed = [
+                title_id
+                for title_id, (score_delta, count_delta) in deltas.items()
+                if Title.objects.filter(pk=title_id).change_rating(
+                    score_delta, count_delta
+                )
+            ]
+            ChangeLogEntry.record((Review, self.pk, action), *(
+                (Title, title_id, ChangeLogEntry.Action.UPDATE)
+                for title_id in changed
+            ))
+
 
 class Comment(models.Model):
     """Комментарии к отзывам"""
@@ -193,12 +449,28 @@ class Comment(models.Model):
         verbose_name='Дата публикации',
         help_text='Дата публикации комментария',
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+        help_text='Дата последнего изменения комментария',
+    )
 
     class Meta:
         db_table = 'comments'
         ordering = ('-pub_date',)
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [models.Index(
+            fields=('review', 'pub_date', 'id'),
+            name='comment_review_pub_date_idx')
+        ]
 
     def __str__(self):
         return self.text
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            action = (ChangeLogEntry.Action.CREATE if self._state.adding
+                      else ChangeLogEntry.Action.UPDATE)
+            super().save(*args, **kwargs)
+            ChangeLogEntry.record((Comment, self.pk, action))
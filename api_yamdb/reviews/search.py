@@ -0,0 +1,158 @@
+"""
+Full-text search of titles, reviews and comments.
+
+SEARCH_FIELDS lists the indexed text fields of every table. The
+backend is chosen by the database vendor: PostgreSQL matches a prefix
+tsquery against an expression GIN index on the tsvector of the fields
+and ranks with ts_rank, SQLite uses the FTS5 table <table>_fts kept in
+sync by triggers and ranks with bm25. The indexes are created by
+migrations 0008_title_search and 0009_text_search. Other databases
+fall back to icontains without ranking. Every search term is matched
+as a word prefix, all terms are required; results are annotated with
+search_rank (greater is better) and ordered by it. Snippets of a
+field mark the matched words with SNIPPET_START and SNIPPET_END,
+highlight() turns them into HTML.
+"""
+import html
+import re
+
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+
+MAX_TERMS: int = 8
+TERM_PATTERN = re.compile(r'\w+')
+SNIPPET_WORDS: int = 16
+# Символы из области частного использования Unicode, в текстах их не бывает.
+SNIPPET_START: str = '\ue000'
+SNIPPET_END: str = '\ue001'
+SNIPPET_ELLIPSIS: str = '…'
+
+# Порядок полей задаёт выражения индексов и столбцы таблиц FTS5.
+SEARCH_FIELDS: dict = {
+    'titles': ('name', 'description'),
+    'reviews': ('text',),
+    'comments': ('text',),
+}
+
+
+def get_terms(query: str) -> list:
+    """Слова запроса в нижнем регистре, без операторов и кавычек."""
+    return TERM_PATTERN.findall(query.lower())[:MAX_TERMS]
+
+
+def get_tsvector_sql(fields, table: str = '') -> str:
+    """Выражение tsvector, совпадающее с выражением GIN-индекса."""
+    text = " || ' ' || ".join(f"coalesce({table}{field}, '')"
+                              for field in fields)
+    return f"to_tsvector('simple'::regconfig, {text})"
+
+
+def highlight(snippet):
+    """Экранирует фрагмент и выделяет найденные слова тегом <mark>."""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(
+        SNIPPET_START, '<mark>'
+    ).replace(SNIPPET_END, '</mark>')
+
+
+class SearchBackend:
+    """Поиск без индекса, для СУБД без своей реализации."""
+
+    def __init__(self, queryset):
+        self.table = queryset.model._meta.db_table
+        self.quoted_table = connection.ops.quote_name(self.table)
+        self.fields = SEARCH_FIELDS[self.table]
+
+    def search(self, queryset, terms):
+        condition = Q()
+        for term in terms:
+            term_condition = Q()
+            for field in self.fields:
+                term_condition |= Q(**{f'{field}__icontains': term})
+            condition &= term_condition
+        return queryset.filter(condition).annotate(
+            search_rank=RawSQL('0', ())
+        ).order_by('-search_rank', 'id')
+
+    def snippet(self, queryset, terms, field):
+        return queryset.annotate(search_snippet=F(field))
+
+
+class PostgresSearchBackend(SearchBackend):
+    """tsvector с GIN-индексом по выражению, ранжирование ts_rank."""
+    headline_options = (f'StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, '
+                        f'MaxWords={SNIPPET_WORDS}, MinWords=5, '
+                        f'MaxFragments=2, FragmentDelimiter=" '
+                        f'{SNIPPET_ELLIPSIS} "')
+
+    def get_tsquery(self, terms) -> str:
+        return ' & '.join(f'{term}:*' for term in terms)
+
+    def search(self, queryset, terms):
+        vector = get_tsvector_sql(self.fields, f'{self.quoted_table}.')
+        tsquery = self.get_tsquery(terms)
+        # ts_rank возвращает real, в double precision значение точно
+        # переживает курсор пагинации.
+        return queryset.annotate(search_rank=RawSQL(
+            f"ts_rank({vector}, to_tsquery('simple', %s))::double precision",
+            (tsquery,)
+        )).extra(
+            where=[f"{vector} @@ to_tsquery('simple', %s)"],
+            params=(tsquery,),
+        ).order_by('-search_rank', 'id')
+
+    def snippet(self, queryset, terms, field):
+        return queryset.annotate(search_snippet=RawSQL(
+            f"ts_headline('simple', {self.quoted_table}.{field}, "
+            f"to_tsquery('simple', %s), %s)",
+            (self.get_tsquery(terms), self.headline_options)
+        ))
+
+
+class SqliteSearchBackend(SearchBackend):
+    """Таблица FTS5 с внешним содержимым, ранжирование bm25."""
+
+    def __init__(self, queryset):
+        super().__init__(queryset)
+        self.fts_table = f'{self.table}_fts'
+
+    def search(self, queryset, terms):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        return queryset.extra(
+            tables=[self.fts_table],
+            where=[f'{self.fts_table}.rowid = {self.quoted_table}.id',
+                   f'{self.fts_table} MATCH %s'],
+            params=(match,),
+        ).annotate(
+            search_rank=RawSQL(f'-bm25({self.fts_table})', ())
+        ).order_by('-search_rank', 'id')
+
+    def snippet(self, queryset, terms, field):
+        return queryset.annotate(search_snippet=RawSQL(
+            f'snippet({self.fts_table}, %s, %s, %s, %s, %s)',
+            (self.fields.index(field), SNIPPET_START, SNIPPET_END,
+             SNIPPET_ELLIPSIS, SNIPPET_WORDS)
+        ))
+
+
+BACKENDS: dict = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SqliteSearchBackend,
+}
+
+
+def search(queryset, query: str, snippet_field: str = None):
+    """
+    Объекты queryset, подходящие под запрос, по релевантности.
+    С snippet_field добавляется фрагмент поля search_snippet.
+    """
+    terms = get_terms(query)
+    if not terms:
+        return queryset.none()
+    backend = BACKENDS.get(connection.vendor, SearchBackend)(queryset)
+    queryset = backend.search(queryset, terms)
+    if snippet_field is not None:
+        queryset = backend.snippet(queryset, terms, snippet_field)
+    return queryset
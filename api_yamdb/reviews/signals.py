@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+from reviews.cache import bump_table_version
+from reviews.deletion import record_deleted
+from reviews.models import (Category, ChangeLogEntry, Comment, Genre, Review,
+                            Title)
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Review)
+def withdraw_review_score(sender, instance, **kwargs):
+    """
+    Исключает оценку удалённого отзыва из рейтинга произведения.
+    Срабатывает и при каскадном удалении (автора или произведения).
+    """
+    if instance.score is not None:
+        if Title.objects.filter(pk=instance.title_id).change_rating(
+                -instance.score, -1):
+            ChangeLogEntry.record((Title, instance.title_id,
+                                   ChangeLogEntry.Action.UPDATE))
+
+
+def record_deletion(sender, instance, **kwargs):
+    """
+    Добавляет в журнал изменений запись об удалении. Сигнал
+    отправляется внутри транзакции удаления, в том числе каскадного.
+    """
+    record_deleted((sender, [instance.pk]))
+
+
+def bump_cached_table_version(sender, **kwargs):
+    """Сообщает процессам об изменении таблицы, кешируемой в памяти."""
+    bump_table_version(sender)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_titles(sender, instance, action, reverse, pk_set, **kwargs):
+    """Отмечает изменение произведений при смене их жанров."""
+    if reverse:
+        if action == 'pre_clear':
+            pk_set = set(instance.titles.values_list('pk', flat=True))
+        elif action not in ('post_add', 'post_remove'):
+            return
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        pk_set = {instance.pk}
+    else:
+        return
+    Title.objects.filter(pk__in=pk_set).update(updated_at=timezone.now())
+    ChangeLogEntry.record(*((Title, pk, ChangeLogEntry.Action.UPDATE)
+                            for pk in pk_set))
+
+
+@receiver(pre_save, sender=User)
+def bump_renamed_user_version(sender, instance, raw=False, **kwargs):
+    """
+    Никнейм автора входит в закешированные отзывы и комментарии,
+    а также в отзывы, включённые в ответы о произведениях.
+    """
+    if raw or instance.pk is None:
+        return
+    if User.objects.filter(pk=instance.pk).exclude(
+            username=instance.username).exists():
+        bump_table_version(User)
+
+
+for model in (Category, Genre):
+    post_save.connect(bump_cached_table_version, sender=model)
+    post_delete.connect(bump_cached_table_version, sender=model)
+for model in (Title, Review, Comment):
+    post_delete.connect(record_deletion, sender=model)
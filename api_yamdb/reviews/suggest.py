@@ -0,0 +1,197 @@
+"""
+Per-process prefix index of title names for autocomplete.
+
+Names are normalized (casefolded, without diacritics, words separated
+by single spaces) and joined into one string. The index is the array
+of offsets of every word start sorted by the text from the offset (a
+sparse suffix array), so titles with a word starting with the query
+form a contiguous range found by binary search. Titles are numbered
+by decreasing weight (the number of rated reviews), and the k best
+matches are the k smallest numbers in the range.
+
+The index is built from the whole table once and then follows the
+change log: when the change_log version in TableVersion differs, title
+entries after the token of the index are applied to a small overlay
+of new, renamed and re-weighted titles and a set of removed ones. The
+index is rebuilt when the overlay outgrows
+SUGGEST_SETTINGS['MAX_OVERLAY'], when the token falls behind the
+retention horizon of the log, or when a bulk import bumps the version
+of the titles table.
+"""
+import heapq
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from reviews.cache import ChangeLogIndex
+from reviews.models import Title
+
+suggest_conf = settings.SUGGEST_SETTINGS
+
+WORD_PATTERN = re.compile(r'\w+')
+NAME_SEPARATOR: str = '\n'
+DIACRITICS: dict = dict.fromkeys(range(0x300, 0x370))
+
+
+def normalize(text: str) -> str:
+    """Слова текста в нижнем регистре без диакритики через пробел."""
+    text = text.casefold()
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text).translate(DIACRITICS)
+    return ' '.join(WORD_PATTERN.findall(text))
+
+
+def matches(name: str, prefix: str) -> bool:
+    """Начинается ли одно из слов нормализованного имени с prefix."""
+    return name.startswith(prefix) or f' {prefix}' in name
+
+
+class PrefixIndex:
+    """
+    Неизменяемый индекс по строкам (id, название, вес), упорядоченным
+    по убыванию веса. Номер строки - ранг произведения. Записи
+    сортируются группами по первой букве слова, чтобы ключи сортировки
+    (остаток названия от начала слова) не занимали память все разом;
+    для однобуквенных запросов лучшие ранги вычисляются заранее.
+    """
+
+    def __init__(self, rows):
+        self.ids = array('I')
+        self.weights = array('I')
+        names = []
+        offsets = array('I')
+        ranks = array('I')
+        position = 0
+        for rank, (pk, name, weight) in enumerate(rows):
+            name = normalize(name)
+            self.ids.append(pk)
+            self.weights.append(weight)
+            if name:
+                offsets.append(position)
+                ranks.append(rank)
+            for match in re.finditer(' ', name):
+                offsets.append(position + match.end())
+                ranks.append(rank)
+            names.append(name)
+            position += len(name) + len(NAME_SEPARATOR)
+        self.text = text = NAME_SEPARATOR.join(names) + NAME_SEPARATOR
+        del names
+        buckets = {}
+        for entry, offset in enumerate(offsets):
+            buckets.setdefault(text[offset], array('I')).append(entry)
+        self.entries = array('I')
+        self.entry_ranks = array('I')
+        self.top = {}
+        top_size = suggest_conf['MAX_LIMIT'] * 2
+        for letter in sorted(buckets):
+            bucket = sorted(buckets.pop(letter), key=lambda entry: text[
+                offsets[entry]:text.index(NAME_SEPARATOR, offsets[entry])
+            ])
+            self.entries.extend(offsets[entry] for entry in bucket)
+            bucket_ranks = [ranks[entry] for entry in bucket]
+            self.entry_ranks.extend(bucket_ranks)
+            self.top[letter] = heapq.nsmallest(top_size, set(bucket_ranks))
+        order = sorted(range(len(self.ids)), key=self.ids.__getitem__)
+        self.sorted_ids = array('I', (self.ids[rank] for rank in order))
+        self.sorted_ranks = array('I', order)
+
+    def get_rank(self, pk):
+        """Ранг произведения с первичным ключом pk или None."""
+        index = bisect_left(self.sorted_ids, pk)
+        if index < len(self.sorted_ids) and self.sorted_ids[index] == pk:
+            return self.sorted_ranks[index]
+        return None
+
+    def bound(self, prefix: str, upper: bool) -> int:
+        """
+        Первая запись, начало которой не меньше (больше) prefix.
+        Разделитель названий меньше любой буквы и пробела, поэтому
+        срез, захвативший следующее название, сравнивается верно.
+        """
+        size = len(prefix)
+        low, high = 0, len(self.entries)
+        while low < high:
+            middle = (low + high) // 2
+            offset = self.entries[middle]
+            key = self.text[offset:offset + size]
+            if key < prefix or upper and key == prefix:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def search(self, prefix: str, limit: int, removed) -> list:
+        """
+        До limit лучших совпадений (вес, id), кроме рангов removed.
+        Одно произведение может попасть в диапазон несколькими словами,
+        поэтому выборка наименьших рангов расширяется до limit различных.
+        """
+        found = [rank for rank in self.top.get(prefix, ())
+                 if rank not in removed]
+        if len(found) < limit:
+            ranks = self.entry_ranks[self.bound(prefix, False):
+                                     self.bound(prefix, True)]
+            count = limit
+            while True:
+                found = [rank for rank in dict.fromkeys(
+                    heapq.nsmallest(count, ranks)
+                ) if rank not in removed]
+                if len(found) >= limit or count >= len(ranks):
+                    break
+                count *= 2
+        return [(self.weights[rank], self.ids[rank])
+                for rank in found[:limit]]
+
+
+class TitleSuggester(ChangeLogIndex):
+    """
+    Префиксный индекс с наложением изменений после его построения:
+    состояние - (индекс, удалённые ранги, {id: (название, вес)}).
+    """
+    max_overlay = suggest_conf['MAX_OVERLAY']
+
+    def build(self):
+        return (PrefixIndex(Title.objects.order_by(
+            '-rating_count', 'id'
+        ).values_list('id', 'name', 'rating_count').iterator()),
+            frozenset(), {})
+
+    def apply(self, state, pks):
+        index, removed, overlay = state
+        removed = set(removed)
+        overlay = dict(overlay)
+        for pk in pks:
+            rank = index.get_rank(pk)
+            if rank is not None:
+                removed.add(rank)
+            overlay.pop(pk, None)
+        for pk, name, weight in Title.objects.filter(
+            pk__in=pks
+        ).values_list('id', 'name', 'rating_count'):
+            overlay[pk] = (normalize(name), weight)
+        return index, frozenset(removed), overlay
+
+    def get_overlay_size(self, state) -> int:
+        _, removed, overlay = state
+        return len(removed) + len(overlay)
+
+    def suggest(self, query: str, limit: int) -> list:
+        """
+        id до limit произведений со словом названия, начинающимся
+        с query, по убыванию веса.
+        """
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        index, removed, overlay = self.get_state()
+        found = index.search(prefix, limit, removed) + [
+            (weight, pk) for pk, (name, weight) in overlay.items()
+            if matches(name, prefix)
+        ]
+        found.sort(key=lambda item: (-item[0], item[1]))
+        return [pk for _, pk in found[:limit]]
+
+
+titles = TitleSuggester()
@@ -1,9 +1,77 @@
+import datetime as dt
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
 ]
+
+
+@pytest.fixture
+def catalog(django_user_model):
+    from reviews import bitmaps
+    from reviews.models import Category, Comment, Genre, Review, Title
+
+    # Индекс процесса переживает откат тестовой БД.
+    bitmaps.titles.state = None
+    users = [django_user_model.objects.create(username=f'user.{index}',
+                                              email=f'user{index}@ya.ru')
+             for index in range(3)]
+    category = Category.objects.create(name='Фильм', slug='film')
+    genres = [Genre.objects.create(name=name, slug=slug)
+              for name, slug in (('Драма', 'drama'), ('Комедия', 'comedy'),
+                                 ('Ужасы "и" прочее', 'horror'))]
+    with_everything = Title.objects.create(
+        name='Ёлка', year=2010, category=category,
+        description='Описание\nв две строки'
+    )
+    with_everything.genre.set(genres)
+    bare = Title.objects.create(name='Без категории', year=1999)
+    Title.objects.create(name='Один жанр', year=2020,
+                         category=category).genre.set(genres[1:2])
+    for year in range(1990, 1995):
+        Title.objects.create(name=f'Серия {year}', year=year,
+                             category=category).genre.set(genres[::2])
+    reviews = []
+    for index, (user, score) in enumerate(zip(users, (10, None, 1))):
+        review = Review.objects.create(title=with_everything, author=user,
+                                       text=f'Отзыв {index}', score=score)
+        reviews.append(review)
+    Review.objects.create(title=bare, author=users[0], text='', score=5)
+    Review.objects.filter(pk=reviews[0].pk).update(pub_date=dt.datetime(
+        2021, 5, 1, 12, 30, 15, 123456, tzinfo=dt.timezone.utc
+    ))
+    Review.objects.filter(pk=reviews[1].pk).update(pub_date=dt.datetime(
+        2021, 5, 1, 12, 30, 15, tzinfo=dt.timezone.utc
+    ))
+    for index, user in enumerate(users):
+        Comment.objects.create(review=reviews[0], author=user,
+                               text=f'Комментарий {index}')
+    return with_everything, reviews[0]
+
+
+@pytest.fixture
+def moderator_client():
+    user = get_user_model().objects.create(
+        username='moderator', email='moderator@ya.ru', role='moderator'
+    )
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def admin_client():
+    user = get_user_model().objects.create(
+        username='editor', email='editor@ya.ru', role='admin'
+    )
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
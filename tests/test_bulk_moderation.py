@@ -0,0 +1,117 @@
+import datetime as dt
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+@pytest.mark.django_db
+class TestBulkModeration:
+
+    def test_reviews(self, catalog, moderator_client):
+        from reviews.models import ChangeLogEntry, Comment, Review
+
+        title, review = catalog
+        head = ChangeLogEntry.get_head()
+        data = {'author': 'user.0', 'title': title.pk}
+        response = moderator_client.post('/api/v1/moderation/reviews/',
+                                         {**data, 'dry_run': True},
+                                         format='json')
+        assert response.status_code == 200
+        assert response.json() == {'reviews': 1, 'comments': 3, 'titles': 1}
+        assert Review.objects.filter(pk=review.pk).exists(), (
+            'Проверьте, что dry_run ничего не удаляет'
+        )
+        response = moderator_client.post('/api/v1/moderation/reviews/', data,
+                                         format='json')
+        assert response.json() == {'reviews': 1, 'comments': 3, 'titles': 1}
+        assert not Review.objects.filter(pk=review.pk).exists()
+        assert not Comment.objects.exists(), (
+            'Проверьте, что удаляются и комментарии к удалённым отзывам'
+        )
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (1, 1), (
+            'Проверьте, что рейтинг произведения пересчитывается'
+        )
+        changes = set(ChangeLogEntry.objects.filter(id__gt=head).values_list(
+            'model', 'action'
+        ))
+        assert changes == {('review', 'delete'), ('comment', 'delete'),
+                           ('title', 'update')}, (
+            'Проверьте, что удаление попадает в журнал'
+        )
+
+    def test_queries(self, catalog, moderator_client):
+        from reviews.models import Comment, Review
+
+        title, review = catalog
+        Comment.objects.bulk_create(
+            Comment(review=other, author=other.author, text='Ответ')
+            for other in Review.objects.exclude(pk=review.pk)
+        )
+        url = '/api/v1/moderation/reviews/'
+        with CaptureQueriesContext(connection) as small:
+            moderator_client.post(url, {'author': 'user.2'}, format='json')
+        assert Review.objects.count() == 3
+        with CaptureQueriesContext(connection) as large:
+            response = moderator_client.post(
+                url, {'until': '2100-01-01T00:00:00Z'}, format='json'
+            )
+        assert response.json() == {'reviews': 3, 'comments': 5, 'titles': 2}
+        assert len(large) == len(small), (
+            'Проверьте, что число запросов не зависит от числа объектов'
+        )
+
+    def test_comments(self, catalog, moderator_client):
+        from reviews.models import Comment
+
+        title, review = catalog
+        first = Comment.objects.order_by('id').first()
+        Comment.objects.filter(pk=first.pk).update(
+            pub_date=dt.datetime(2020, 1, 1, tzinfo=dt.timezone.utc)
+        )
+        response = moderator_client.post('/api/v1/moderation/comments/', {
+            'title': title.pk, 'until': '2020-06-01T00:00:00Z',
+        }, format='json')
+        assert response.json() == {'reviews': 0, 'comments': 1, 'titles': 0}
+        assert not Comment.objects.filter(pk=first.pk).exists()
+        assert Comment.objects.count() == 2
+
+    @pytest.mark.parametrize('dry_run', (False, True))
+    def test_max_write(self, catalog, moderator_client, monkeypatch,
+                       dry_run):
+        from api import moderation
+        from reviews.models import Comment, Review
+
+        monkeypatch.setitem(moderation.batch_conf, 'MAX_WRITE', 2)
+        reviews, comments = Review.objects.count(), Comment.objects.count()
+        response = moderator_client.post('/api/v1/moderation/reviews/', {
+            'until': '2100-01-01T00:00:00Z', 'dry_run': dry_run,
+        }, format='json')
+        assert response.status_code == 400, (
+            'Проверьте, что отбор больше MAX_WRITE объектов возвращает 400'
+        )
+        assert (Review.objects.count(), Comment.objects.count()) == (
+            reviews, comments
+        )
+        response = moderator_client.post('/api/v1/moderation/comments/', {
+            'ids': list(Comment.objects.values_list('pk', flat=True)[:2]),
+        }, format='json')
+        assert response.json() == {'reviews': 0, 'comments': 2, 'titles': 0}
+
+    @pytest.mark.parametrize('data', ({}, {'dry_run': True}, {'ids': []},
+                                      {'ids': ['a']}, {'title': 0},
+                                      {'since': '2021-01-02T00:00:00Z',
+                                       'until': '2021-01-01T00:00:00Z'}))
+    def test_invalid(self, moderator_client, data):
+        response = moderator_client.post('/api/v1/moderation/reviews/', data,
+                                         format='json')
+        assert response.status_code == 400, (
+            f'Проверьте, что тело {data} возвращает 400'
+        )
+
+    def test_permissions(self, catalog):
+        response = APIClient().post('/api/v1/moderation/reviews/',
+                                    {'ids': [1]}, format='json')
+        assert response.status_code == 401
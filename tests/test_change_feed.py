@@ -0,0 +1,176 @@
+import datetime as dt
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+
+def get_changes(query=''):
+    response = APIClient().get(f'/api/v1/changes/{query}')
+    return response.status_code, response.json()
+
+
+@pytest.mark.django_db
+class TestChangeFeed:
+
+    def test_paging(self, catalog):
+        from reviews.models import ChangeLogEntry
+
+        head = ChangeLogEntry.get_head()
+        status, data = get_changes('?limit=5')
+        assert status == 200
+        assert data['has_more'] is True
+        assert len(data['results']) == 5
+        tokens = [int(entry['token']) for entry in data['results']]
+        assert tokens == sorted(tokens), (
+            'Проверьте, что записи ленты идут в порядке токенов'
+        )
+        seen = tokens
+        since = data['next']
+        while True:
+            status, data = get_changes(f'?since={since}&limit=5')
+            seen += [int(entry['token']) for entry in data['results']]
+            since = data['next']
+            if not data['has_more']:
+                break
+        assert seen == list(ChangeLogEntry.objects.order_by(
+            'id'
+        ).values_list('id', flat=True)), (
+            'Проверьте, что страницы ?since= покрывают журнал без пропусков '
+            'и повторов'
+        )
+        assert since == str(head)
+        status, data = get_changes(f'?since={head}')
+        assert (data['results'], data['next'], data['has_more']) == (
+            [], str(head), False
+        ), 'Проверьте, что после последнего токена лента пуста'
+
+    def test_entries(self, catalog):
+        from reviews.models import ChangeLogEntry, Comment
+
+        title, review = catalog
+        head = ChangeLogEntry.get_head()
+        title.description = 'Новое описание'
+        title.save()
+        comment = Comment.objects.filter(review=review).first()
+        comment_id = comment.pk
+        comment.delete()
+        _, data = get_changes(f'?since={head}')
+        update, deletion = data['results']
+        assert (update['model'], update['id'], update['action']) == (
+            'title', title.pk, 'update'
+        )
+        assert update['data']['description'] == 'Новое описание', (
+            'Проверьте, что изменения содержат текущее состояние объекта'
+        )
+        assert (deletion['model'], deletion['id'], deletion['action'],
+                deletion['data']) == ('comment', comment_id, 'delete', None), (
+            'Проверьте, что удаление приходит записью с "data": null'
+        )
+
+    @pytest.mark.parametrize('query', ('?since=-1', '?since=a', '?limit=0',
+                                       '?limit=1001'))
+    def test_invalid(self, query):
+        assert get_changes(query)[0] == 400, (
+            f'Проверьте, что {query} возвращает 400'
+        )
+
+
+@pytest.mark.django_db
+class TestCompactChanges:
+
+    def test_superseded(self, catalog):
+        from reviews.models import ChangeLogEntry, Title
+
+        title, _ = catalog
+        for year in (2011, 2012):
+            title.year = year
+            title.save()
+        head = ChangeLogEntry.get_head()
+        call_command('compactchanges')
+        entries = ChangeLogEntry.objects.filter(model='title',
+                                                object_id=title.pk)
+        assert list(entries.values_list('id', flat=True)) == [head], (
+            'Проверьте, что от записей об объекте остаётся последняя'
+        )
+        assert ChangeLogEntry.objects.filter(
+            model='title'
+        ).count() == Title.objects.count()
+        _, data = get_changes('?since=0')
+        assert data['next'] == str(head)
+
+    def test_expired(self, catalog):
+        from reviews.models import ChangeLogEntry
+
+        title, _ = catalog
+        old = ChangeLogEntry.objects.order_by('id')[:3]
+        horizon = old[2].id
+        ChangeLogEntry.objects.filter(id__lte=horizon).update(
+            changed_at=dt.datetime(2000, 1, 1, tzinfo=dt.timezone.utc)
+        )
+        call_command('compactchanges', days=1)
+        assert ChangeLogEntry.get_horizon() == horizon
+        assert not ChangeLogEntry.objects.filter(id__lte=horizon).exists()
+        status, data = get_changes(f'?since={horizon - 1}')
+        assert status == 410, (
+            'Проверьте, что токен старше горизонта требует полной выгрузки'
+        )
+        assert get_changes(f'?since={horizon}')[0] == 200
+
+    def test_bulk_import(self, catalog, admin_client, tmp_path):
+        from reviews.models import ChangeLogEntry, Review
+
+        Review.objects.filter(text='').update(text='Отзыв')
+        head = ChangeLogEntry.get_head()
+        call_command('dumpyamdb', p=str(tmp_path))
+        call_command('fillyamdb', p=str(tmp_path), interactive=False,
+                     upsert=True, state_file=str(tmp_path / 'state.jsonl'))
+        assert get_changes(f'?since={head}')[0] == 410, (
+            'Проверьте, что импорт мимо журнала делает выданные токены '
+            'устаревшими'
+        )
+        token = admin_client.get(
+            '/api/v1/export/titles/'
+        )['X-Changes-Token']
+        status, data = get_changes(f'?since={token}')
+        assert (status, data['results']) == (200, []), (
+            'Проверьте, что токен выгрузки после импорта действителен'
+        )
+        ChangeLogEntry.set_horizon(head)
+        assert ChangeLogEntry.get_horizon() == int(token), (
+            'Проверьте, что горизонт не сдвигается назад'
+        )
+
+
+@pytest.mark.django_db
+class TestRecalculateRating:
+
+    def test_only_changed(self, catalog):
+        from reviews.models import ChangeLogEntry, Title
+
+        title, _ = catalog
+        head = ChangeLogEntry.get_head()
+        stamp = Title.objects.get(pk=title.pk).updated_at
+        assert Title.objects.recalculate_rating() == 0
+        assert ChangeLogEntry.get_head() == head, (
+            'Проверьте, что пересчёт без расхождений не пишет в журнал'
+        )
+        assert Title.objects.get(pk=title.pk).updated_at == stamp
+        Title.objects.filter(pk=title.pk).update(rating_sum=0)
+        assert Title.objects.recalculate_rating() == 1
+        assert list(ChangeLogEntry.objects.filter(id__gt=head).values_list(
+            'model', 'object_id'
+        )) == [('title', title.pk)]
+
+    def test_review_edit(self, catalog):
+        from reviews.models import ChangeLogEntry
+
+        title, review = catalog
+        head = ChangeLogEntry.get_head()
+        review.text = 'Новый текст'
+        review.save()
+        assert list(ChangeLogEntry.objects.filter(id__gt=head).values_list(
+            'model', 'action'
+        )) == [('review', 'update')], (
+            'Проверьте, что правка текста отзыва не отмечает произведение'
+        )
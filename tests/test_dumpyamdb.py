@@ -0,0 +1,127 @@
+import csv
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+
+
+@pytest.mark.django_db
+class TestDumpYamdb:
+
+    def test_round_trip(self, catalog, tmp_path):
+        from reviews.management.commands import (
+            _fillyamdb_input_config as conf
+        )
+        from reviews.models import Review, Title
+
+        # Пустой текст отзыва из catalog не пропустит проверка модели.
+        Review.objects.filter(text='').update(text='Отзыв')
+        call_command('dumpyamdb', p=str(tmp_path))
+        for file_name, columns in conf.IMPORT_COLUMNS.items():
+            with open(tmp_path / file_name, encoding='utf-8') as csv_file:
+                assert tuple(next(csv.reader(csv_file))) == columns, (
+                    f'Проверьте, что {file_name} содержит только столбцы '
+                    'IMPORT_COLUMNS'
+                )
+        with open(tmp_path / 'yamdbuser.csv', encoding='utf-8') as csv_file:
+            assert 'password' not in csv_file.read()
+        report = tmp_path / 'report.jsonl'
+        call_command('fillyamdb', p=str(tmp_path), validate_only=True,
+                     report=str(report))
+        assert report.read_text() == '', (
+            'Проверьте, что выгрузка проходит проверку fillyamdb'
+        )
+        ratings = dict(Title.objects.values_list('pk', 'rating_sum'))
+        reviews = Review.objects.count()
+        call_command('fillyamdb', p=str(tmp_path), interactive=False,
+                     upsert=True, state_file=str(tmp_path / 'state.jsonl'))
+        assert Review.objects.count() == reviews
+        assert dict(Title.objects.values_list('pk', 'rating_sum')) == (
+            ratings
+        ), 'Проверьте, что повторная загрузка выгрузки не меняет данные'
+
+    def test_restore_into_empty_db(self, catalog, tmp_path,
+                                   django_user_model):
+        from reviews.models import Category, Genre, Review, Title
+
+        Review.objects.filter(text='').update(text='Отзыв')
+        Title.objects.filter(pk=catalog[0].pk).update(
+            description='Описание, с запятой\nи переводом строки'
+        )
+        columns = {
+            Title: ('pk', 'name', 'year', 'category_id', 'description'),
+            Review: ('pk', 'title_id', 'text', 'score'),
+        }
+        expected = {_model: sorted(_model.objects.values_list(*fields))
+                    for _model, fields in columns.items()}
+        call_command('dumpyamdb', p=str(tmp_path))
+        for _model in (Title, Review, Genre, Category, django_user_model):
+            _model.objects.all().delete()
+        call_command('fillyamdb', p=str(tmp_path), interactive=False)
+        for _model, fields in columns.items():
+            assert sorted(_model.objects.values_list(*fields)) == (
+                expected[_model]
+            ), (
+                f'Проверьте, что выгрузка {_model.__name__} '
+                'восстанавливается в пустую базу без потерь'
+            )
+
+    def test_upsert_conflicts(self, catalog, tmp_path):
+        from reviews.models import Category, Review, Title
+
+        Review.objects.filter(text='').update(text='Отзыв')
+        call_command('dumpyamdb', p=str(tmp_path))
+        title = Title.objects.order_by('id').first()
+        with open(tmp_path / 'categories.csv', 'a', encoding='utf-8',
+                  newline='') as file:
+            csv.writer(file).writerows(((100, 'Книга', 'book'),
+                                        (101, 'Книги', 'book')))
+        with open(tmp_path / 'titles.csv', 'a', encoding='utf-8',
+                  newline='') as file:
+            csv.writer(file).writerows((
+                (100, title.name, title.year, title.category_id, ''),
+                (101, 'Роман', 2000, title.category_id, ''),
+            ))
+        line = len((tmp_path / 'titles.csv').read_text().splitlines()) - 1
+        report = tmp_path / 'report.jsonl'
+        call_command('fillyamdb', p=str(tmp_path), interactive=False,
+                     upsert=True, state_file=str(tmp_path / 'state.jsonl'),
+                     report=str(report))
+        book = Category.objects.get(slug='book')
+        assert (book.pk, book.name) == (101, 'Книги'), (
+            'Проверьте, что из повторов ключа в пачке загружается '
+            'последняя строка'
+        )
+        errors = [json.loads(line) for line in report.read_text().splitlines()]
+        assert [(error['location'], error['code']) for error in errors] == [
+            (f'titles.csv:{line}', 'conflict')
+        ], 'Проверьте, что нарушение unique_title попадает в отчёт'
+        assert set(Title.objects.filter(pk__in=(100, 101)).values_list(
+            'pk', flat=True
+        )) == {101}, 'Проверьте, что остальные строки пачки загружаются'
+
+    def test_large_ids(self, catalog, tmp_path):
+        from reviews.management.commands._fillyamdb_validate import IdBitset
+        from reviews.models import Review
+
+        ids = IdBitset(dense_limit=64)
+        assert ids.add(10 ** 12) and not ids.add(10 ** 12)
+        assert 10 ** 12 in ids and 3 not in ids
+        assert len(ids.bits) == 0, (
+            'Проверьте, что большие id не растят битовую карту'
+        )
+        Review.objects.filter(text='').update(text='Отзыв')
+        call_command('dumpyamdb', p=str(tmp_path))
+        with open(tmp_path / 'categories.csv', 'a', encoding='utf-8') as file:
+            file.write(f'{10 ** 12},Книга,book\n{2 ** 63},Игра,game\n')
+        with open(tmp_path / 'titles.csv', 'a', encoding='utf-8') as file:
+            file.write(f'{10 ** 12},Роман,2000,{10 ** 12},\n')
+        report = tmp_path / 'report.jsonl'
+        with pytest.raises(CommandError):
+            call_command('fillyamdb', p=str(tmp_path), validate_only=True,
+                         report=str(report))
+        errors = [json.loads(line) for line in report.read_text().splitlines()]
+        assert [(error['location'], error['column'], error['code'])
+                for error in errors] == [
+            ('categories.csv:4', 'id', 'max_value')
+        ], 'Проверьте, что id вне диапазона столбца отклоняется'
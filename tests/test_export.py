@@ -0,0 +1,63 @@
+import csv
+import io
+import json
+
+import pytest
+from rest_framework.test import APIClient
+
+
+def get_export(client, url, **headers):
+    response = client.get(url, **headers)
+    assert response.status_code == 200, (
+        f'Проверьте, что {url} возвращает 200'
+    )
+    assert response.streaming, 'Проверьте, что выгрузка потоковая'
+    return response, b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    def test_ndjson(self, catalog, admin_client):
+        from reviews.models import ChangeLogEntry, Title
+
+        response, content = get_export(admin_client,
+                                       '/api/v1/export/titles/')
+        assert response['Content-Type'].startswith('application/x-ndjson')
+        rows = [json.loads(line) for line in content.splitlines()]
+        assert sorted(row['id'] for row in rows) == sorted(
+            Title.objects.values_list('id', flat=True)
+        ), 'Проверьте, что выгрузка содержит каждое произведение один раз'
+        assert response['X-Changes-Token'] == str(ChangeLogEntry.get_head())
+
+    @pytest.mark.parametrize('url, headers', (
+        ('/api/v1/export/reviews/?format=csv', {}),
+        ('/api/v1/export/reviews/', {'HTTP_ACCEPT': 'text/csv'}),
+    ))
+    def test_csv(self, catalog, admin_client, url, headers):
+        from reviews.models import Review
+
+        response, content = get_export(admin_client, url, **headers)
+        assert response['Content-Type'].startswith('text/csv')
+        header, *rows = csv.reader(io.StringIO(content))
+        assert 'id' in header and 'text' in header
+        assert len(rows) == Review.objects.count(), (
+            'Проверьте, что в CSV по строке на объект после заголовка'
+        )
+
+    def test_filters(self, catalog, admin_client):
+        from reviews.models import Title
+
+        _, content = get_export(admin_client,
+                                '/api/v1/export/titles/?genre=comedy')
+        assert len(content.splitlines()) == Title.objects.filter(
+            genre__slug='comedy'
+        ).count()
+
+    def test_permissions(self, catalog, moderator_client):
+        assert APIClient().get(
+            '/api/v1/export/comments/'
+        ).status_code == 401
+        assert moderator_client.get(
+            '/api/v1/export/comments/'
+        ).status_code == 403
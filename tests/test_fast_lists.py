@@ -0,0 +1,49 @@
+import pytest
+from django.core.cache import caches
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+
+def get_content(url, enabled):
+    caches['default'].clear()
+    with override_settings(FAST_LIST_SETTINGS={'ENABLED': enabled}):
+        response = APIClient().get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что {url} возвращает 200'
+    )
+    return response.content
+
+
+@pytest.mark.django_db
+class TestFastLists:
+
+    def assert_same(self, url):
+        assert get_content(url, True) == get_content(url, False), (
+            f'Проверьте, что быстрый список {url} совпадает с ответом '
+            'сериализатора побайтно'
+        )
+
+    def test_titles(self, catalog):
+        for query in ('', '?page=2', '?category=film', '?genre=comedy',
+                      '?genre=missing', '?year=1999', '?pagination=cursor',
+                      '?fields=id,name,rating', '?fields=genre,year',
+                      '?include=reviews', '?include=reviews:1&page=2',
+                      '?fields=name&include=reviews:2&pagination=cursor',
+                      '?search=серия', '?search=сер&pagination=cursor',
+                      '?search=описание&fields=id,name',
+                      '?genre=drama,comedy&genre_mode=all',
+                      '?category=film,missing&year_min=1991&year_max=1993'):
+            self.assert_same(f'/api/v1/titles/{query}')
+
+    def test_reviews(self, catalog):
+        title, _ = catalog
+        self.assert_same(f'/api/v1/titles/{title.pk}/reviews/')
+        self.assert_same(
+            f'/api/v1/titles/{title.pk}/reviews/?pagination=cursor'
+        )
+
+    def test_comments(self, catalog):
+        title, review = catalog
+        self.assert_same(
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+        )
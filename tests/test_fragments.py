@@ -0,0 +1,67 @@
+import pytest
+from django.core.cache import caches
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+
+def get_titles(fast=True, query=''):
+    """Первая страница произведений и прирост попаданий и промахов."""
+    from api.fragments import get_stats
+
+    before = get_stats()
+    with override_settings(FAST_LIST_SETTINGS={'ENABLED': fast}):
+        response = APIClient().get(f'/api/v1/titles/{query}')
+    assert response.status_code == 200
+    after = get_stats()
+    return response.json()['results'], (after['hits'] - before['hits'],
+                                        after['misses'] - before['misses'])
+
+
+@pytest.mark.django_db
+class TestFragments:
+
+    @pytest.mark.parametrize('fast', (True, False))
+    def test_hits_and_misses(self, catalog, monkeypatch, fast):
+        from api.views import TitleViewSet
+        from reviews.models import Genre, Title
+
+        # Кеш ответов целиком отдал бы повторный список.
+        monkeypatch.setattr(TitleViewSet, 'cached_actions', ())
+        caches['default'].clear()
+        first, stats = get_titles(fast)
+        assert stats == (0, 5)
+        second, stats = get_titles(fast)
+        assert (second, stats) == (first, (5, 0)), (
+            'Проверьте, что повторный список собирается из фрагментов'
+        )
+        title = Title.objects.get(pk=first[0]['id'])
+        title.description = 'Новое описание'
+        title.save()
+        third, stats = get_titles(fast)
+        assert stats == (4, 1), (
+            'Проверьте, что изменение объекта сбрасывает только его фрагмент'
+        )
+        assert third[0]['description'] == 'Новое описание'
+        genre = Genre.objects.get(slug='drama')
+        genre.name = 'Мелодрама'
+        genre.save()
+        fourth, stats = get_titles(fast)
+        assert stats == (0, 5), (
+            'Проверьте, что изменение таблицы жанров сбрасывает фрагменты '
+            'произведений'
+        )
+        assert 'Мелодрама' in {item['name'] for title in fourth
+                               for item in title['genre']}
+
+    def test_fields_variant(self, catalog, monkeypatch):
+        from api.views import TitleViewSet
+
+        monkeypatch.setattr(TitleViewSet, 'cached_actions', ())
+        caches['default'].clear()
+        get_titles()
+        sparse, stats = get_titles(query='?fields=id,name')
+        assert stats == (0, 5), (
+            'Проверьте, что у каждого набора полей свои фрагменты'
+        )
+        assert all(set(item) == {'id', 'name'} for item in sparse)
+        assert get_titles(query='?fields=name,id')[1] == (5, 0)
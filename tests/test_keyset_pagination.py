@@ -0,0 +1,88 @@
+import datetime as dt
+
+import pytest
+from rest_framework.test import APIClient
+
+
+def walk(url, on_page=None):
+    """Проходит все страницы по ссылкам next, возвращает id объектов."""
+    client = APIClient()
+    ids = []
+    while url:
+        data = client.get(url).json()
+        assert 'count' not in data, (
+            'Проверьте, что курсорный режим не считает объекты'
+        )
+        ids += [item['id'] for item in data['results']]
+        if on_page is not None:
+            on_page(data)
+        url = data['next']
+    return ids
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+
+    def test_stable_across_inserts(self, catalog):
+        from reviews.models import Category, Title
+
+        film = Category.objects.get(slug='film')
+        Title.objects.bulk_create(
+            Title(name=f'Фильм {index:02}', year=2000, category=film)
+            for index in range(8)
+        )
+        before = list(Title.objects.order_by('name', 'id').values_list(
+            'id', flat=True
+        ))
+        inserted = []
+
+        def insert(data):
+            if inserted:
+                return
+            # Одна запись до текущей позиции, одна - после.
+            inserted.extend(
+                Title.objects.create(name=name, year=2000, category=film).pk
+                for name in ('Аа', 'Яя')
+            )
+
+        ids = walk('/api/v1/titles/?pagination=cursor', insert)
+        assert len(ids) == len(set(ids)), (
+            'Проверьте, что вставки не дают повторов между страницами'
+        )
+        assert ids == before + [inserted[1]], (
+            'Проверьте, что вставки не дают пропусков: запись до курсора '
+            'не попадает в выдачу, после - попадает'
+        )
+
+    def test_previous(self, catalog):
+        client = APIClient()
+        first = client.get('/api/v1/titles/?pagination=cursor').json()
+        second = client.get(first['next']).json()
+        assert first['previous'] is None
+        back = client.get(second['previous']).json()
+        assert back['results'] == first['results'], (
+            'Проверьте, что ссылка previous возвращает предыдущую страницу'
+        )
+
+    def test_equal_dates(self, catalog):
+        from reviews.models import Comment
+
+        title, review = catalog
+        Comment.objects.bulk_create(
+            Comment(review=review, author=review.author, text='Ответ')
+            for _ in range(5)
+        )
+        comments = Comment.objects.filter(review=review)
+        comments.update(pub_date=dt.datetime(2020, 1, 1,
+                                             tzinfo=dt.timezone.utc))
+        ids = walk(f'/api/v1/titles/{title.pk}/reviews/{review.pk}/'
+                   'comments/?pagination=cursor')
+        assert ids == sorted(comments.values_list('id', flat=True),
+                             reverse=True), (
+            'Проверьте, что объекты с одной датой упорядочены по id '
+            'без пропусков и повторов'
+        )
+
+    def test_invalid_cursor(self):
+        response = APIClient().get('/api/v1/titles/?cursor=abc')
+        assert response.status_code == 404
@@ -0,0 +1,147 @@
+import pytest
+from django.core.cache import caches
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+TITLE = '/api/v1/titles/{title}/'
+REVIEW = TITLE + 'reviews/{review}/'
+COMMENT = REVIEW + 'comments/{comment}/'
+
+# (роль, метод, адрес, тело, ожидаемый статус); записи - в конце.
+ENDPOINTS = (
+    ('anon', 'get', '/api/v1/categories/', None, 200),
+    ('anon', 'get', '/api/v1/genres/', None, 200),
+    ('anon', 'get', '/api/v1/titles/', None, 200),
+    ('anon', 'get', '/api/v1/titles/?include=reviews', None, 200),
+    ('anon', 'get', '/api/v1/titles/?genre=drama,comedy', None, 200),
+    ('anon', 'get', '/api/v1/titles/?search=серия', None, 200),
+    ('anon', 'get', TITLE, None, 200),
+    ('anon', 'get', '/api/v1/titles/facets/', None, 200),
+    ('author', 'get', '/api/v1/titles/facets/', None, 200),
+    ('anon', 'get', '/api/v1/titles/suggest/?q=сер', None, 200),
+    ('author', 'get', '/api/v1/titles/suggest/?q=сер', None, 200),
+    ('anon', 'get', '/api/v1/titles/batch/?ids={title}', None, 200),
+    ('author', 'get', '/api/v1/titles/batch/?ids={title}', None, 200),
+    ('author', 'get', '/api/v1/titles/', None, 200),
+    ('author', 'get', TITLE, None, 200),
+    ('author', 'get', TITLE + 'reviews/', None, 200),
+    ('author', 'get', REVIEW + 'comments/', None, 200),
+    ('author', 'get', '/api/v1/categories/', None, 200),
+    ('anon', 'get', TITLE + 'reviews/', None, 200),
+    ('anon', 'get', REVIEW, None, 200),
+    ('anon', 'get', REVIEW + 'comments/', None, 200),
+    ('anon', 'get', COMMENT, None, 200),
+    ('anon', 'get', '/api/v1/changes/', None, 200),
+    ('admin', 'get', '/api/v1/export/titles/', None, 200),
+    ('admin', 'get', '/api/v1/export/reviews/', None, 200),
+    ('admin', 'get', '/api/v1/search/reviews/?q=отзыв', None, 200),
+    ('admin', 'get', '/api/v1/users/', None, 200),
+    ('admin', 'get', '/api/v1/users/author/', None, 200),
+    ('author', 'get', '/api/v1/users/me/', None, 200),
+    ('admin', 'post', '/api/v1/categories/',
+     {'name': 'Книга', 'slug': 'book'}, 201),
+    ('admin', 'post', '/api/v1/genres/', {'name': 'Мюзикл', 'slug': 'musical'},
+     201),
+    ('admin', 'post', '/api/v1/titles/',
+     {'name': 'Новинка', 'year': 2021, 'category': 'film',
+      'genre': ['drama', 'comedy']}, 201),
+    ('admin', 'post', '/api/v1/titles/',
+     [{'name': 'Новинка', 'year': 2021, 'category': 'film',
+       'genre': ['drama', 'comedy']}], 201),
+    ('admin', 'patch', '/api/v1/titles/bulk/',
+     [{'id': '{title}', 'year': 2011, 'genre': ['horror']}], 200),
+    ('admin', 'patch', TITLE, {'year': 2011, 'genre': ['horror']}, 200),
+    ('admin', 'put', TITLE,
+     {'name': 'Ёлка', 'year': 2011, 'category': 'film', 'genre': ['drama']},
+     200),
+    ('author', 'post', '/api/v1/titles/{free}/reviews/',
+     {'text': 'Отзыв', 'score': 7}, 201),
+    ('author', 'patch', REVIEW, {'score': 3}, 200),
+    ('author', 'post', REVIEW + 'comments/', {'text': 'Ответ'}, 201),
+    ('author', 'patch', COMMENT, {'text': 'Ответ'}, 200),
+    ('author', 'patch', '/api/v1/users/me/', {'bio': 'О себе'}, 200),
+    ('admin', 'post', '/api/v1/users/',
+     {'username': 'newcomer', 'email': 'newcomer@ya.ru'}, 201),
+    ('admin', 'patch', '/api/v1/users/author/', {'bio': 'О себе'}, 200),
+    ('anon', 'post', '/api/v1/auth/signup/',
+     {'username': 'newcomer', 'email': 'newcomer@ya.ru'}, 200),
+    ('admin', 'post', '/api/v1/moderation/reviews/',
+     {'author': 'user.0'}, 200),
+    ('admin', 'post', '/api/v1/moderation/comments/',
+     {'author': 'user.1'}, 200),
+)
+
+
+def get_client(user=None):
+    client = APIClient()
+    if user is not None:
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+        )
+    return client
+
+
+def fill(value, keys):
+    """Подставляет id объектов в тело запроса."""
+    if isinstance(value, str):
+        text = value.format(**keys)
+        return int(text) if text.isdigit() else text
+    if isinstance(value, list):
+        return [fill(item, keys) for item in value]
+    if isinstance(value, dict):
+        return {key: fill(item, keys) for key, item in value.items()}
+    return value
+
+
+@pytest.fixture
+def clients(catalog, django_user_model):
+    from reviews.models import Comment, Title
+
+    title, review = catalog
+    author = django_user_model.objects.create(username='author',
+                                              email='author@ya.ru')
+    admin = django_user_model.objects.create(username='chief',
+                                             email='chief@ya.ru',
+                                             role='admin')
+    own_review = title.reviews.create(author=author, text='Мой отзыв',
+                                      score=5)
+    comment = Comment.objects.create(review=own_review, author=author,
+                                     text='Мой комментарий')
+    keys = {'title': title.pk, 'review': own_review.pk,
+            'comment': comment.pk,
+            'free': Title.objects.get(name='Один жанр').pk}
+    roles = {'anon': get_client(), 'author': get_client(author),
+             'admin': get_client(admin)}
+    return roles, keys
+
+
+@pytest.mark.django_db
+class TestQueryBudgets:
+
+    @pytest.mark.parametrize('role, method, path, body, status', ENDPOINTS)
+    def test_endpoints(self, clients, role, method, path, body, status):
+        from core.middleware import strict_query_budget
+
+        roles, keys = clients
+        url = path.format(**keys)
+        # Холодный кеш ответов: бюджет рассчитан на промах.
+        caches['default'].clear()
+        with strict_query_budget():
+            response = getattr(roles[role], method)(
+                url, fill(body, keys), format='json'
+            )
+            if response.streaming:
+                b''.join(response.streaming_content)
+        assert response.status_code == status, (
+            f'Проверьте, что {method.upper()} {url} возвращает {status}'
+        )
+
+    def test_exceeded(self, clients, monkeypatch):
+        from api.views import TitleViewSet
+        from core.middleware import QueryBudgetExceeded, strict_query_budget
+
+        roles, keys = clients
+        monkeypatch.setattr(TitleViewSet, 'max_queries', {'retrieve': 1})
+        caches['default'].clear()
+        with strict_query_budget(), pytest.raises(QueryBudgetExceeded):
+            roles['anon'].get(TITLE.format(**keys))
@@ -0,0 +1,123 @@
+from io import StringIO
+
+import pytest
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db.models import Count, Q, Sum
+from rest_framework.test import APIClient
+
+
+def get_ratings():
+    """Хранимые (сумма, количество) оценок по id произведения."""
+    from reviews.models import Title
+
+    return {pk: (rating_sum, rating_count)
+            for pk, rating_sum, rating_count in Title.objects.values_list(
+                'pk', 'rating_sum', 'rating_count'
+            )}
+
+
+def assert_consistent():
+    from reviews.models import Title
+
+    expected = {
+        pk: (total or 0, count)
+        for pk, total, count in Title.objects.annotate(
+            total=Sum('reviews__score'),
+            count=Count('reviews', filter=Q(reviews__score__isnull=False)),
+        ).values_list('pk', 'total', 'count')
+    }
+    assert get_ratings() == expected, (
+        'Проверьте, что хранимый рейтинг совпадает с оценками в отзывах'
+    )
+
+
+@pytest.fixture
+def reviewer(django_user_model):
+    user = django_user_model.objects.create(username='reviewer',
+                                            email='reviewer@ya.ru')
+    client = APIClient()
+    client.force_authenticate(user)
+    return user, client
+
+
+@pytest.mark.django_db
+class TestRatings:
+
+    def test_api(self, catalog, reviewer):
+        title, _ = catalog
+        user, client = reviewer
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        assert get_ratings()[title.pk] == (11, 2)
+        response = client.post(url, {'text': 'Хорошо', 'score': 6})
+        assert response.status_code == 201
+        assert get_ratings()[title.pk] == (17, 3), (
+            'Проверьте, что оценка нового отзыва входит в рейтинг'
+        )
+        review_url = f'{url}{response.json()["id"]}/'
+        client.patch(review_url, {'score': 9})
+        assert get_ratings()[title.pk] == (20, 3), (
+            'Проверьте, что изменение оценки меняет сумму, но не количество'
+        )
+        client.patch(review_url, {'text': 'Просто хорошо'})
+        assert get_ratings()[title.pk] == (20, 3)
+        caches['default'].clear()
+        assert APIClient().get(
+            f'/api/v1/titles/{title.pk}/'
+        ).json()['rating'] == 6
+        assert client.delete(review_url).status_code == 204
+        assert get_ratings()[title.pk] == (11, 2), (
+            'Проверьте, что удаление отзыва исключает его оценку'
+        )
+        assert_consistent()
+
+    def test_score_added_and_moved(self, catalog):
+        from reviews.models import Review, Title
+
+        title, _ = catalog
+        unscored = Review.objects.get(title=title, score=None)
+        unscored.score = 4
+        unscored.save()
+        assert get_ratings()[title.pk] == (15, 3)
+        other = Title.objects.get(name='Один жанр')
+        unscored.title = other
+        unscored.save()
+        ratings = get_ratings()
+        assert (ratings[title.pk], ratings[other.pk]) == ((11, 2), (4, 1)), (
+            'Проверьте, что перенос отзыва переносит его оценку'
+        )
+        assert_consistent()
+
+    def test_cascades(self, catalog, django_user_model):
+        from reviews.models import Title
+
+        title, _ = catalog
+        bare = Title.objects.get(name='Без категории')
+        django_user_model.objects.get(username='user.0').delete()
+        ratings = get_ratings()
+        assert (ratings[title.pk], ratings[bare.pk]) == ((1, 1), (0, 0)), (
+            'Проверьте, что удаление автора исключает оценки его отзывов'
+        )
+        title.delete()
+        assert title.pk not in get_ratings()
+        assert_consistent()
+
+    def test_recalcratings(self, catalog, reviewer):
+        from reviews.models import Title
+
+        title, _ = catalog
+        _, client = reviewer
+        client.post(f'/api/v1/titles/{title.pk}/reviews/',
+                    {'text': 'Плохо', 'score': 2})
+        live = get_ratings()
+        out = StringIO()
+        call_command('recalcratings', chunk_size=3, stdout=out)
+        assert get_ratings() == live, (
+            'Проверьте, что пересчёт совпадает с поддерживаемым рейтингом'
+        )
+        assert 'Corrected rating of 0 title(s).' in out.getvalue()
+        Title.objects.filter(pk=title.pk).update(rating_sum=0,
+                                                 rating_count=0)
+        call_command('recalcratings', stdout=out)
+        assert get_ratings() == live
+        assert_consistent()
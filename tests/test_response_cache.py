@@ -0,0 +1,78 @@
+import pytest
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def cold_cache():
+    caches['default'].clear()
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+
+    def test_etag(self, catalog, cold_cache):
+        title, _ = catalog
+        url = f'/api/v1/titles/{title.pk}/'
+        client = APIClient()
+        with CaptureQueriesContext(connection) as miss:
+            first = client.get(url)
+        etag = first['ETag']
+        with CaptureQueriesContext(connection) as hit:
+            second = client.get(url)
+        assert second.content == first.content
+        assert len(hit) == 1, (
+            'Проверьте, что повторный запрос читает только версии таблиц'
+        )
+        assert len(miss) > len(hit)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что совпадающий If-None-Match даёт 304'
+        )
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH='"other"'
+        ).status_code == 200
+
+    @pytest.mark.parametrize('write', ('title', 'review', 'genre', 'user'))
+    def test_invalidation(self, catalog, cold_cache, admin_client,
+                          django_user_model, write):
+        from reviews.models import Genre
+
+        title, review = catalog
+        url = f'/api/v1/titles/{title.pk}/?include=reviews'
+        client = APIClient()
+        etag = client.get(url)['ETag']
+        # Версии увеличиваются в транзакции записи, без on_commit.
+        if write == 'title':
+            admin_client.patch(f'/api/v1/titles/{title.pk}/',
+                               {'description': 'Новое описание'},
+                               format='json')
+        elif write == 'review':
+            review.score = 2
+            review.save()
+        elif write == 'genre':
+            Genre.objects.filter(slug='drama').first().save()
+        else:
+            author = django_user_model.objects.get(pk=review.author_id)
+            author.username = 'renamed'
+            author.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            f'Проверьте, что запись ({write}) делает прежний ETag '
+            'недействительным'
+        )
+        assert response['ETag'] != etag
+
+    def test_list_after_write(self, catalog, cold_cache, admin_client):
+        client = APIClient()
+        names = [item['name'] for item in
+                 client.get('/api/v1/categories/').json()['results']]
+        admin_client.post('/api/v1/categories/',
+                          {'name': 'Книга', 'slug': 'book'})
+        assert [item['name'] for item in client.get(
+            '/api/v1/categories/'
+        ).json()['results']] == names + ['Книга'], (
+            'Проверьте, что кеш ответа сбрасывается записью'
+        )
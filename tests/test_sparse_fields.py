@@ -0,0 +1,53 @@
+import pytest
+from django.core.cache import caches
+from rest_framework.test import APIClient
+
+
+def get_json(url, status=200):
+    caches['default'].clear()
+    response = APIClient().get(url)
+    assert response.status_code == status, (
+        f'Проверьте, что {url} возвращает {status}'
+    )
+    return response.json()
+
+
+@pytest.mark.django_db
+class TestSparseFields:
+
+    def test_fields(self, catalog):
+        title, _ = catalog
+        results = get_json('/api/v1/titles/?fields=id,name,rating')['results']
+        assert results and all(set(item) == {'id', 'name', 'rating'}
+                               for item in results), (
+            'Проверьте, что объекты содержат только поля из ?fields='
+        )
+        detail = get_json(f'/api/v1/titles/{title.pk}/?fields=genre,year')
+        assert sorted(detail) == ['genre', 'year']
+        assert detail['year'] == 2010
+
+    def test_include(self, catalog):
+        from reviews.models import Review
+
+        title, _ = catalog
+        detail = get_json(
+            f'/api/v1/titles/{title.pk}/?fields=name&include=reviews:2'
+        )
+        assert sorted(detail) == ['name', 'reviews']
+        latest = list(Review.objects.filter(title=title).order_by(
+            '-pub_date', '-id'
+        ).values_list('id', flat=True)[:2])
+        assert [review['id'] for review in detail['reviews']] == latest, (
+            'Проверьте, что include=reviews:n содержит n последних отзывов'
+        )
+        assert set(detail['reviews'][0]) == {'id', 'text', 'author',
+                                             'score', 'pub_date'}
+        results = get_json('/api/v1/titles/?include=reviews')['results']
+        assert all(len(item['reviews']) <= 3 for item in results)
+        assert {len(item['reviews']) for item in results} == {0, 1, 3}
+
+    @pytest.mark.parametrize('query', ('fields=', 'fields=password',
+                                       'include=users', 'include=reviews:0',
+                                       'include=reviews:21'))
+    def test_invalid(self, query):
+        get_json(f'/api/v1/titles/?{query}', status=400)
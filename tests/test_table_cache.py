@@ -0,0 +1,47 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+class TestTableCache:
+
+    def test_reload_on_version(self, catalog):
+        from reviews import cache
+        from reviews.models import Genre
+
+        drama = cache.genres.get_by_slug('drama')
+        with CaptureQueriesContext(connection) as queries:
+            assert cache.genres.get_by_slug('drama') is drama
+        assert len(queries) == 1, (
+            'Проверьте, что при неизменной версии читается только '
+            'таблица версий'
+        )
+        genre = Genre.objects.get(slug='drama')
+        genre.name = 'Мелодрама'
+        genre.save()
+        assert cache.genres.get_by_slug('drama').name == 'Мелодрама', (
+            'Проверьте, что запись увеличивает версию и кеш перечитывается'
+        )
+        genre.delete()
+        assert cache.genres.get_by_slug('drama') is None
+        assert cache.genres.get(drama.pk) is None
+
+    def test_new_slug_via_api(self, catalog, admin_client):
+        from reviews import cache
+
+        cache.categories.load()
+        response = admin_client.post('/api/v1/categories/',
+                                     {'name': 'Книга', 'slug': 'book'})
+        assert response.status_code == 201
+        response = admin_client.post('/api/v1/titles/', {
+            'name': 'Роман', 'year': 2000, 'category': 'book',
+            'genre': ['drama'],
+        }, format='json')
+        assert response.status_code == 201, (
+            'Проверьте, что новая категория видна в кеше таблиц сразу'
+        )
+        title = admin_client.get(
+            f'/api/v1/titles/{response.json()["id"]}/'
+        ).json()
+        assert title['category'] == {'name': 'Книга', 'slug': 'book'}
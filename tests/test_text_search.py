@@ -0,0 +1,37 @@
+import pytest
+from rest_framework.test import APIClient
+
+
+@pytest.mark.django_db
+class TestTextSearch:
+
+    def test_reviews(self, catalog, moderator_client):
+        from reviews.models import Review
+
+        title, review = catalog
+        Review.objects.filter(pk=review.pk).update(
+            text='Спам <b>спам</b>: купите спамовый набор'
+        )
+        response = moderator_client.get('/api/v1/search/reviews/?q=спам')
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert [item['id'] for item in results] == [review.pk], (
+            'Проверьте, что поиск находит отзывы по началу слова'
+        )
+        assert results[0]['title'] == title.pk
+        assert '<mark>' in results[0]['snippet']
+        assert '&lt;b&gt;' in results[0]['snippet'], (
+            'Проверьте, что текст фрагмента экранируется'
+        )
+
+    def test_comments_cursor(self, catalog, moderator_client):
+        url = '/api/v1/search/comments/?q=комментарий'
+        response = moderator_client.get(url)
+        assert response.status_code == 200
+        data = response.json()
+        assert set(data) == {'next', 'previous', 'results'}
+        assert len(data['results']) == 3
+
+    def test_permissions(self, catalog):
+        response = APIClient().get('/api/v1/search/reviews/?q=отзыв')
+        assert response.status_code == 401
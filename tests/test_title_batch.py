@@ -0,0 +1,51 @@
+import pytest
+from rest_framework.test import APIClient
+
+from tests.test_fast_lists import get_content
+
+
+@pytest.mark.django_db
+class TestTitleBatch:
+
+    def test_order_and_missing(self, catalog):
+        from reviews.models import Title
+
+        first, second = Title.objects.order_by('-id').values_list(
+            'id', flat=True
+        )[:2]
+        url = f'/api/v1/titles/batch/?ids={first},999999,{second},{first}'
+        response = APIClient().get(url)
+        assert response.status_code == 200, (
+            'Проверьте, что /api/v1/titles/batch/?ids= возвращает 200'
+        )
+        data = response.json()
+        assert [item['id'] for item in data['results']] == [first, second], (
+            'Проверьте, что произведения возвращаются в порядке ?ids= '
+            'без повторов'
+        )
+        assert data['missing'] == [999999], (
+            'Проверьте, что отсутствующие id перечислены в missing'
+        )
+        assert data['results'][0] == APIClient().get(
+            f'/api/v1/titles/{first}/'
+        ).json(), 'Проверьте, что объекты совпадают с ответом по одному id'
+
+    def test_fast_and_serializer(self, catalog):
+        title, _ = catalog
+        for query in (f'?ids={title.pk},{title.pk + 1}',
+                      f'?ids={title.pk}&fields=name,genre',
+                      f'?ids={title.pk}&include=reviews:2'):
+            url = f'/api/v1/titles/batch/{query}'
+            assert get_content(url, True) == get_content(url, False), (
+                f'Проверьте, что быстрый ответ {url} совпадает с ответом '
+                'сериализатора побайтно'
+            )
+
+    @pytest.mark.parametrize('ids', ('', 'a,1', '0', '1,-2',
+                                     ','.join(map(str, range(1, 102)))))
+    def test_invalid_ids(self, ids):
+        response = APIClient().get(f'/api/v1/titles/batch/?ids={ids}')
+        assert response.status_code == 400, (
+            f'Проверьте, что ?ids={ids[:20]} возвращает 400'
+        )
+        assert 'ids' in response.json()
@@ -0,0 +1,130 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+def get_items(count, **fields):
+    return [{'name': f'Новинка {index}', 'year': 2021, 'category': 'film',
+             'genre': ['drama', 'comedy'], **fields}
+            for index in range(count)]
+
+
+@pytest.mark.django_db
+class TestTitleBulk:
+
+    def test_create(self, catalog, admin_client):
+        from reviews import cache
+        from reviews.models import ChangeLogEntry, Title
+
+        head = ChangeLogEntry.get_head()
+        # Кеш таблиц загружается при первом обращении, не в замере.
+        cache.genres.load()
+        cache.categories.load()
+        with CaptureQueriesContext(connection) as small:
+            response = admin_client.post('/api/v1/titles/', get_items(2),
+                                         format='json')
+        assert response.status_code == 201, (
+            'Проверьте, что POST массива в /api/v1/titles/ создаёт '
+            'произведения'
+        )
+        with CaptureQueriesContext(connection) as large:
+            admin_client.post('/api/v1/titles/bulk/',
+                              get_items(30, year=2022), format='json')
+        assert len(large) == len(small), (
+            'Проверьте, что число запросов не зависит от размера пакета'
+        )
+        results = response.json()['results']
+        assert [item['name'] for item in results] == ['Новинка 0',
+                                                      'Новинка 1']
+        assert results[0] == APIClient().get(
+            f'/api/v1/titles/{results[0]["id"]}/'
+        ).json(), 'Проверьте, что созданные произведения возвращаются в ответе'
+        assert Title.genre.through.objects.filter(
+            title__year__in=(2021, 2022)
+        ).count() == 64
+        assert ChangeLogEntry.objects.filter(
+            id__gt=head, model='title', action='create'
+        ).count() == 32, 'Проверьте, что создание попадает в журнал'
+
+    def test_modes(self, catalog, admin_client):
+        from reviews.models import Title
+
+        items = get_items(3) + [{'name': 'Ёлка', 'year': 2010,
+                                 'category': 'film'},
+                                {'name': 'Новинка 0', 'year': 2021,
+                                 'category': 'film'},
+                                {'name': 'Без года', 'category': 'film',
+                                 'genre': ['missing']}, 'строка']
+        count = Title.objects.count()
+        response = admin_client.post('/api/v1/titles/', items, format='json')
+        assert response.status_code == 400
+        assert [error['index'] for error in response.json()['errors']] == [
+            3, 4, 5, 6
+        ], 'Проверьте, что ошибки сообщаются по индексам элементов'
+        assert Title.objects.count() == count, (
+            'Проверьте, что в режиме atomic пакет с ошибками не записывается'
+        )
+        response = admin_client.post('/api/v1/titles/?mode=partial', items,
+                                     format='json')
+        assert response.status_code == 201
+        assert len(response.json()['results']) == 3
+        assert len(response.json()['errors']) == 4
+        assert Title.objects.count() == count + 3, (
+            'Проверьте, что в режиме partial записываются верные элементы'
+        )
+
+    def test_null_category(self, catalog, admin_client):
+        from reviews.models import Title
+
+        copies = [Title.objects.create(name='Без категории', year=2000)
+                  for _ in range(2)]
+        response = admin_client.patch('/api/v1/titles/bulk/', [
+            {'id': title.pk, 'year': 1999} for title in copies
+        ], format='json')
+        assert response.status_code == 200, (
+            'Проверьте, что произведения без категории не считаются '
+            'повторами: NULL в БД различны'
+        )
+        assert Title.objects.filter(name='Без категории',
+                                    year=1999).count() == 3
+
+    def test_update(self, catalog, admin_client):
+        from reviews.models import ChangeLogEntry, Title
+
+        title, _ = catalog
+        other = Title.objects.get(name='Один жанр')
+        head = ChangeLogEntry.get_head()
+        response = admin_client.patch('/api/v1/titles/bulk/', [
+            {'id': title.pk, 'genre': ['horror'], 'year': 2011},
+            {'id': other.pk, 'description': 'Новое описание'},
+            {'id': other.pk, 'year': 2000},
+            {'id': 999999, 'year': 2000},
+            {'year': 2000},
+        ], format='json')
+        assert response.status_code == 400
+        assert [error['index'] for error in response.json()['errors']] == [
+            2, 3, 4
+        ]
+        response = admin_client.patch('/api/v1/titles/bulk/', [
+            {'id': title.pk, 'genre': ['horror'], 'year': 2011},
+            {'id': other.pk, 'description': 'Новое описание'},
+        ], format='json')
+        assert response.status_code == 200
+        title.refresh_from_db()
+        other.refresh_from_db()
+        assert (title.year, title.rating_count) == (2011, 2), (
+            'Проверьте, что PATCH меняет только переданные поля'
+        )
+        assert list(title.genre.values_list('slug', flat=True)) == ['horror']
+        assert other.description == 'Новое описание'
+        assert other.genre.count() == 1
+        assert response.json()['results'][1]['genre'][0]['slug'] == 'comedy'
+        assert set(ChangeLogEntry.objects.filter(
+            id__gt=head, model='title'
+        ).values_list('object_id', flat=True)) == {title.pk, other.pk}
+
+    def test_permissions(self, catalog):
+        response = APIClient().post('/api/v1/titles/', get_items(1),
+                                    format='json')
+        assert response.status_code == 401
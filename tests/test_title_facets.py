@@ -0,0 +1,47 @@
+import pytest
+from rest_framework.test import APIClient
+
+
+def get_json(url, status=200):
+    response = APIClient().get(url)
+    assert response.status_code == status, (
+        f'Проверьте, что {url} возвращает {status}'
+    )
+    return response.json()
+
+
+@pytest.mark.django_db
+class TestTitleFilters:
+
+    def get_names(self, query):
+        return [item['name']
+                for item in get_json(f'/api/v1/titles/{query}')['results']]
+
+    def test_genres(self, catalog):
+        assert self.get_names('?genre=comedy,horror') == [
+            'Ёлка', 'Один жанр', 'Серия 1990', 'Серия 1991', 'Серия 1992'
+        ], 'Проверьте, что genre=a,b находит произведения любого из жанров'
+        assert self.get_names('?genre=drama,comedy&genre_mode=all') == [
+            'Ёлка'
+        ], 'Проверьте, что genre_mode=all требует все жанры'
+        assert self.get_names('?genre=drama,missing&genre_mode=all') == []
+        get_json('/api/v1/titles/?genre_mode=some', status=400)
+
+    def test_categories_and_years(self, catalog):
+        assert self.get_names('?category=film,missing&year_min=1992'
+                              '&year_max=2010') == [
+            'Ёлка', 'Серия 1992', 'Серия 1993', 'Серия 1994'
+        ]
+
+    def test_facets(self, catalog):
+        facets = get_json('/api/v1/titles/facets/?genre=horror')
+        assert facets == {
+            'genre': [
+                {'name': 'Драма', 'slug': 'drama', 'count': 6},
+                {'name': 'Ужасы "и" прочее', 'slug': 'horror', 'count': 6},
+                {'name': 'Комедия', 'slug': 'comedy', 'count': 1},
+            ],
+            'category': [{'name': 'Фильм', 'slug': 'film', 'count': 6}],
+            'year': [{'year': year, 'count': 1}
+                     for year in (1990, 1991, 1992, 1993, 1994, 2010)],
+        }, 'Проверьте, что facets считает произведения текущей выборки'
@@ -0,0 +1,76 @@
+import pytest
+from django.core.cache import caches
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+
+QUERIES = (
+    '', '?page=2', '?category=film', '?category=film&page=2',
+    '?genre=comedy', '?genre=drama,horror', '?genre=missing',
+    '?genre=drama,comedy&genre_mode=all', '?year=1999',
+    '?year_min=1991&year_max=1993', '?category=film,missing&genre=horror',
+    '?pagination=cursor', '?genre=horror&pagination=cursor',
+    '?fields=id,name', '?name=серия',
+)
+
+
+def get_content(url, enabled):
+    caches['default'].clear()
+    with override_settings(TITLE_INDEX_SETTINGS={'ENABLED': enabled}):
+        response = APIClient().get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что {url} возвращает 200'
+    )
+    return response.content
+
+
+@pytest.mark.django_db
+class TestTitleIndex:
+
+    def assert_same(self):
+        for query in QUERIES:
+            url = f'/api/v1/titles/{query}'
+            assert get_content(url, True) == get_content(url, False), (
+                f'Проверьте, что ответ {url} по индексу совпадает '
+                'с ответом без индекса'
+            )
+
+    def test_select_bits(self):
+        from reviews.bitmaps import select_bits, to_bitmap
+
+        positions = [0, 5, 7, 8, 40000, 40001, 90000]
+        bitmap = to_bitmap(positions, 100000)
+        assert select_bits(bitmap, 0, 3) == [0, 5, 7]
+        assert select_bits(bitmap, 3, 10) == positions[3:]
+        assert select_bits(bitmap, 5, 1) == [40001]
+        assert select_bits(bitmap, 7, 1) == []
+
+    def test_filters(self, catalog):
+        from reviews import bitmaps
+
+        self.assert_same()
+        assert bitmaps.titles.state is not None, (
+            'Проверьте, что фильтры списка произведений используют индекс'
+        )
+
+    def test_follows_changes(self, catalog):
+        from reviews import bitmaps
+        from reviews.models import Genre, Title
+
+        self.assert_same()
+        comedy = Genre.objects.get(slug='comedy')
+        Title.objects.create(name='Аист', year=1992).genre.set([comedy])
+        Title.objects.create(name='Эхо', year=1993).genre.set([comedy])
+        renamed = Title.objects.get(name='Серия 1991')
+        renamed.name = 'Яблоко'
+        renamed.save()
+        changed = Title.objects.get(name='Серия 1993')
+        changed.genre.set([comedy])
+        changed.year = 1991
+        changed.save()
+        Title.objects.filter(name='Без категории').delete()
+        self.assert_same()
+        assert len(bitmaps.titles.state.overlay) == 3, (
+            'Проверьте, что индекс учитывает изменения по журналу, '
+            'помещая в наложение только новые и переименованные произведения'
+        )
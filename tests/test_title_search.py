@@ -0,0 +1,43 @@
+import pytest
+from rest_framework.test import APIClient
+
+
+@pytest.mark.django_db
+class TestTitleSearch:
+
+    def get_names(self, query):
+        response = APIClient().get(f'/api/v1/titles/{query}')
+        assert response.status_code == 200, (
+            f'Проверьте, что /api/v1/titles/{query} возвращает 200'
+        )
+        return [item['name'] for item in response.json()['results']]
+
+    def test_search_by_name_and_description(self, catalog):
+        assert self.get_names('?search=серия') == [
+            f'Серия {year}' for year in range(1990, 1995)
+        ], 'Проверьте, что ?search= ищет по названию'
+        assert self.get_names('?search=описан строк') == ['Ёлка'], (
+            'Проверьте, что ?search= ищет по описанию и префиксам слов'
+        )
+        assert self.get_names('?search=серия 1992&genre=drama') == [
+            'Серия 1992'
+        ], 'Проверьте, что ?search= сочетается с остальными фильтрами'
+        assert self.get_names('?search=""') == [], (
+            'Проверьте, что запрос без слов ничего не находит'
+        )
+
+    def test_search_ranking(self, catalog):
+        from reviews.models import Title
+
+        Title.objects.create(name='Азбука', year=2000,
+                             description='Когда-то были и хроники.')
+        Title.objects.create(name='Ящер: хроники', year=2001,
+                             description='Хроники хроник, хроники.')
+        assert self.get_names('?search=хроник') == [
+            'Ящер: хроники', 'Азбука'
+        ], 'Проверьте, что результаты ?search= упорядочены по релевантности'
+
+    def test_name_filter_unchanged(self, catalog):
+        assert self.get_names('?name=ери') == [
+            f'Серия {year}' for year in range(1990, 1995)
+        ], 'Проверьте, что фильтр name по-прежнему ищет подстроку'
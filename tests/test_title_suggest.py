@@ -0,0 +1,54 @@
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+
+@pytest.mark.django_db
+class TestTitleSuggest:
+
+    def setup_method(self):
+        from reviews import suggest
+
+        # Индекс процесса переживает откат тестовой БД.
+        suggest.titles.state = None
+
+    def get_names(self, query):
+        response = APIClient().get(f'/api/v1/titles/suggest/{query}')
+        assert response.status_code == 200, (
+            f'Проверьте, что /api/v1/titles/suggest/{query} возвращает 200'
+        )
+        return [item['name'] for item in response.json()]
+
+    def test_prefix_and_weight(self, catalog):
+        assert self.get_names('?q=ел') == ['Ёлка'], (
+            'Проверьте, что подсказки не зависят от регистра и диакритики'
+        )
+        assert self.get_names('?q=жан') == ['Один жанр'], (
+            'Проверьте, что подсказки ищут начало любого слова названия'
+        )
+        assert self.get_names('?q=се&limit=2') == [
+            'Серия 1990', 'Серия 1991'
+        ], 'Проверьте, что ?limit= ограничивает число подсказок'
+        assert self.get_names('?q=') == []
+        response = APIClient().get('/api/v1/titles/suggest/?q=се&limit=0')
+        assert response.status_code == 400
+
+    def test_follows_changes(self, catalog):
+        from reviews.models import Review, Title
+
+        assert self.get_names('?q=се&limit=1') == ['Серия 1990']
+        title = Title.objects.create(name='Сердце пармы', year=2022)
+        for user in get_user_model().objects.all():
+            Review.objects.create(title=title, author=user, text='', score=5)
+        assert self.get_names('?q=се&limit=1') == ['Сердце пармы'], (
+            'Проверьте, что подсказки учитывают новые произведения и отзывы'
+        )
+        renamed = Title.objects.get(name='Серия 1990')
+        renamed.name = 'Ромашка'
+        renamed.save()
+        Title.objects.filter(name='Ёлка').delete()
+        assert self.get_names('?q=ром') == ['Ромашка']
+        assert 'Серия 1990' not in self.get_names('?q=се')
+        assert self.get_names('?q=ел') == [], (
+            'Проверьте, что подсказки учитывают удаление произведений'
+        )